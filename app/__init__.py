@@ -8,10 +8,27 @@ from flask import Flask, render_template
 from app.admin import admin_bp
 from app.auth import auth_bp
 from app.databases import databases_bp
+from app.databases.facets import init_facet_cache
+from app.databases.filters import init_filter_cache
 from app.extensions import db, login_manager
 from app.main import main_bp
+from app.instrumentation import engine_options, init_instrumentation
+from app.middleware import GzipMiddleware
+from app.migrations import create_bind_schema
+from app.pages import pages_bp
+from app.pages.render import init_render_cache
+from app.profiling import init_profiling
+from app.templating import init_templating, precompile_templates
 from app.models import User
-from app.workspace import clean_url, resolve_core_url, resolve_workspace_url, workspace_configured
+from app.user_cache import init_user_cache, load_cached_user
+from app.workspace import (
+    clean_url,
+    init_sqlite_pragmas,
+    resolve_core_url,
+    resolve_workspace_url,
+    sqlite_engine_options,
+    workspace_configured,
+)
 
 
 def _ensure_instance_dir(instance_path: str) -> str:
@@ -36,6 +53,7 @@ def create_app():
         app.config.from_object("app.config.DevelopmentConfig")
 
     instance_dir = _ensure_instance_dir(app.instance_path)
+    init_templating(app)
 
     core_url = resolve_core_url(
         instance_path=instance_dir,
@@ -45,18 +63,31 @@ def create_app():
     workspace_url = resolve_workspace_url(core_url, clean_url(os.environ.get("WORKSPACE_DATABASE_URL")))
 
     app.config["SQLALCHEMY_DATABASE_URI"] = core_url
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        **engine_options(app, [url for url in (core_url, workspace_url) if url]),
+        **sqlite_engine_options(app),
+    }
     if workspace_url:
-        app.config["SQLALCHEMY_BINDS"] = {"workspace": workspace_url}
+        # Flask-SQLAlchemy applies SQLALCHEMY_ENGINE_OPTIONS to the default
+        # bind only; other binds take their options next to the URL.
+        app.config["SQLALCHEMY_BINDS"] = {
+            "workspace": {**app.config["SQLALCHEMY_ENGINE_OPTIONS"], "url": workspace_url}
+        }
     else:
         app.config.pop("SQLALCHEMY_BINDS", None)
-
     db.init_app(app)
+    init_sqlite_pragmas(app)
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
+    init_user_cache(app)
+    init_render_cache(app)
+    init_facet_cache(app)
+    init_filter_cache(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_cached_user(int(user_id))
 
     @app.context_processor
     def inject_workspace_state():
@@ -68,6 +99,7 @@ def create_app():
     app.register_blueprint(main_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(databases_bp)
+    app.register_blueprint(pages_bp)
 
     @app.errorhandler(403)
     def forbidden(_error):
@@ -88,8 +120,23 @@ def create_app():
             click.echo("Admin user created.")
 
     with app.app_context():
-        db.create_all(bind_key=None)
+        create_bind_schema("core")
         if workspace_configured(app):
-            db.create_all(bind_key="workspace")
+            create_bind_schema("workspace")
+
+    init_instrumentation(app)
+    init_profiling(app)
+
+    if app.config.get("RESPONSE_COMPRESSION"):
+        app.wsgi_app = GzipMiddleware(
+            app.wsgi_app,
+            min_size=app.config["RESPONSE_COMPRESSION_MIN_SIZE"],
+            level=app.config["RESPONSE_COMPRESSION_LEVEL"],
+        )
+
+    if app.config.get("PRECOMPILE_TEMPLATES"):
+        _compiled, failures = precompile_templates(app)
+        for name, error in failures:
+            app.logger.error("Template %s failed to compile: %s", name, error)
 
     return app
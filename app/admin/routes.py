@@ -1,13 +1,21 @@
+import time
 from datetime import datetime
 from pathlib import Path
 
-from flask import current_app, flash, redirect, render_template, request, url_for
+from flask import abort, current_app, flash, redirect, render_template, request, send_from_directory, url_for
 from flask_login import current_user, login_required
 
 from app.admin import admin_bp
 from app.decorators import roles_required
 from app.extensions import db
+from app.migrations import create_bind_schema
 from app.models import AuditLog, ROLE_CHOICES, User, get_setting, set_setting
+from app.databases.facets import facet_cache_stats
+from app.databases.filters import filter_cache_stats
+from app.pages.render import render_cache_stats
+from app.profiling import PROFILE_SORT_KEYS, list_profiles, profile_metadata, profile_path, profile_summary
+from app.templating import template_timing_snapshot
+from app.user_cache import invalidate_user_cache
 from app.workspace import (
     WORKSPACE_SETTING_KEY,
     clean_url,
@@ -123,6 +131,7 @@ def user_edit(user_id):
             if changes:
                 _log_admin_action("user_updated", "User", user.id, changes)
                 db.session.commit()
+                invalidate_user_cache()
                 flash("User updated.", "success")
             else:
                 flash("No changes to save.", "info")
@@ -162,6 +171,12 @@ def storage():
         workspace_setting_exists=bool(clean_url(current_setting)),
         workspace_runtime_configured=workspace_configured(),
         workspace_runtime_ready=workspace_ready(),
+        render_cache=render_cache_stats(),
+        facet_cache=facet_cache_stats(),
+        filter_cache=filter_cache_stats(),
+        template_timings=sorted(
+            template_timing_snapshot().items(), key=lambda item: item[1]["total_seconds"], reverse=True
+        )[:10],
     )
 
 
@@ -173,8 +188,78 @@ def initialize_workspace():
         flash("Workspace DB is not configured. Save storage settings and restart first.", "error")
         return redirect(url_for("admin.storage"))
 
-    db.create_all(bind_key="workspace")
+    create_bind_schema("workspace")
     _log_admin_action("workspace_db_initialized", "Workspace", "workspace", None)
     db.session.commit()
     flash("Workspace DB initialized.", "success")
     return redirect(url_for("admin.storage"))
+
+
+@admin_bp.route("/profiles")
+@login_required
+@roles_required("Admin")
+def profiles():
+    directory = current_app.extensions["profile_dir"]
+    return render_template(
+        "admin/profiles.html",
+        profiles=list_profiles(directory),
+        window=current_app.extensions["profile_window"].current(),
+        max_minutes=current_app.config["PROFILE_WINDOW_MAX_MINUTES"],
+        now=time.time(),
+    )
+
+
+@admin_bp.route("/profiles/window", methods=["POST"])
+@login_required
+@roles_required("Admin")
+def profile_window():
+    window = current_app.extensions["profile_window"]
+    if request.form.get("action") == "close":
+        window.close()
+        _log_admin_action("profile_window_closed", "Profile", None)
+        db.session.commit()
+        flash("Profiling window closed.", "success")
+        return redirect(url_for("admin.profiles"))
+
+    minutes = request.form.get("minutes", type=float)
+    path_prefix = request.form.get("path_prefix", "/").strip() or "/"
+    max_minutes = current_app.config["PROFILE_WINDOW_MAX_MINUTES"]
+    if not minutes or not 0 < minutes <= max_minutes:
+        flash(f"Choose between 1 and {max_minutes} minutes.", "error")
+    elif not path_prefix.startswith("/"):
+        flash("Path prefix must start with '/'.", "error")
+    else:
+        window.open(minutes, path_prefix, current_user.username)
+        _log_admin_action("profile_window_opened", "Profile", None, {"minutes": minutes, "path_prefix": path_prefix})
+        db.session.commit()
+        flash(f"Profiling your requests under {path_prefix} for {minutes:g} minutes.", "success")
+    return redirect(url_for("admin.profiles"))
+
+
+@admin_bp.route("/profiles/<name>")
+@login_required
+@roles_required("Admin")
+def profile_detail(name):
+    path = profile_path(current_app.extensions["profile_dir"], name)
+    if path is None:
+        abort(404)
+    sort = request.args.get("sort", "cumulative")
+    if sort not in PROFILE_SORT_KEYS:
+        sort = "cumulative"
+    return render_template(
+        "admin/profile_detail.html",
+        name=name,
+        metadata=profile_metadata(current_app.extensions["profile_dir"], name),
+        summary=profile_summary(path, sort),
+        sort=sort,
+        sort_keys=PROFILE_SORT_KEYS,
+    )
+
+
+@admin_bp.route("/profiles/<name>/download")
+@login_required
+@roles_required("Admin")
+def profile_download(name):
+    if profile_path(current_app.extensions["profile_dir"], name) is None:
+        abort(404)
+    return send_from_directory(current_app.extensions["profile_dir"], f"{name}.prof", as_attachment=True)
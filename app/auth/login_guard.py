@@ -0,0 +1,91 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import text
+
+from app.extensions import db
+
+STALE_BUCKET_SECONDS = 24 * 60 * 60
+
+_hash_timings = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "rejected": 0}
+_hash_timings_lock = threading.Lock()
+
+
+def _take_token(key: str, burst: float, per_minute: float, now: float) -> float:
+    """Atomically take one token from ``key``'s bucket.
+
+    Returns 0 when a token was taken, otherwise the seconds until one refills.
+    Each step is a single statement, so concurrent workers cannot both spend
+    the last token.
+    """
+    params = {"key": key, "burst": burst, "rate": per_minute / 60.0, "now": now}
+    refill = "min(:burst, tokens + (:now - refilled_at) * :rate)"
+
+    updated = db.session.execute(
+        text(
+            f"UPDATE login_throttle SET tokens = {refill} - 1, refilled_at = :now "
+            f"WHERE key = :key AND {refill} >= 1"
+        ),
+        params,
+    )
+    if updated.rowcount:
+        return 0.0
+
+    inserted = db.session.execute(
+        text(
+            "INSERT INTO login_throttle (key, tokens, refilled_at) VALUES (:key, :burst - 1, :now) "
+            "ON CONFLICT(key) DO NOTHING"
+        ),
+        params,
+    )
+    if inserted.rowcount:
+        db.session.execute(
+            text("DELETE FROM login_throttle WHERE refilled_at < :cutoff"),
+            {"cutoff": now - STALE_BUCKET_SECONDS},
+        )
+        return 0.0
+
+    tokens = db.session.execute(text(f"SELECT {refill} FROM login_throttle WHERE key = :key"), params).scalar()
+    return max((1 - tokens) / params["rate"], 1.0)
+
+
+def check_login_throttle(username: str, ip_address: str | None) -> float:
+    """Spend one login attempt for the client IP and the username.
+
+    Returns 0 when the attempt may proceed, otherwise seconds to wait. Runs
+    before any password hashing and commits straight away so the core DB write
+    lock is never held while a hash is computed.
+    """
+    config = current_app.config
+    if not config.get("LOGIN_THROTTLE_ENABLED", True):
+        return 0.0
+
+    now = time.time()
+    buckets = (
+        (f"ip:{ip_address or 'unknown'}", config["LOGIN_THROTTLE_IP_BURST"], config["LOGIN_THROTTLE_IP_PER_MINUTE"]),
+        (f"user:{username.lower()}", config["LOGIN_THROTTLE_USER_BURST"], config["LOGIN_THROTTLE_USER_PER_MINUTE"]),
+    )
+    retry_after = 0.0
+    for key, burst, per_minute in buckets:
+        retry_after = _take_token(key, burst, per_minute, now)
+        if retry_after:
+            break
+    db.session.commit()
+
+    if retry_after:
+        with _hash_timings_lock:
+            _hash_timings["rejected"] += 1
+    return retry_after
+
+
+def record_hash_timing(seconds: float) -> None:
+    with _hash_timings_lock:
+        _hash_timings["count"] += 1
+        _hash_timings["total_seconds"] += seconds
+        _hash_timings["max_seconds"] = max(_hash_timings["max_seconds"], seconds)
+
+
+def hash_timing_snapshot() -> dict:
+    with _hash_timings_lock:
+        return dict(_hash_timings)
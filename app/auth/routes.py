@@ -1,9 +1,12 @@
+import math
+import time
 from datetime import datetime
 
-from flask import flash, redirect, render_template, request, url_for
+from flask import flash, make_response, redirect, render_template, request, url_for
 from flask_login import current_user, login_required, login_user, logout_user
 
 from app.auth import auth_bp
+from app.auth.login_guard import check_login_throttle, record_hash_timing
 from app.extensions import db
 from app.models import AuditLog, User
 
@@ -16,11 +19,29 @@ def login():
     if request.method == "POST":
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
+
+        retry_after = check_login_throttle(username, request.remote_addr)
+        if retry_after:
+            flash(f"Too many login attempts. Try again in {math.ceil(retry_after)} seconds.", "error")
+            response = make_response(render_template("login.html"), 429)
+            response.headers["Retry-After"] = str(math.ceil(retry_after))
+            return response
+
         user = User.query.filter_by(username=username).first()
 
-        if user and user.is_active and user.check_password(password):
+        hash_seconds = None
+        password_ok = False
+        if user and user.is_active:
+            started = time.perf_counter()
+            password_ok = user.check_password(password)
+            hash_seconds = time.perf_counter() - started
+            record_hash_timing(hash_seconds)
+
+        if password_ok:
             login_user(user)
             user.last_login_at = datetime.utcnow()
+            if user.password_needs_rehash():
+                user.set_password(password)
             db.session.add(
                 AuditLog(
                     actor_user_id=user.id,
@@ -31,9 +52,14 @@ def login():
                 )
             )
             db.session.commit()
-            return redirect(url_for("main.home"))
+            response = redirect(url_for("main.home"))
+        else:
+            flash("Invalid credentials or inactive account.", "error")
+            response = make_response(render_template("login.html"))
 
-        flash("Invalid credentials or inactive account.", "error")
+        if hash_seconds is not None:
+            response.headers["Server-Timing"] = f"pwhash;dur={hash_seconds * 1000:.1f}"
+        return response
 
     return render_template("login.html")
 
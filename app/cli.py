@@ -3,9 +3,22 @@ import sys
 from datetime import datetime
 from getpass import getpass
 
+from sqlalchemy import func, select
+
 from app import create_app
+from app.databases.rollups import verify_rollups
 from app.extensions import db
-from app.models import AuditLog, User
+from app.migrations import (
+    DEFAULT_BACKFILL_CHUNK_SIZE,
+    DEFAULT_BACKFILL_PAUSE,
+    MIGRATION_BINDS,
+    MigrationError,
+    run_migrations,
+)
+from app.models import AuditLog, Company, Page, Project, Task, User
+from app.pages.revisions import thin_all_revisions
+from app.synthetic import DEFAULT_COUNTS, generate_workspace, scaled_counts
+from app.templating import precompile_templates
 
 
 PLACEHOLDER_USERNAMES = {"admin", "root"}
@@ -73,15 +86,112 @@ def bootstrap_admin():
         print("Admin user created successfully.")
 
 
+def migrate(binds=None, dry_run=False, chunk_size=DEFAULT_BACKFILL_CHUNK_SIZE, pause=DEFAULT_BACKFILL_PAUSE):
+    app = create_app()
+    with app.app_context():
+        try:
+            results = run_migrations(binds=binds, dry_run=dry_run, chunk_size=chunk_size, pause=pause)
+        except MigrationError as exc:
+            raise SystemExit(str(exc))
+
+    if not results:
+        print("No pending migrations.")
+        return
+    for result in results:
+        print(f"{result['status']}: {result['bind']}/{result['migration_id']} ({result['kind']})")
+
+
+def thin_revisions():
+    app = create_app()
+    with app.app_context():
+        removed = thin_all_revisions()
+    print(f"Removed {removed} page revisions outside the retention policy.")
+
+
+def compile_templates():
+    app = create_app()
+    compiled, failures = precompile_templates(app)
+    for name, error in failures:
+        print(f"FAILED: {name}: {error}")
+    print(f"Compiled {compiled} templates, {len(failures)} failed.")
+    if failures:
+        raise SystemExit(1)
+
+
+def generate_data(scale=1.0, seed=0, force=False, **counts):
+    app = create_app()
+    with app.app_context():
+        if not force and any(
+            db.session.execute(select(func.count()).select_from(model)).scalar()
+            for model in (Company, Project, Task, Page)
+        ):
+            raise SystemExit("Workspace already has data; pass --force to add synthetic rows anyway.")
+        try:
+            inserted = generate_workspace(scaled_counts(scale, **counts), seed=seed)
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+    print("Generated " + ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in inserted.items()) + ".")
+
+
+def check_rollups(repair=False):
+    app = create_app()
+    with app.app_context():
+        mismatches = verify_rollups(repair=repair)
+        if repair:
+            db.session.commit()
+    for mismatch in mismatches:
+        print(f"{mismatch['entity']} {mismatch['id']}: stored {mismatch['stored']}, expected {mismatch['expected']}")
+    if not mismatches:
+        print("All rollup counters match.")
+    elif repair:
+        print(f"Repaired {len(mismatches)} rows.")
+    else:
+        print(f"{len(mismatches)} rows have wrong counters; rerun with --repair to fix them.")
+        raise SystemExit(1)
+
+
 def main():
     parser = argparse.ArgumentParser(description="EMS Home CLI")
     subparsers = parser.add_subparsers(dest="command")
     subparsers.add_parser("bootstrap-admin", help="Create the first admin user if none exist")
+    migrate_parser = subparsers.add_parser("migrate", help="Apply pending schema and backfill migrations")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="List pending migrations without applying")
+    migrate_parser.add_argument("--bind", choices=sorted(MIGRATION_BINDS), action="append", dest="binds")
+    migrate_parser.add_argument("--chunk-size", type=int, default=DEFAULT_BACKFILL_CHUNK_SIZE)
+    migrate_parser.add_argument("--pause", type=float, default=DEFAULT_BACKFILL_PAUSE, help="Seconds between backfill chunks")
+    subparsers.add_parser("thin-revisions", help="Apply the page revision retention policy")
+    subparsers.add_parser("precompile-templates", help="Compile all templates and report failures")
+    generate_parser = subparsers.add_parser("generate-data", help="Fill the workspace with synthetic data")
+    generate_parser.add_argument("--scale", type=float, default=1.0, help="Multiply every default count")
+    generate_parser.add_argument("--seed", type=int, default=0)
+    generate_parser.add_argument("--force", action="store_true", help="Add rows even if the workspace has data")
+    for name, default in DEFAULT_COUNTS.items():
+        generate_parser.add_argument(
+            f"--{name.replace('_', '-')}", type=int, dest=name, help=f"Rows to create (default {default} x scale)"
+        )
+
+    rollups_parser = subparsers.add_parser("verify-rollups", help="Recount project and company rollup counters")
+    rollups_parser.add_argument("--repair", action="store_true", help="Correct counters that do not match")
 
     args = parser.parse_args()
 
     if args.command == "bootstrap-admin":
         bootstrap_admin()
+    elif args.command == "migrate":
+        migrate(binds=args.binds, dry_run=args.dry_run, chunk_size=args.chunk_size, pause=args.pause)
+    elif args.command == "thin-revisions":
+        thin_revisions()
+    elif args.command == "precompile-templates":
+        compile_templates()
+    elif args.command == "generate-data":
+        generate_data(
+            scale=args.scale,
+            seed=args.seed,
+            force=args.force,
+            **{name: getattr(args, name) for name in DEFAULT_COUNTS},
+        )
+    elif args.command == "verify-rollups":
+        check_rollups(repair=args.repair)
     else:
         parser.print_help()
         raise SystemExit(1)
@@ -0,0 +1,49 @@
+import zlib
+
+from sqlalchemy.types import Text, TypeDecorator
+
+COMPRESSION_MAGIC = b"zl1:"
+COMPRESSION_THRESHOLD = 1024
+COMPRESSION_LEVEL = 6
+
+
+def encode_text(value: str | None, threshold: int = COMPRESSION_THRESHOLD):
+    """Return ``value`` unchanged when short, else zlib-compressed bytes.
+
+    SQLite stores the bytes as a BLOB in the TEXT-declared column, so rows
+    written before compression and small rows stay readable as plain text.
+    """
+    if value is None:
+        return None
+    raw = value.encode("utf-8")
+    if len(raw) < threshold:
+        return value
+    compressed = COMPRESSION_MAGIC + zlib.compress(raw, COMPRESSION_LEVEL)
+    # Already-dense text (base64, random ids) is left alone.
+    if len(compressed) >= len(raw) * 0.9:
+        return value
+    return compressed
+
+
+def decode_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(COMPRESSION_MAGIC):
+        return zlib.decompress(value[len(COMPRESSION_MAGIC):]).decode("utf-8")
+    return value.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, threshold: int = COMPRESSION_THRESHOLD, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+
+    def process_bind_param(self, value, dialect):
+        return encode_text(value, self.threshold)
+
+    def process_result_value(self, value, dialect):
+        return decode_text(value)
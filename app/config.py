@@ -9,6 +9,11 @@ def _clean_env_value(name: str) -> str | None:
     return cleaned or None
 
 
+def _optional_int(name: str) -> int | None:
+    value = _clean_env_value(name)
+    return int(value) if value is not None else None
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-insecure-change-me")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -18,6 +23,48 @@ class Config:
     CORE_DATABASE_URL = _clean_env_value("CORE_DATABASE_URL")
     WORKSPACE_DATABASE_URL = _clean_env_value("WORKSPACE_DATABASE_URL")
 
+    # Unset keeps SQLite's defaults (rollback journal, 5 s busy timeout).
+    SQLITE_JOURNAL_MODE = _clean_env_value("SQLITE_JOURNAL_MODE")
+    SQLITE_BUSY_TIMEOUT_MS = _optional_int("SQLITE_BUSY_TIMEOUT_MS")
+
+    USER_CACHE_TTL = int(_clean_env_value("USER_CACHE_TTL") or 60)
+
+    PASSWORD_HASH_METHOD = _clean_env_value("PASSWORD_HASH_METHOD") or "scrypt"
+    LOGIN_THROTTLE_ENABLED = (_clean_env_value("LOGIN_THROTTLE_ENABLED") or "1") != "0"
+    LOGIN_THROTTLE_IP_BURST = int(_clean_env_value("LOGIN_THROTTLE_IP_BURST") or 20)
+    LOGIN_THROTTLE_IP_PER_MINUTE = float(_clean_env_value("LOGIN_THROTTLE_IP_PER_MINUTE") or 10)
+    LOGIN_THROTTLE_USER_BURST = int(_clean_env_value("LOGIN_THROTTLE_USER_BURST") or 5)
+    LOGIN_THROTTLE_USER_PER_MINUTE = float(_clean_env_value("LOGIN_THROTTLE_USER_PER_MINUTE") or 2)
+
+    PAGE_REVISION_SNAPSHOT_INTERVAL = int(_clean_env_value("PAGE_REVISION_SNAPSHOT_INTERVAL") or 10)
+    PAGE_REVISION_KEEP_ALL_DAYS = int(_clean_env_value("PAGE_REVISION_KEEP_ALL_DAYS") or 14)
+    PAGE_REVISION_KEEP_DAILY_DAYS = int(_clean_env_value("PAGE_REVISION_KEEP_DAILY_DAYS") or 90)
+    PAGE_REVISION_THIN_EVERY = int(_clean_env_value("PAGE_REVISION_THIN_EVERY") or 50)
+    PAGE_RENDER_CACHE_SIZE = int(_clean_env_value("PAGE_RENDER_CACHE_SIZE") or 256)
+    BOARD_COLUMN_LIMIT = int(_clean_env_value("BOARD_COLUMN_LIMIT") or 25)
+    CALENDAR_TASK_LIMIT = int(_clean_env_value("CALENDAR_TASK_LIMIT") or 500)
+    FACET_CACHE_SIZE = int(_clean_env_value("FACET_CACHE_SIZE") or 256)
+    FILTER_CACHE_SIZE = int(_clean_env_value("FILTER_CACHE_SIZE") or 256)
+    DUPLICATE_NAME_THRESHOLD = float(_clean_env_value("DUPLICATE_NAME_THRESHOLD") or 0.5)
+    DUPLICATE_NAME_LIMIT = int(_clean_env_value("DUPLICATE_NAME_LIMIT") or 5)
+    LIST_STREAMING = (_clean_env_value("LIST_STREAMING") or "1") != "0"
+    REQUEST_INSTRUMENTATION = (_clean_env_value("REQUEST_INSTRUMENTATION") or "1") != "0"
+    SLOW_REQUEST_MS = float(_clean_env_value("SLOW_REQUEST_MS") or 500)
+    SLOW_QUERY_MS = float(_clean_env_value("SLOW_QUERY_MS") or 100)
+    SLOW_LOG_DIR = _clean_env_value("SLOW_LOG_DIR")
+    METRICS_DIR = _clean_env_value("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(_clean_env_value("METRICS_FLUSH_INTERVAL") or 1)
+    PROFILE_DIR = _clean_env_value("PROFILE_DIR")
+    PROFILE_KEEP = int(_clean_env_value("PROFILE_KEEP") or 200)
+    PROFILE_WINDOW_MAX_MINUTES = int(_clean_env_value("PROFILE_WINDOW_MAX_MINUTES") or 60)
+    RESPONSE_COMPRESSION = (_clean_env_value("RESPONSE_COMPRESSION") or "1") != "0"
+    RESPONSE_COMPRESSION_MIN_SIZE = int(_clean_env_value("RESPONSE_COMPRESSION_MIN_SIZE") or 1024)
+    RESPONSE_COMPRESSION_LEVEL = int(_clean_env_value("RESPONSE_COMPRESSION_LEVEL") or 6)
+
+    TEMPLATE_BYTECODE_CACHE = (_clean_env_value("TEMPLATE_BYTECODE_CACHE") or "1") != "0"
+    TEMPLATE_BYTECODE_CACHE_DIR = _clean_env_value("TEMPLATE_BYTECODE_CACHE_DIR")
+    PRECOMPILE_TEMPLATES = (_clean_env_value("PRECOMPILE_TEMPLATES") or "0") != "0"
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -25,4 +72,7 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    # WAL lets list pages stream while other workers write.
+    SQLITE_JOURNAL_MODE = _clean_env_value("SQLITE_JOURNAL_MODE") or "wal"
+    PRECOMPILE_TEMPLATES = (_clean_env_value("PRECOMPILE_TEMPLATES") or "1") != "0"
     SESSION_COOKIE_SECURE = True
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import contains_eager
+
+from app.extensions import db
+from app.models import Project, Task
+
+BOARD_STATUSES = ("backlog", "next", "doing", "blocked", "done")
+# Cards are newest first; ``id`` breaks ties so "load more" cursors are exact.
+BOARD_ORDER = (Task.updated_at.desc(), Task.id.desc())
+
+
+def board_columns(statuses, criteria, limit: int) -> dict:
+    """The first ``limit`` cards and the card count of every status column.
+
+    One query: ROW_NUMBER() and COUNT() windows partitioned by status rank
+    the filtered tasks, and only rows ranked within the limit are returned.
+    """
+    ranked = (
+        db.session.query(
+            Task.id.label("task_id"),
+            func.row_number().over(partition_by=Task.status, order_by=BOARD_ORDER).label("position"),
+            func.count().over(partition_by=Task.status).label("column_total"),
+        )
+        .outerjoin(Project)
+        .filter(Task.status.in_(statuses), *criteria)
+        .subquery()
+    )
+    rows = (
+        db.session.query(Task, ranked.c.column_total)
+        .join(ranked, Task.id == ranked.c.task_id)
+        .outerjoin(Project)
+        .options(contains_eager(Task.project))
+        .filter(ranked.c.position <= limit)
+        .order_by(Task.status, ranked.c.position)
+    )
+    columns = {status: {"status": status, "tasks": [], "total": 0} for status in statuses}
+    for task, column_total in rows:
+        column = columns[task.status]
+        column["tasks"].append(task)
+        column["total"] = column_total
+    return columns
+
+
+def column_cards(status: str, criteria, after: tuple | None, limit: int) -> tuple[list, bool]:
+    """The next ``limit`` cards of one column after the ``(updated_at, id)`` cursor.
+
+    Returns the cards and whether more follow.
+    """
+    query = (
+        Task.query.outerjoin(Project)
+        .options(contains_eager(Task.project))
+        .filter(Task.status == status, *criteria)
+    )
+    if after is not None:
+        updated_at, task_id = after
+        query = query.filter(
+            or_(Task.updated_at < updated_at, and_(Task.updated_at == updated_at, Task.id < task_id))
+        )
+    tasks = query.order_by(*BOARD_ORDER).limit(limit + 1).all()
+    return tasks[:limit], len(tasks) > limit
+
+
+def parse_cursor(value: str) -> tuple | None:
+    """``<updated_at ISO>~<id>`` as written by the board template, or ``None``."""
+    updated_at, _, task_id = (value or "").partition("~")
+    try:
+        return datetime.fromisoformat(updated_at), int(task_id)
+    except ValueError:
+        return None
+
+
+def card_cursor(task) -> str:
+    return f"{task.updated_at.isoformat()}~{task.id}"
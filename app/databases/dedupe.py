@@ -0,0 +1,182 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, literal_column, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.databases.rollups import project_rollups, remove_project_rollups, task_rollups
+from app.extensions import db
+from app.models import Company, NameTrigram, NameTrigramCount, Project, Task
+
+DEFAULT_DUPLICATE_THRESHOLD = 0.5
+DEFAULT_DUPLICATE_LIMIT = 5
+# Best trigram overlaps scored exactly per lookup.
+CANDIDATE_LIMIT = 100
+# Trigrams in more names than this are left out of lookups when the bound allows.
+COMMON_TRIGRAM_RECORDS = 500
+
+ENTITY_MODELS = {"company": Company, "project": Project}
+# Legal-form words say nothing about which company is meant: "Acme Corp." is "Acme Inc".
+COMPANY_NOISE_WORDS = frozenset(
+    ("the", "inc", "incorporated", "corp", "corporation", "co", "company", "llc", "ltd", "limited", "plc", "gmbh", "ag")
+)
+
+
+def normalize_name(entity: str, name: str) -> str:
+    """Lowercase ASCII words of ``name``, without company legal forms."""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii").lower()
+    words = re.findall(r"[a-z0-9]+", text)
+    if entity == "company":
+        words = [word for word in words if word not in COMPANY_NOISE_WORDS] or words
+    return " ".join(words)
+
+
+def name_trigrams(entity: str, name: str) -> set[str]:
+    """Trigrams of each normalized word, padded like pg_trgm ("  a", " ac", ..., "me ")."""
+    grams = set()
+    for word in normalize_name(entity, name).split():
+        padded = f"  {word} "
+        grams.update(padded[index : index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+def similarity(left: set, right: set) -> float:
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+def trigram_rows(entity: str, records) -> list[tuple]:
+    """``(entity, trigram, record_id)`` rows for ``(record_id, name)`` pairs."""
+    return [(entity, gram, record_id) for record_id, name in records for gram in sorted(name_trigrams(entity, name))]
+
+
+def _count_trigrams(entity: str, grams: Counter) -> None:
+    if not grams:
+        return
+    statement = sqlite_insert(NameTrigramCount)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["entity", "trigram"],
+            set_={"records": NameTrigramCount.records + statement.excluded.records},
+        ),
+        [{"entity": entity, "trigram": gram, "records": count} for gram, count in sorted(grams.items())],
+    )
+
+
+def index_names(entity: str, records) -> None:
+    """(Re)index the names of ``(record_id, name)`` pairs, in the caller's transaction."""
+    records = list(records)
+    if not records:
+        return
+    unindex_names(entity, [record_id for record_id, _name in records])
+    rows = trigram_rows(entity, records)
+    if rows:
+        db.session.execute(
+            insert(NameTrigram),
+            [{"entity": entity, "trigram": gram, "record_id": record_id} for entity, gram, record_id in rows],
+        )
+        _count_trigrams(entity, Counter(gram for _entity, gram, _record_id in rows))
+
+
+def unindex_names(entity: str, record_ids) -> None:
+    removed = db.session.execute(
+        delete(NameTrigram)
+        .where(NameTrigram.entity == entity, NameTrigram.record_id.in_(list(record_ids)))
+        .returning(NameTrigram.trigram)
+    ).scalars()
+    _count_trigrams(entity, Counter({gram: -count for gram, count in Counter(removed).items()}))
+
+
+def similar_names(entity: str, name: str, exclude_id: int | None = None, limit: int | None = None) -> list[dict]:
+    """Existing companies or projects whose names are near ``name``, best first.
+
+    Jaccard similarity >= t needs ``t x |query trigrams|`` shared trigrams.
+    Up to all but one of those may be trigrams found in more than
+    ``COMMON_TRIGRAM_RECORDS`` names; they are left out of the lookup and the
+    bound lowered to match, so long posting lists are never read. The index
+    yields the records sharing enough of the rest, joined to their names, and
+    those are scored exactly here.
+    """
+    threshold = current_app.config.get("DUPLICATE_NAME_THRESHOLD", DEFAULT_DUPLICATE_THRESHOLD)
+    limit = limit or current_app.config.get("DUPLICATE_NAME_LIMIT", DEFAULT_DUPLICATE_LIMIT)
+    grams = name_trigrams(entity, name)
+    if not grams:
+        return []
+
+    needed = max(1, math.ceil(threshold * len(grams)))
+    counts = dict(
+        db.session.execute(
+            select(NameTrigramCount.trigram, NameTrigramCount.records).where(
+                NameTrigramCount.entity == entity, NameTrigramCount.trigram.in_(sorted(grams))
+            )
+        ).all()
+    )
+    common = sorted((gram for gram in grams if counts.get(gram, 0) > COMMON_TRIGRAM_RECORDS), key=counts.get, reverse=True)
+    skipped = set(common[: needed - 1])
+    probe = sorted(gram for gram in grams if counts.get(gram, 0) > 0 and gram not in skipped)
+    if not probe:
+        return []
+
+    model = ENTITY_MODELS[entity]
+    hits = func.count().label("hits")
+    candidates = select(NameTrigram.record_id, hits).where(NameTrigram.entity == entity, NameTrigram.trigram.in_(probe))
+    if exclude_id is not None:
+        candidates = candidates.where(NameTrigram.record_id != exclude_id)
+    candidates = (
+        # "+ 0" keeps SQLite reading postings by trigram; grouping straight
+        # off the record index would walk every posting of the entity.
+        candidates.group_by(NameTrigram.record_id + literal_column("0"))
+        .having(func.count() >= needed - len(skipped))
+        .order_by(hits.desc(), NameTrigram.record_id)
+        .limit(CANDIDATE_LIMIT)
+        .subquery()
+    )
+    rows = db.session.execute(select(model.id, model.name).join(candidates, candidates.c.record_id == model.id))
+
+    matches = []
+    for record_id, record_name in rows:
+        score = similarity(grams, name_trigrams(entity, record_name))
+        if score >= threshold:
+            matches.append({"id": record_id, "name": record_name, "score": round(score, 2)})
+    matches.sort(key=lambda match: (-match["score"], match["name"].lower(), match["id"]))
+    return matches[:limit]
+
+
+def merge_companies(source: Company, target: Company) -> int:
+    """Move every project of ``source`` to ``target`` and delete ``source``.
+
+    Returns the number of projects moved. The caller audits and commits.
+    """
+    with project_rollups(Project.company_id.in_((source.id, target.id))):
+        moved = db.session.execute(
+            update(Project)
+            .where(Project.company_id == source.id)
+            .values(company_id=target.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    unindex_names("company", [source.id])
+    db.session.delete(source)
+    return moved
+
+
+def merge_projects(source: Project, target: Project) -> int:
+    """Move every task of ``source`` to ``target`` and delete ``source``.
+
+    Returns the number of tasks moved. The caller audits and commits.
+    """
+    with task_rollups(Task.project_id.in_((source.id, target.id))):
+        moved = db.session.execute(
+            update(Task)
+            .where(Task.project_id == source.id)
+            .values(project_id=target.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    remove_project_rollups(Project.id == source.id)
+    unindex_names("project", [source.id])
+    db.session.delete(source)
+    return moved
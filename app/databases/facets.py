@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.extensions import db
+from app.models import TableGeneration
+
+DEFAULT_FACET_CACHE_SIZE = 256
+
+
+class FacetCache:
+    """In-process LRU of grouped facet rows, keyed by list and search state.
+
+    Each entry remembers the table generations it was counted at; a write
+    anywhere in those tables makes it stale.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def rows(self, key, version, compute) -> list:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+
+        rows = compute()
+        with self._lock:
+            self._entries[key] = (version, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return rows
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "size": self.size}
+
+
+def init_facet_cache(app) -> None:
+    app.extensions["facet_cache"] = FacetCache(app.config.get("FACET_CACHE_SIZE", DEFAULT_FACET_CACHE_SIZE))
+    _install_generation_hooks()
+
+
+def facet_cache_stats() -> dict:
+    return current_app.extensions["facet_cache"].snapshot()
+
+
+# Tables whose writes bump their ``TableGeneration`` row.
+GENERATION_TABLES = frozenset(("task", "project", "company"))
+
+
+def _bump_generations(session, tables) -> None:
+    # Once per table and transaction; later writes commit with the same bump.
+    bumped = session.info.setdefault("bumped_generations", set())
+    for name in sorted(set(tables) - bumped):
+        statement = sqlite_insert(TableGeneration).values(name=name, generation=1)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[TableGeneration.name],
+                set_={"generation": TableGeneration.generation + 1},
+            )
+        )
+        bumped.add(name)
+
+
+def _generation_flush(session, flush_context, instances):
+    tables = {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if getattr(obj, "__table__", None) is not None and obj.__table__.name in GENERATION_TABLES
+    }
+    if tables:
+        _bump_generations(session, tables)
+
+
+def _generation_execute(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements never pass through a flush.
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in GENERATION_TABLES:
+        _bump_generations(orm_execute_state.session, {mapper.local_table.name})
+
+
+def _generation_transaction_end(session):
+    session.info.pop("bumped_generations", None)
+
+
+def _install_generation_hooks() -> None:
+    if event.contains(db.session, "before_flush", _generation_flush):
+        return
+    event.listen(db.session, "before_flush", _generation_flush)
+    event.listen(db.session, "do_orm_execute", _generation_execute)
+    event.listen(db.session, "after_commit", _generation_transaction_end)
+    event.listen(db.session, "after_rollback", _generation_transaction_end)
+
+
+def tables_version(*models) -> tuple:
+    """Generation of each model's table, read by primary key in one statement."""
+    names = [model.__table__.name for model in models]
+    generations = dict(
+        db.session.execute(
+            select(TableGeneration.name, TableGeneration.generation).where(TableGeneration.name.in_(names))
+        ).all()
+    )
+    return tuple(generations.get(name, 0) for name in names)
+
+
+def facet_counts(query, facets: dict, cache_key, version) -> dict:
+    """Counts per value of every facet, each under the other facets' selections.
+
+    ``facets`` maps a name to ``(column, selected)``, ``selected`` being
+    ``None`` when unfiltered. ``query`` carries the list's other filters. One
+    GROUP BY over all facet columns serves every facet, like GROUPING SETS;
+    its rows are cached so changing a facet selection needs no query at all.
+    """
+    names = list(facets)
+    columns = [facets[name][0] for name in names]
+    rows = current_app.extensions["facet_cache"].rows(
+        cache_key,
+        version,
+        lambda: [tuple(row) for row in query.with_entities(*columns, func.count()).group_by(*columns)],
+    )
+
+    counts = {name: {} for name in names}
+    for *values, count in rows:
+        for index, name in enumerate(names):
+            if all(
+                facets[other][1] is None or values[other_index] == facets[other][1]
+                for other_index, other in enumerate(names)
+                if other_index != index
+            ):
+                counts[name][values[index]] = counts[name].get(values[index], 0) + count
+    return counts
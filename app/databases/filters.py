@@ -0,0 +1,262 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, or_
+
+from app.models import (
+    COMPANY_STATUS_CHOICES,
+    PROJECT_STATUS_CHOICES,
+    TASK_STATUS_CHOICES,
+    Company,
+    Project,
+    Task,
+)
+
+DEFAULT_FILTER_CACHE_SIZE = 256
+MAX_FILTER_DEPTH = 4
+MAX_FILTER_CONDITIONS = 30
+MAX_FILTER_VALUES = 50
+MAX_FILTER_TEXT = 200
+MAX_FILTER_LENGTH = 4000
+CURRENT_USER_PARAM = "filter_current_user_id"
+
+GROUP_OPS = ("and", "or")
+# Operators allowed per field kind.
+KIND_OPS = {
+    "text": ("contains", "eq"),
+    "choice": ("eq", "ne", "in", "not_in"),
+    "ref": ("eq", "ne", "in", "not_in", "is_null", "not_null"),
+    "date": ("eq", "lt", "lte", "gt", "gte", "between", "is_null", "not_null"),
+    "datetime": ("lt", "lte", "gt", "gte", "between"),
+    "user": ("eq", "ne"),
+    "number": ("eq", "ne", "lt", "lte", "gt", "gte"),
+}
+
+# database key -> field name -> (kind, column, choices)
+FILTER_FIELDS = {
+    "tasks": {
+        "title": ("text", Task.title, None),
+        "status": ("choice", Task.status, TASK_STATUS_CHOICES),
+        "project_id": ("ref", Task.project_id, None),
+        "due_date": ("date", Task.due_date, None),
+        "updated_at": ("datetime", Task.updated_at, None),
+        "created_by": ("user", Task.created_by_user_id, None),
+    },
+    "projects": {
+        "name": ("text", Project.name, None),
+        "status": ("choice", Project.status, PROJECT_STATUS_CHOICES),
+        "company_id": ("ref", Project.company_id, None),
+        "total_tasks": ("number", Project.task_count, None),
+        "open_tasks": ("number", Project.open_task_count, None),
+        "done_tasks": ("number", Project.done_task_count, None),
+        "last_activity": ("datetime", Project.last_activity_at, None),
+        "updated_at": ("datetime", Project.updated_at, None),
+        "created_by": ("user", Project.created_by_user_id, None),
+    },
+    "companies": {
+        "name": ("text", Company.name, None),
+        "status": ("choice", Company.status, COMPANY_STATUS_CHOICES),
+        "projects": ("number", Company.project_count, None),
+        "active_projects": ("number", Company.active_project_count, None),
+        "updated_at": ("datetime", Company.updated_at, None),
+        "created_by": ("user", Company.created_by_user_id, None),
+    },
+}
+
+
+class FilterError(ValueError):
+    pass
+
+
+class CompiledFilter:
+    """A validated filter expression as a reusable SQLAlchemy criterion.
+
+    "created by me" compiles to a bound parameter, so one compiled filter
+    serves every user; ``params`` supplies the value per request.
+    """
+
+    def __init__(self, criterion, uses_current_user: bool):
+        self.criterion = criterion
+        self.uses_current_user = uses_current_user
+
+    def params(self, user_id: int) -> dict:
+        return {CURRENT_USER_PARAM: user_id} if self.uses_current_user else {}
+
+
+class FilterCache:
+    """In-process LRU of compiled filters keyed by database and expression hash."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, database_key: str, text: str) -> CompiledFilter:
+        key = (database_key, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return compiled
+            self.stats["misses"] += 1
+
+        # Invalid expressions raise and are never cached.
+        compiled = compile_filter(database_key, parse_filter(text))
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "size": self.size}
+
+
+def init_filter_cache(app) -> None:
+    app.extensions["filter_cache"] = FilterCache(app.config.get("FILTER_CACHE_SIZE", DEFAULT_FILTER_CACHE_SIZE))
+
+
+def cached_filter(database_key: str, text: str) -> CompiledFilter:
+    return current_app.extensions["filter_cache"].get(database_key, text)
+
+
+def filter_cache_stats() -> dict:
+    return current_app.extensions["filter_cache"].snapshot()
+
+
+def parse_filter(text: str):
+    if len(text) > MAX_FILTER_LENGTH:
+        raise FilterError("Filter is too long.")
+    try:
+        return json.loads(text)
+    except ValueError:
+        raise FilterError("Filter is not valid JSON.") from None
+
+
+def canonical_filter(expression) -> str:
+    """The one text form of an expression, used in URLs and as its cache key."""
+    return json.dumps(expression, sort_keys=True, separators=(",", ":"))
+
+
+def compile_filter(database_key: str, expression) -> CompiledFilter:
+    """Validate ``expression`` against the fields of ``database_key`` and compile it.
+
+    An expression is a condition ``{"field": ..., "op": ..., "value": ...}``
+    or a group ``{"op": "and"|"or", "args": [...]}`` of expressions.
+    """
+    fields = FILTER_FIELDS.get(database_key)
+    if fields is None:
+        raise FilterError(f"Unknown database '{database_key}'.")
+    state = {"conditions": 0, "uses_current_user": False}
+    criterion = _compile_node(expression, fields, 1, state)
+    return CompiledFilter(criterion, state["uses_current_user"])
+
+
+def _compile_node(node, fields, depth, state):
+    if not isinstance(node, dict):
+        raise FilterError("Each filter must be an object.")
+    if node.get("op") in GROUP_OPS:
+        args = node.get("args")
+        if not isinstance(args, list) or not args:
+            raise FilterError(f"An '{node['op']}' group needs a list of filters.")
+        if depth >= MAX_FILTER_DEPTH:
+            raise FilterError(f"Filters can be nested at most {MAX_FILTER_DEPTH} deep.")
+        parts = [_compile_node(arg, fields, depth + 1, state) for arg in args]
+        return and_(*parts) if node["op"] == "and" else or_(*parts)
+
+    state["conditions"] += 1
+    if state["conditions"] > MAX_FILTER_CONDITIONS:
+        raise FilterError(f"Filters can have at most {MAX_FILTER_CONDITIONS} conditions.")
+    name, op = node.get("field"), node.get("op")
+    if name not in fields:
+        raise FilterError(f"Unknown filter field '{name}'.")
+    kind, column, choices = fields[name]
+    if op not in KIND_OPS[kind]:
+        raise FilterError(f"Operator '{op}' does not apply to '{name}'.")
+    value = node.get("value")
+
+    if op == "is_null":
+        return column.is_(None)
+    if op == "not_null":
+        return column.is_not(None)
+    if kind == "user":
+        if value != "me":
+            raise FilterError(f"'{name}' can only be compared with \"me\".")
+        state["uses_current_user"] = True
+        current = bindparam(CURRENT_USER_PARAM)
+        return column == current if op == "eq" else column != current
+    if op in ("in", "not_in"):
+        if not isinstance(value, list) or not value or len(value) > MAX_FILTER_VALUES:
+            raise FilterError(f"'{name}' {op} needs a list of 1 to {MAX_FILTER_VALUES} values.")
+        values = [_scalar(kind, name, item, choices) for item in value]
+        return column.in_(values) if op == "in" else column.not_in(values)
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise FilterError(f"'{name}' between needs two dates.")
+        low, high = (_scalar(kind, name, item, choices) for item in value)
+        return and_(_compare(kind, column, "gte", low), _compare(kind, column, "lte", high))
+    if op == "contains":
+        return column.ilike(f"%{_scalar(kind, name, value, choices)}%")
+    return _compare(kind, column, op, _scalar(kind, name, value, choices))
+
+
+def _scalar(kind, name, value, choices):
+    if kind == "text":
+        if not isinstance(value, str) or not value or len(value) > MAX_FILTER_TEXT:
+            raise FilterError(f"'{name}' needs text of 1 to {MAX_FILTER_TEXT} characters.")
+        return value
+    if kind == "choice":
+        if value not in choices:
+            raise FilterError(f"'{value}' is not a valid {name}.")
+        return value
+    if kind == "ref":
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise FilterError(f"'{name}' needs a record id.")
+        return value
+    if kind == "number":
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise FilterError(f"'{name}' needs a whole number of 0 or more.")
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise FilterError(f"'{name}' needs a YYYY-MM-DD date.") from None
+
+
+def _compare(kind, column, op, value):
+    if kind == "datetime":
+        # Timestamps compare by whole days, as range bounds that keep an index usable.
+        start = datetime.combine(value, time.min)
+        end = start + timedelta(days=1)
+        return {
+            "lt": column < start,
+            "lte": column < end,
+            "gt": column >= end,
+            "gte": column >= start,
+            "eq": and_(column >= start, column < end),
+        }[op]
+    return {
+        "eq": column == value,
+        "ne": column != value,
+        "lt": column < value,
+        "lte": column <= value,
+        "gt": column > value,
+        "gte": column >= value,
+    }[op]
+
+
+def filter_fields_for(database_key: str) -> dict:
+    """Field names, kinds, operators and choices for the filter builder."""
+    return {
+        name: {"kind": kind, "ops": list(KIND_OPS[kind]), "choices": list(choices or ())}
+        for name, (kind, _column, choices) in FILTER_FIELDS.get(database_key, {}).items()
+    }
+
@@ -0,0 +1,151 @@
+import operator
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import case, func, select, update
+
+from app.databases.schedule import CLOSED_TASK_STATUSES
+from app.extensions import db
+from app.models import Company, Project, Task
+
+DONE_TASK_STATUS = "done"
+ACTIVE_PROJECT_STATUS = "active"
+
+PROJECT_ROLLUPS = ("task_count", "open_task_count", "done_task_count")
+COMPANY_ROLLUPS = ("project_count", "active_project_count")
+
+
+def _task_totals(criteria):
+    return (
+        select(
+            Task.project_id.label("parent_id"),
+            func.count().label("task_count"),
+            func.sum(case((Task.status.not_in(CLOSED_TASK_STATUSES), 1), else_=0)).label("open_task_count"),
+            func.sum(case((Task.status == DONE_TASK_STATUS, 1), else_=0)).label("done_task_count"),
+            func.max(Task.updated_at).label("latest"),
+        )
+        .where(Task.project_id.is_not(None), *criteria)
+        .group_by(Task.project_id)
+        .subquery()
+    )
+
+
+def _project_totals(criteria):
+    return (
+        select(
+            Project.company_id.label("parent_id"),
+            func.count().label("project_count"),
+            func.sum(case((Project.status == ACTIVE_PROJECT_STATUS, 1), else_=0)).label("active_project_count"),
+        )
+        .where(Project.company_id.is_not(None), *criteria)
+        .group_by(Project.company_id)
+        .subquery()
+    )
+
+
+def _shift(parent, counters, totals, apply, extra):
+    # One UPDATE ... FROM (grouped totals): bulk changes cost the same as one row.
+    db.session.execute(
+        update(parent)
+        .where(parent.id == totals.c.parent_id)
+        .values(
+            **{name: apply(getattr(parent, name), totals.c[name]) for name in counters},
+            **extra,
+            # Counters changing is not an edit of the row itself.
+            updated_at=parent.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_task_rollups(*criteria) -> None:
+    """Take the tasks matching ``criteria`` out of their projects' counters."""
+    _shift(Project, PROJECT_ROLLUPS, _task_totals(criteria), operator.sub, {"last_activity_at": datetime.utcnow()})
+
+
+def add_task_rollups(*criteria) -> None:
+    """Count the tasks matching ``criteria`` into their projects' counters."""
+    _shift(Project, PROJECT_ROLLUPS, _task_totals(criteria), operator.add, {"last_activity_at": datetime.utcnow()})
+
+
+def remove_project_rollups(*criteria) -> None:
+    _shift(Company, COMPANY_ROLLUPS, _project_totals(criteria), operator.sub, {})
+
+
+def add_project_rollups(*criteria) -> None:
+    _shift(Company, COMPANY_ROLLUPS, _project_totals(criteria), operator.add, {})
+
+
+@contextmanager
+def task_rollups(*criteria):
+    """Wrap a change to existing tasks: uncount them before, recount them after."""
+    remove_task_rollups(*criteria)
+    yield
+    db.session.flush()
+    add_task_rollups(*criteria)
+
+
+@contextmanager
+def project_rollups(*criteria):
+    remove_project_rollups(*criteria)
+    yield
+    db.session.flush()
+    add_project_rollups(*criteria)
+
+
+def _project_checks():
+    totals = _task_totals(())
+    rows = db.session.execute(
+        select(
+            Project.id,
+            Project.updated_at,
+            Project.last_activity_at,
+            *(getattr(Project, name) for name in PROJECT_ROLLUPS),
+            *(func.coalesce(totals.c[name], 0) for name in PROJECT_ROLLUPS),
+            totals.c.latest,
+        ).outerjoin(totals, totals.c.parent_id == Project.id)
+    )
+    count = len(PROJECT_ROLLUPS)
+    for project_id, updated_at, last_activity_at, *values in rows:
+        stored, expected, latest = values[:count], values[count : count * 2], values[-1]
+        changes = {name: want for name, have, want in zip(PROJECT_ROLLUPS, stored, expected) if have != want}
+        # Deleted tasks leave no trace, so activity may be newer than any task, never older.
+        if latest is not None and (last_activity_at is None or last_activity_at < latest):
+            changes["last_activity_at"] = latest
+        if changes:
+            yield project_id, updated_at, dict(zip(PROJECT_ROLLUPS, stored)), changes
+
+
+def _company_checks():
+    totals = _project_totals(())
+    rows = db.session.execute(
+        select(
+            Company.id,
+            Company.updated_at,
+            *(getattr(Company, name) for name in COMPANY_ROLLUPS),
+            *(func.coalesce(totals.c[name], 0) for name in COMPANY_ROLLUPS),
+        ).outerjoin(totals, totals.c.parent_id == Company.id)
+    )
+    count = len(COMPANY_ROLLUPS)
+    for company_id, updated_at, *values in rows:
+        stored, expected = values[:count], values[count:]
+        changes = {name: want for name, have, want in zip(COMPANY_ROLLUPS, stored, expected) if have != want}
+        if changes:
+            yield company_id, updated_at, dict(zip(COMPANY_ROLLUPS, stored)), changes
+
+
+def verify_rollups(repair: bool = False) -> list[dict]:
+    """Recount every project and company from their children.
+
+    Returns one entry per row whose counters were wrong; with ``repair`` the
+    counters are corrected (the caller commits).
+    """
+    mismatches = []
+    for model, checks in ((Project, _project_checks()), (Company, _company_checks())):
+        fixes = []
+        for row_id, updated_at, stored, changes in checks:
+            mismatches.append({"entity": model.__name__, "id": row_id, "stored": stored, "expected": changes})
+            fixes.append({"id": row_id, "updated_at": updated_at, **changes})
+        if repair and fixes:
+            db.session.execute(update(model), fixes)
+    return mismatches
@@ -1,12 +1,56 @@
-from datetime import datetime
-
-from flask import abort, flash, redirect, render_template, request, url_for
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+
+from flask import (
+    Response,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_template,
+    url_for,
+)
 from flask_login import current_user, login_required
-from sqlalchemy import or_
+from markupsafe import Markup
+from sqlalchemy import Float, cast, func, or_
+from sqlalchemy.orm import contains_eager
 
 from app.databases import databases_bp
+from app.databases.dedupe import index_names, merge_companies, merge_projects, similar_names, unindex_names
+from app.databases.facets import facet_counts, tables_version
+from app.databases.filters import (
+    FilterError,
+    cached_filter,
+    canonical_filter,
+    compile_filter,
+    filter_fields_for,
+    parse_filter,
+)
+from app.databases.board import BOARD_STATUSES, board_columns, card_cursor, column_cards, parse_cursor
+from app.databases.rollups import (
+    add_project_rollups,
+    add_task_rollups,
+    project_rollups,
+    remove_project_rollups,
+    remove_task_rollups,
+    task_rollups,
+)
+from app.databases.schedule import (
+    CALENDAR_VIEWS,
+    CLOSED_TASK_STATUSES,
+    calendar_range,
+    calendar_weeks,
+    shift_period,
+    tasks_due_between,
+    week_start,
+)
 from app.extensions import db
-from app.workspace import workspace_configured, workspace_ready
+from app.workspace import reads_block_writers, workspace_guard_response
 
 from app.models import (
     COMPANY_STATUS_CHOICES,
@@ -22,23 +66,10 @@ from app.models import (
     TaskPageLink,
 )
 
-def _workspace_guard_response():
-    if current_user.role == "Admin":
-        if not workspace_configured():
-            flash("Workspace DB not configured. Configure storage first.", "error")
-        else:
-            flash("Workspace DB is configured but not initialized. Initialize it from Admin > Storage.", "error")
-        return redirect(url_for("admin.storage"))
-
-    return render_template("databases/workspace_required.html"), 200
-
-
 @databases_bp.before_request
 @login_required
 def ensure_workspace_available():
-    if workspace_configured() and workspace_ready():
-        return None
-    return _workspace_guard_response()
+    return workspace_guard_response()
 
 
 LIST_ENDPOINTS = {
@@ -48,6 +79,97 @@ LIST_ENDPOINTS = {
 }
 
 
+# List templates print ``stream_flush`` just before their rows; a streamed
+# response sends everything up to that point straight away.
+STREAM_FLUSH_MARKER = "<!--stream-flush-->"
+STREAM_CHUNK_SIZE = 16 * 1024
+LIST_YIELD_PER = 200
+
+
+def _buffered_chunks(chunks):
+    # Jinja yields many tiny strings; batch them so each write is worthwhile.
+    buffer, length = [], 0
+    for chunk in chunks:
+        if STREAM_FLUSH_MARKER in chunk:
+            before, _, after = chunk.partition(STREAM_FLUSH_MARKER)
+            buffer.append(before)
+            yield "".join(buffer)
+            buffer, length = [after], len(after)
+            continue
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= STREAM_CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _wants_fragment():
+    return request.args.get("fragment") == "rows" or request.headers.get("X-Fragment") == "rows"
+
+
+def _streams_rows(rows_query):
+    if not current_app.config.get("LIST_STREAMING", True):
+        return False
+    # A streamed body keeps its read open until the last row is sent, which
+    # only SQLite in WAL mode can do without holding up writers.
+    entity = rows_query.column_descriptions[0]["entity"]
+    return not reads_block_writers(db.session.connection(bind_arguments={"mapper": entity}))
+
+
+def _render_list(rows_query, **context):
+    """Render a list page, or only its table for fragment requests.
+
+    Rows stream from a server-side cursor when ``LIST_STREAMING`` is on and
+    the database lets a long read run alongside writes.
+    """
+    database_key = context["database_key"]
+    if _wants_fragment():
+        template_name = f"databases/_{database_key}_table.html"
+    else:
+        template_name = f"databases/{database_key}_list.html"
+
+    if _streams_rows(rows_query):
+        context[database_key] = rows_query.yield_per(LIST_YIELD_PER)
+        context["stream_flush"] = Markup(STREAM_FLUSH_MARKER)
+        response = Response(_buffered_chunks(stream_template(template_name, **context)), mimetype="text/html")
+    else:
+        context[database_key] = rows_query.all()
+        response = current_app.make_response(render_template(template_name, **context))
+    response.vary.add("X-Fragment")
+    return response
+
+
+def _detail_etag(*versions):
+    """Weak ETag for a detail page built from the rows it displays.
+
+    The viewer's id and role are included because they decide which controls
+    render. Pages carrying flashed messages are never treated as unchanged.
+    """
+    if session.get("_flashes"):
+        return None
+    fingerprint = repr((current_user.id, current_user.role, *versions))
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+
+def _conditional_response(etag, render):
+    if etag and request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(render())
+    if etag:
+        response.set_etag(etag, weak=True)
+    # Browsers must revalidate every time; the ETag makes that cheap.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _children_version(model, *criteria):
+    return db.session.query(func.count(model.id), func.max(model.updated_at)).filter(*criteria).one()
+
+
 def _is_editor_owned(entity):
     return current_user.role == "Admin" or entity.created_by_user_id == current_user.id
 
@@ -60,6 +182,9 @@ def _ensure_can_edit(entity):
 
 
 def _log_action(action, entity_type, entity_id, metadata=None):
+    # Write the workspace rows before the core audit row, so every request
+    # takes the two SQLite write locks in the same order and none deadlock.
+    db.session.flush()
     db.session.add(
         AuditLog(
             actor_user_id=current_user.id,
@@ -84,6 +209,7 @@ def _parse_query_state():
         "include_archived": request.args.get("include_archived", "0").strip(),
         "project_id": request.args.get("project_id", "").strip(),
         "company_id": request.args.get("company_id", "").strip(),
+        "filter": request.args.get("filter", "").strip(),
     }
 
 
@@ -91,6 +217,8 @@ def _apply_view_args(view):
     if not view:
         return redirect(request.path)
     args = dict(view.query_json or {})
+    if args.get("filter"):
+        args["filter"] = canonical_filter(args["filter"])
     args["view_id"] = view.id
     return redirect(url_for(request.endpoint, **args))
 
@@ -116,6 +244,15 @@ def _save_view(database_key):
         "project_id": request.form.get("project_id", "").strip(),
         "company_id": request.form.get("company_id", "").strip(),
     }
+    filter_text = request.form.get("filter", "").strip()
+    if filter_text:
+        try:
+            expression = parse_filter(filter_text)
+            compile_filter(database_key, expression)
+        except FilterError as exc:
+            flash(f"View not saved: {exc}", "error")
+            return
+        query_json["filter"] = expression
 
     if is_default:
         SavedView.query.filter_by(
@@ -172,13 +309,41 @@ def _prepare_list_context(database_key):
     if selected_view and request.args.get("use_view") == "1":
         return _apply_view_args(selected_view)
 
+    query_state = _parse_query_state()
+    compiled_filter, filter_error = None, None
+    if query_state["filter"]:
+        try:
+            compiled_filter = cached_filter(database_key, query_state["filter"])
+        except FilterError as exc:
+            if _wants_fragment():
+                abort(400)
+            filter_error = str(exc)
+
     return {
-        "query": _parse_query_state(),
+        "query": query_state,
         "saved_views": saved_views,
         "selected_view": selected_view,
+        # The view routes take ``view_id`` themselves; the rest is where they return to.
+        "view_return_args": {key: value for key, value in request.args.items() if key != "view_id"},
+        "compiled_filter": compiled_filter,
+        "filter_error": filter_error,
+        "filter_fields": filter_fields_for(database_key),
     }
 
 
+def _apply_filter(query, compiled_filter):
+    if compiled_filter is None:
+        return query
+    return query.filter(compiled_filter.criterion).params(**compiled_filter.params(current_user.id))
+
+
+def _facet_cache_key(database_key, query_state, compiled_filter):
+    key = (database_key, query_state["q"], query_state["include_archived"], query_state["filter"])
+    if compiled_filter is not None and compiled_filter.uses_current_user:
+        key += (current_user.id,)
+    return key
+
+
 def _set_default_view(view):
     SavedView.query.filter_by(
         user_id=current_user.id,
@@ -225,25 +390,92 @@ def set_default_view(db_key, view_id):
     return redirect(url_for(LIST_ENDPOINTS[db_key], **request.args))
 
 
-@databases_bp.route("/tasks", methods=["GET"])
-@login_required
-def tasks_list():
-    context = _prepare_list_context("tasks")
-    if not isinstance(context, dict):
-        return context
+def _with_facets_header(response, facets):
+    # A rows fragment leaves the filter form in place; the page script
+    # relabels its options from this header.
+    if _wants_fragment():
+        response.headers["X-Facets"] = json.dumps(
+            {
+                name: {str(value): count for value, count in counts.items() if value is not None}
+                for name, counts in facets.items()
+            }
+        )
+    return response
+
+
+def _project_criteria(query_state):
+    """WHERE criteria of the project list filters; ``q`` needs ``Company`` joined."""
+    criteria = []
+    if query_state["q"]:
+        q = f"%{query_state['q']}%"
+        criteria.append(or_(Project.name.ilike(q), Company.name.ilike(q)))
+    if query_state["status"]:
+        criteria.append(Project.status == query_state["status"])
+    if query_state["company_id"]:
+        criteria.append(Project.company_id == int(query_state["company_id"]))
+    if query_state["include_archived"] != "1":
+        criteria.append(Project.status != "archived")
+    return criteria
 
-    query_state = context["query"]
-    query = Task.query.outerjoin(Project)
 
+def _task_criteria(query_state):
+    """WHERE criteria of the task list filters; ``q`` needs ``Project`` joined."""
+    criteria = []
     if query_state["q"]:
         q = f"%{query_state['q']}%"
-        query = query.filter(or_(Task.title.ilike(q), Project.name.ilike(q)))
+        criteria.append(or_(Task.title.ilike(q), Project.name.ilike(q)))
     if query_state["status"]:
-        query = query.filter(Task.status == query_state["status"])
+        criteria.append(Task.status == query_state["status"])
     if query_state["project_id"]:
-        query = query.filter(Task.project_id == int(query_state["project_id"]))
+        criteria.append(Task.project_id == int(query_state["project_id"]))
     if query_state["include_archived"] != "1":
-        query = query.filter(Task.status != "archived")
+        criteria.append(Task.status != "archived")
+    return criteria
+
+
+# Databases whose names are checked for near-duplicates.
+DUPLICATE_ENTITIES = {"companies": "company", "projects": "project"}
+
+
+def _duplicates(entity, name, exclude_id=None):
+    matches = similar_names(entity, name, exclude_id=exclude_id)
+    for match in matches:
+        match["url"] = url_for(f"databases.{entity}_detail", **{f"{entity}_id": match["id"]})
+        match["merge_url"] = url_for(f"databases.{entity}_merge", **{f"{entity}_id": match["id"]})
+    return matches
+
+
+@databases_bp.route("/<string:db_key>/similar", methods=["GET"])
+@login_required
+def similar_names_lookup(db_key):
+    if db_key not in DUPLICATE_ENTITIES:
+        abort(404)
+    name = request.args.get("name", "").strip()
+    return jsonify({"matches": _duplicates(DUPLICATE_ENTITIES[db_key], name, request.args.get("exclude", type=int))})
+
+
+@databases_bp.route("/tasks", methods=["GET"])
+@login_required
+def tasks_list():
+    context = _prepare_list_context("tasks")
+    if not isinstance(context, dict):
+        return context
+
+    query_state, compiled_filter = context["query"], context.pop("compiled_filter")
+    query = Task.query.outerjoin(Project).options(contains_eager(Task.project))
+    query = _apply_filter(query.filter(*_task_criteria(query_state)), compiled_filter)
+    facet_query = Task.query.outerjoin(Project) if query_state["q"] else Task.query
+    facets = facet_counts(
+        _apply_filter(
+            facet_query.filter(*_task_criteria({**query_state, "status": "", "project_id": ""})), compiled_filter
+        ),
+        {
+            "status": (Task.status, query_state["status"] or None),
+            "project_id": (Task.project_id, int(query_state["project_id"]) if query_state["project_id"] else None),
+        },
+        cache_key=_facet_cache_key("tasks", query_state, compiled_filter),
+        version=tables_version(Task, Project),
+    )
 
     sort_field = {
         "title": Task.title,
@@ -256,16 +488,156 @@ def tasks_list():
     else:
         query = query.order_by(sort_field.desc())
 
-    tasks = query.all()
-    projects = Project.query.order_by(Project.name.asc()).all()
-    return render_template(
-        "databases/tasks_list.html",
-        tasks=tasks,
+    # The full page's project filter dropdown is not part of a rows fragment.
+    projects = [] if _wants_fragment() else Project.query.order_by(Project.name.asc()).all()
+    response = _render_list(
+        query,
         projects=projects,
         statuses=TASK_STATUS_CHOICES,
+        facets=facets,
         database_key="tasks",
         **context,
     )
+    return _with_facets_header(response, facets)
+
+
+def _board_state():
+    query_state = _parse_query_state()
+    statuses = BOARD_STATUSES + (("archived",) if query_state["include_archived"] == "1" else ())
+    # Columns replace the status filter, and the archived column is opt-in.
+    criteria = _task_criteria({**query_state, "status": "", "include_archived": "1"})
+    return query_state, statuses, criteria
+
+
+@databases_bp.route("/tasks/board", methods=["GET"])
+@login_required
+def tasks_board():
+    query_state, statuses, criteria = _board_state()
+    columns = board_columns(statuses, criteria, current_app.config["BOARD_COLUMN_LIMIT"])
+    return render_template(
+        "databases/tasks_board.html",
+        columns=columns.values(),
+        query=query_state,
+        projects=Project.query.order_by(Project.name.asc()).all(),
+        card_cursor=card_cursor,
+    )
+
+
+@databases_bp.route("/tasks/board/column", methods=["GET"])
+@login_required
+def tasks_board_column():
+    query_state, statuses, criteria = _board_state()
+    status = request.args.get("status", "")
+    if status not in statuses:
+        abort(400)
+    tasks, has_more = column_cards(
+        status, criteria, parse_cursor(request.args.get("after", "")), current_app.config["BOARD_COLUMN_LIMIT"]
+    )
+    return render_template(
+        "databases/_board_cards.html",
+        tasks=tasks,
+        has_more=has_more,
+        status=status,
+        query=query_state,
+        card_cursor=card_cursor,
+    )
+
+
+@databases_bp.route("/tasks/<int:task_id>/move", methods=["POST"])
+@login_required
+def task_move(task_id):
+    if current_user.role == "Viewer":
+        abort(403)
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object."}), 400
+    status = payload.get("status")
+    if status not in TASK_STATUS_CHOICES:
+        return jsonify({"error": "Invalid task status."}), 400
+
+    # One UPDATE; its WHERE clause carries the ownership and "still in the
+    # column I dragged it from" checks, so nothing is loaded first.
+    criteria = [Task.id == task_id]
+    if current_user.role == "Editor":
+        criteria.append(Task.created_by_user_id == current_user.id)
+    previous_status = payload.get("from")
+    if previous_status is not None:
+        criteria.append(Task.status == previous_status)
+    now = datetime.utcnow()
+    remove_task_rollups(*criteria)
+    moved = Task.query.filter(*criteria).update({"status": status, "updated_at": now}, synchronize_session=False)
+    if not moved:
+        db.session.rollback()
+        task = db.session.get(Task, task_id)
+        if task is None:
+            abort(404)
+        _ensure_can_edit(task)
+        return jsonify({"error": "Task was changed by someone else.", "status": task.status}), 409
+
+    add_task_rollups(Task.id == task_id)
+    _log_action("task_moved", "Task", task_id, {"from": previous_status, "to": status})
+    db.session.commit()
+    return jsonify({"id": task_id, "status": status, "updated_at": now.isoformat()})
+
+
+def _task_filter_args(query_state):
+    return {key: query_state[key] for key in ("q", "status", "project_id", "include_archived")}
+
+
+@databases_bp.route("/tasks/calendar", methods=["GET"])
+@login_required
+def tasks_calendar():
+    query_state = _parse_query_state()
+    view = request.args.get("view", "month")
+    if view not in CALENDAR_VIEWS:
+        view = "month"
+    try:
+        day = date.fromisoformat(request.args.get("date", ""))
+    except ValueError:
+        day = date.today()
+
+    start, end = calendar_range(view, day)
+    tasks, truncated = tasks_due_between(
+        start, end, _task_criteria(query_state), current_app.config["CALENDAR_TASK_LIMIT"]
+    )
+    return render_template(
+        "databases/tasks_calendar.html",
+        view=view,
+        day=day,
+        today=date.today(),
+        weeks=calendar_weeks(start, end, tasks),
+        previous_day=shift_period(view, day, -1),
+        next_day=shift_period(view, day, 1),
+        truncated=truncated,
+        query=query_state,
+        filter_args=_task_filter_args(query_state),
+        statuses=TASK_STATUS_CHOICES,
+        projects=Project.query.order_by(Project.name.asc()).all(),
+    )
+
+
+@databases_bp.route("/tasks/due", methods=["GET"])
+@login_required
+def tasks_due():
+    query_state = _parse_query_state()
+    today = date.today()
+    week_end = week_start(today) + timedelta(days=6)
+    criteria = [*_task_criteria(query_state), Task.status.not_in(CLOSED_TASK_STATUSES)]
+    tasks, truncated = tasks_due_between(
+        None, week_end, criteria, current_app.config["CALENDAR_TASK_LIMIT"], newest_first=True
+    )
+    return render_template(
+        "databases/tasks_due.html",
+        overdue=[task for task in tasks if task.due_date < today],
+        due_this_week=[task for task in reversed(tasks) if task.due_date >= today],
+        today=today,
+        week_end=week_end,
+        truncated=truncated,
+        query=query_state,
+        filter_args=_task_filter_args(query_state),
+        statuses=[status for status in TASK_STATUS_CHOICES if status not in CLOSED_TASK_STATUSES],
+        projects=Project.query.order_by(Project.name.asc()).all(),
+    )
 
 
 @databases_bp.route("/projects", methods=["GET"])
@@ -275,36 +647,42 @@ def projects_list():
     if not isinstance(context, dict):
         return context
 
-    query_state = context["query"]
-    query = Project.query.outerjoin(Company)
-
-    if query_state["q"]:
-        q = f"%{query_state['q']}%"
-        query = query.filter(or_(Project.name.ilike(q), Company.name.ilike(q)))
-    if query_state["status"]:
-        query = query.filter(Project.status == query_state["status"])
-    if query_state["company_id"]:
-        query = query.filter(Project.company_id == int(query_state["company_id"]))
-    if query_state["include_archived"] != "1":
-        query = query.filter(Project.status != "archived")
+    query_state, compiled_filter = context["query"], context.pop("compiled_filter")
+    query = Project.query.outerjoin(Company).options(contains_eager(Project.company))
+    query = _apply_filter(query.filter(*_project_criteria(query_state)), compiled_filter)
+    facet_query = Project.query.outerjoin(Company) if query_state["q"] else Project.query
+    facets = facet_counts(
+        _apply_filter(
+            facet_query.filter(*_project_criteria({**query_state, "status": "", "company_id": ""})), compiled_filter
+        ),
+        {
+            "status": (Project.status, query_state["status"] or None),
+            "company_id": (Project.company_id, int(query_state["company_id"]) if query_state["company_id"] else None),
+        },
+        cache_key=_facet_cache_key("projects", query_state, compiled_filter),
+        version=tables_version(Project, Company),
+    )
 
     sort_field = {
         "name": Project.name,
         "status": Project.status,
         "updated_at": Project.updated_at,
+        "progress": cast(Project.done_task_count, Float) / func.nullif(Project.task_count, 0),
+        "open_tasks": Project.open_task_count,
+        "last_activity": Project.last_activity_at,
     }.get(query_state["sort"], Project.updated_at)
     query = query.order_by(sort_field.asc() if query_state["dir"] == "asc" else sort_field.desc())
 
-    projects = query.all()
-    companies = Company.query.order_by(Company.name.asc()).all()
-    return render_template(
-        "databases/projects_list.html",
-        projects=projects,
+    companies = [] if _wants_fragment() else Company.query.order_by(Company.name.asc()).all()
+    response = _render_list(
+        query,
         companies=companies,
         statuses=PROJECT_STATUS_CHOICES,
+        facets=facets,
         database_key="projects",
         **context,
     )
+    return _with_facets_header(response, facets)
 
 
 @databases_bp.route("/companies", methods=["GET"])
@@ -314,8 +692,8 @@ def companies_list():
     if not isinstance(context, dict):
         return context
 
-    query_state = context["query"]
-    query = Company.query
+    query_state, compiled_filter = context["query"], context.pop("compiled_filter")
+    query = _apply_filter(Company.query, compiled_filter)
 
     if query_state["q"]:
         query = query.filter(Company.name.ilike(f"%{query_state['q']}%"))
@@ -328,13 +706,12 @@ def companies_list():
         "name": Company.name,
         "status": Company.status,
         "updated_at": Company.updated_at,
+        "active_projects": Company.active_project_count,
     }.get(query_state["sort"], Company.updated_at)
     query = query.order_by(sort_field.asc() if query_state["dir"] == "asc" else sort_field.desc())
 
-    companies = query.all()
-    return render_template(
-        "databases/companies_list.html",
-        companies=companies,
+    return _render_list(
+        query,
         statuses=COMPANY_STATUS_CHOICES,
         database_key="companies",
         **context,
@@ -345,23 +722,45 @@ def companies_list():
 @login_required
 def task_detail(task_id):
     task = Task.query.get_or_404(task_id)
-    pages = Page.query.order_by(Page.title.asc()).all()
-    linked_page_ids = {link.page_id for link in task.task_page_links}
-    return render_template("databases/task_detail.html", task=task, pages=pages, linked_page_ids=linked_page_ids)
+    etag = _detail_etag(
+        task.id,
+        task.updated_at,
+        task.project.updated_at if task.project else None,
+        db.session.query(func.count(), func.max(TaskPageLink.created_at)).filter(TaskPageLink.task_id == task.id).one(),
+        # Every page is listed in the link dropdown.
+        _children_version(Page),
+    )
+
+    def render():
+        pages = Page.query.order_by(Page.title.asc()).all()
+        linked_page_ids = {link.page_id for link in task.task_page_links}
+        return render_template("databases/task_detail.html", task=task, pages=pages, linked_page_ids=linked_page_ids)
+
+    return _conditional_response(etag, render)
 
 
 @databases_bp.route("/projects/<int:project_id>")
 @login_required
 def project_detail(project_id):
     project = Project.query.get_or_404(project_id)
-    return render_template("databases/project_detail.html", project=project, task_statuses=TASK_STATUS_CHOICES)
+    etag = _detail_etag(
+        project.id,
+        project.updated_at,
+        project.company.updated_at if project.company else None,
+        _children_version(Task, Task.project_id == project.id),
+    )
+    return _conditional_response(
+        etag,
+        lambda: render_template("databases/project_detail.html", project=project, task_statuses=TASK_STATUS_CHOICES),
+    )
 
 
 @databases_bp.route("/companies/<int:company_id>")
 @login_required
 def company_detail(company_id):
     company = Company.query.get_or_404(company_id)
-    return render_template("databases/company_detail.html", company=company)
+    etag = _detail_etag(company.id, company.updated_at, _children_version(Project, Project.company_id == company.id))
+    return _conditional_response(etag, lambda: render_template("databases/company_detail.html", company=company))
 
 
 @databases_bp.route("/tasks/new", methods=["GET", "POST"])
@@ -392,6 +791,7 @@ def task_create():
             )
             db.session.add(task)
             db.session.flush()
+            add_task_rollups(Task.id == task.id)
             _log_action("task_created", "Task", task.id)
             db.session.commit()
             flash("Task created.", "success")
@@ -417,10 +817,11 @@ def task_edit(task_id):
         elif status not in TASK_STATUS_CHOICES:
             flash("Invalid task status.", "error")
         else:
-            task.title = title
-            task.status = status
-            task.project_id = project_id
-            task.due_date = datetime.strptime(due_date_raw, "%Y-%m-%d").date() if due_date_raw else None
+            with task_rollups(Task.id == task.id):
+                task.title = title
+                task.status = status
+                task.project_id = project_id
+                task.due_date = datetime.strptime(due_date_raw, "%Y-%m-%d").date() if due_date_raw else None
             _log_action("task_updated", "Task", task.id)
             db.session.commit()
             flash("Task updated.", "success")
@@ -434,6 +835,7 @@ def task_edit(task_id):
 def task_delete(task_id):
     task = Task.query.get_or_404(task_id)
     _ensure_can_edit(task)
+    remove_task_rollups(Task.id == task.id)
     db.session.delete(task)
     _log_action("task_deleted", "Task", task_id)
     db.session.commit()
@@ -468,15 +870,20 @@ def task_link_page(task_id):
 def project_create():
     if current_user.role == "Viewer":
         abort(403)
+    duplicates = []
     if request.method == "POST":
         name = request.form.get("name", "").strip()
         status = request.form.get("status", "idea")
         company_id = request.form.get("company_id", type=int)
+        if name and request.form.get("allow_duplicate") != "1":
+            duplicates = _duplicates("project", name)
 
         if not name:
             flash("Project name is required.", "error")
         elif status not in PROJECT_STATUS_CHOICES:
             flash("Invalid project status.", "error")
+        elif duplicates:
+            flash("Similar projects already exist. Open one of them, or confirm to create anyway.", "error")
         else:
             project = Project(
                 name=name,
@@ -486,6 +893,8 @@ def project_create():
             )
             db.session.add(project)
             db.session.flush()
+            add_project_rollups(Project.id == project.id)
+            index_names("project", [(project.id, project.name)])
             _log_action("project_created", "Project", project.id)
             db.session.commit()
             flash("Project created.", "success")
@@ -496,6 +905,7 @@ def project_create():
         project=None,
         companies=Company.query.order_by(Company.name.asc()),
         statuses=PROJECT_STATUS_CHOICES,
+        duplicates=duplicates,
     )
 
 
@@ -515,9 +925,11 @@ def project_edit(project_id):
         elif status not in PROJECT_STATUS_CHOICES:
             flash("Invalid project status.", "error")
         else:
-            project.name = name
-            project.status = status
-            project.company_id = company_id
+            with project_rollups(Project.id == project.id):
+                project.name = name
+                project.status = status
+                project.company_id = company_id
+            index_names("project", [(project.id, name)])
             _log_action("project_updated", "Project", project.id)
             db.session.commit()
             flash("Project updated.", "success")
@@ -537,6 +949,8 @@ def project_delete(project_id):
     project = Project.query.get_or_404(project_id)
     _ensure_can_edit(project)
 
+    remove_project_rollups(Project.id == project.id)
+    unindex_names("project", [project.id])
     for task in Task.query.filter_by(project_id=project.id).all():
         task.project_id = None
     db.session.delete(project)
@@ -568,6 +982,7 @@ def project_quick_add_task(project_id):
         )
         db.session.add(task)
         db.session.flush()
+        add_task_rollups(Task.id == task.id)
         _log_action("task_created", "Task", task.id, {"source": "project_quick_add"})
         db.session.commit()
         flash("Task added.", "success")
@@ -580,24 +995,32 @@ def project_quick_add_task(project_id):
 def company_create():
     if current_user.role == "Viewer":
         abort(403)
+    duplicates = []
     if request.method == "POST":
         name = request.form.get("name", "").strip()
         status = request.form.get("status", "active")
+        if name and request.form.get("allow_duplicate") != "1":
+            duplicates = _duplicates("company", name)
 
         if not name:
             flash("Company name is required.", "error")
         elif status not in COMPANY_STATUS_CHOICES:
             flash("Invalid company status.", "error")
+        elif duplicates:
+            flash("Similar companies already exist. Open one of them, or confirm to create anyway.", "error")
         else:
             company = Company(name=name, status=status, created_by_user_id=current_user.id)
             db.session.add(company)
             db.session.flush()
+            index_names("company", [(company.id, company.name)])
             _log_action("company_created", "Company", company.id)
             db.session.commit()
             flash("Company created.", "success")
             return redirect(url_for("databases.company_detail", company_id=company.id))
 
-    return render_template("databases/company_form.html", company=None, statuses=COMPANY_STATUS_CHOICES)
+    return render_template(
+        "databases/company_form.html", company=None, statuses=COMPANY_STATUS_CHOICES, duplicates=duplicates
+    )
 
 
 @databases_bp.route("/companies/<int:company_id>/edit", methods=["GET", "POST"])
@@ -617,6 +1040,7 @@ def company_edit(company_id):
         else:
             company.name = name
             company.status = status
+            index_names("company", [(company.id, name)])
             _log_action("company_updated", "Company", company.id)
             db.session.commit()
             flash("Company updated.", "success")
@@ -631,6 +1055,7 @@ def company_delete(company_id):
     company = Company.query.get_or_404(company_id)
     _ensure_can_edit(company)
 
+    unindex_names("company", [company.id])
     for project in Project.query.filter_by(company_id=company.id).all():
         project.company_id = None
     db.session.delete(company)
@@ -658,8 +1083,46 @@ def company_quick_add_project(company_id):
         )
         db.session.add(project)
         db.session.flush()
+        add_project_rollups(Project.id == project.id)
+        index_names("project", [(project.id, project.name)])
         _log_action("project_created", "Project", project.id, {"source": "company_quick_add"})
         db.session.commit()
         flash("Project added.", "success")
 
     return redirect(url_for("databases.company_detail", company_id=company.id))
+
+
+@databases_bp.route("/companies/<int:company_id>/merge", methods=["POST"])
+@login_required
+def company_merge(company_id):
+    source = Company.query.get_or_404(company_id)
+    target = Company.query.get_or_404(request.form.get("into_id", type=int))
+    _ensure_can_edit(source)
+    _ensure_can_edit(target)
+    if source.id == target.id:
+        abort(400)
+
+    name = source.name
+    moved = merge_companies(source, target)
+    _log_action("company_merged", "Company", target.id, {"merged_id": company_id, "merged_name": name, "projects": moved})
+    db.session.commit()
+    flash(f"Merged {name} into {target.name}; moved {moved} projects.", "success")
+    return redirect(url_for("databases.company_detail", company_id=target.id))
+
+
+@databases_bp.route("/projects/<int:project_id>/merge", methods=["POST"])
+@login_required
+def project_merge(project_id):
+    source = Project.query.get_or_404(project_id)
+    target = Project.query.get_or_404(request.form.get("into_id", type=int))
+    _ensure_can_edit(source)
+    _ensure_can_edit(target)
+    if source.id == target.id:
+        abort(400)
+
+    name = source.name
+    moved = merge_projects(source, target)
+    _log_action("project_merged", "Project", target.id, {"merged_id": project_id, "merged_name": name, "tasks": moved})
+    db.session.commit()
+    flash(f"Merged {name} into {target.name}; moved {moved} tasks.", "success")
+    return redirect(url_for("databases.project_detail", project_id=target.id))
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+from sqlalchemy.orm import contains_eager
+
+from app.models import Project, Task
+
+CALENDAR_VIEWS = ("month", "week")
+# Tasks that no longer need doing are never overdue.
+CLOSED_TASK_STATUSES = ("done", "archived")
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def calendar_range(view: str, day: date) -> tuple[date, date]:
+    """First and last day shown: whole weeks, Monday to Sunday."""
+    if view == "week":
+        start = week_start(day)
+        return start, start + timedelta(days=6)
+    first = day.replace(day=1)
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    return week_start(first), week_start(next_month - timedelta(days=1)) + timedelta(days=6)
+
+
+def shift_period(view: str, day: date, steps: int) -> date:
+    if view == "week":
+        return day + timedelta(weeks=steps)
+    month_index = day.year * 12 + day.month - 1 + steps
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def tasks_due_between(
+    start: date | None, end: date, criteria, limit: int, newest_first: bool = False
+) -> tuple[list, bool]:
+    """Tasks due in ``[start, end]`` with their projects, in one range query on ``due_date``.
+
+    ``start=None`` means no lower bound. Returns at most ``limit`` tasks and
+    whether more were due; ``newest_first`` keeps the latest when cut short.
+    """
+    query = (
+        Task.query.outerjoin(Project)
+        .options(contains_eager(Task.project))
+        .filter(Task.due_date <= end, *criteria)
+    )
+    query = query.filter(Task.due_date >= start) if start is not None else query.filter(Task.due_date.is_not(None))
+    order = (Task.due_date.desc(), Task.id.desc()) if newest_first else (Task.due_date.asc(), Task.id.asc())
+    tasks = query.order_by(*order).limit(limit + 1).all()
+    return tasks[:limit], len(tasks) > limit
+
+
+def calendar_weeks(start: date, end: date, tasks) -> list[list[dict]]:
+    """Days from ``start`` to ``end`` as rows of seven, each with its tasks."""
+    by_day = {}
+    for task in tasks:
+        by_day.setdefault(task.due_date, []).append(task)
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    return [
+        [{"date": day, "tasks": by_day.get(day, [])} for day in days[index : index + 7]]
+        for index in range(0, len(days), 7)
+    ]
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from logging.handlers import WatchedFileHandler
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+from app.metrics import TimedQueuePool, init_metrics, registry
+from app.models import AuditLog
+
+SLOW_LOG_DIR_NAME = "logs"
+SLOW_REQUEST_LOG_NAME = "slow_requests.jsonl"
+SLOW_QUERY_LOG_NAME = "slow_queries.jsonl"
+
+slow_request_logger = logging.getLogger("ems.slow_requests")
+slow_query_logger = logging.getLogger("ems.slow_queries")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and replace literal values, so statements that
+    differ only in their values group together and no data reaches the log."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    return _PLACEHOLDER_LIST.sub("(?, ...)", statement)
+
+
+def _write_json(logger, record: dict) -> None:
+    logger.info(json.dumps(record, default=str, separators=(",", ":")))
+
+
+def _configure_log(logger, path: str) -> None:
+    # Appends of one short line are atomic, so every worker can share the
+    # file; WatchedFileHandler reopens it after logrotate moves it.
+    for handler in list(logger.handlers):
+        if isinstance(handler, WatchedFileHandler) and handler.baseFilename == os.path.abspath(path):
+            return
+    handler = WatchedFileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _slow_query_seconds() -> float:
+    # CLI runs (migrations, backfills) have no app context for some statements.
+    if not has_app_context():
+        return float("inf")
+    return current_app.config.get("SLOW_QUERY_MS", 100) / 1000
+
+
+def _bind_listeners(engine, bind: str) -> None:
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("query_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        registry.inc("ems_sql_statements_total", {"bind": bind})
+        registry.inc("ems_sql_seconds_total", {"bind": bind}, elapsed)
+        if has_request_context() and "sql_timings" in g:
+            timing = g.sql_timings.setdefault(bind, [0, 0.0])
+            timing[0] += 1
+            timing[1] += elapsed
+        if elapsed >= _slow_query_seconds():
+            _write_json(
+                slow_query_logger,
+                {
+                    "at": datetime.now(timezone.utc).isoformat(),
+                    "bind": bind,
+                    "ms": round(elapsed * 1000, 2),
+                    "sql": normalize_sql(statement),
+                    "params": len(parameters) if parameters is not None else 0,
+                    "executemany": executemany,
+                    "endpoint": request.endpoint if has_request_context() else None,
+                },
+            )
+
+    def handle_error(context):
+        if "database is locked" in str(context.original_exception):
+            registry.inc("ems_db_locked_errors_total", {"bind": bind})
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.bind_name = bind
+
+
+def _audit_flush(session, flush_context, instances):
+    if any(isinstance(obj, AuditLog) for obj in session.new):
+        session.info["audit_pending"] = True
+
+
+def _audit_before_commit(session):
+    if session.info.pop("audit_pending", False) or any(isinstance(obj, AuditLog) for obj in session.new):
+        session.info["audit_commit_started"] = time.perf_counter()
+
+
+def _audit_after_commit(session):
+    started = session.info.pop("audit_commit_started", None)
+    if started is not None:
+        registry.observe("ems_audit_write_seconds", time.perf_counter() - started)
+
+
+def _audit_after_rollback(session):
+    session.info.pop("audit_pending", None)
+    session.info.pop("audit_commit_started", None)
+
+
+def _install_session_hooks() -> None:
+    if event.contains(db.session, "before_commit", _audit_before_commit):
+        return
+    event.listen(db.session, "before_flush", _audit_flush)
+    event.listen(db.session, "before_commit", _audit_before_commit)
+    event.listen(db.session, "after_commit", _audit_after_commit)
+    event.listen(db.session, "after_rollback", _audit_after_rollback)
+
+
+def engine_options(app, urls) -> dict:
+    """Engine options that route pool checkouts through ``TimedQueuePool``."""
+    if not app.config.get("REQUEST_INSTRUMENTATION", True):
+        return {}
+    # In-memory SQLite needs its single-connection pool.
+    if any(url == "sqlite://" or ":memory:" in url for url in urls):
+        return {}
+    return {"poolclass": TimedQueuePool}
+
+
+def init_instrumentation(app) -> None:
+    """Count SQL per bind and time each request; emit Server-Timing and slow logs."""
+    if not app.config.get("REQUEST_INSTRUMENTATION", True):
+        return
+
+    log_dir = app.config.get("SLOW_LOG_DIR") or os.path.join(app.instance_path, SLOW_LOG_DIR_NAME)
+    os.makedirs(log_dir, exist_ok=True)
+    _configure_log(slow_request_logger, os.path.join(log_dir, SLOW_REQUEST_LOG_NAME))
+    _configure_log(slow_query_logger, os.path.join(log_dir, SLOW_QUERY_LOG_NAME))
+
+    with app.app_context():
+        engines = {key or "core": engine for key, engine in db.engines.items()}
+    for bind, engine in engines.items():
+        _bind_listeners(engine, bind)
+    _install_session_hooks()
+    init_metrics(app, engines)
+
+    @app.before_request
+    def start_request_timing():
+        g.request_started = time.perf_counter()
+        g.sql_timings = {}
+        g.template_render_seconds = 0.0
+
+    @app.after_request
+    def add_server_timing(response):
+        if "request_started" not in g:
+            return response
+        started = g.request_started
+        sql_timings = g.sql_timings
+        request_globals = g._get_current_object()
+        slow_request_seconds = current_app.config.get("SLOW_REQUEST_MS", 500) / 1000
+        endpoint = request.endpoint
+        method = request.method
+        path = request.path
+        # Capture plain values: a closure over ``response`` would form a cycle
+        # that keeps unclosed streamed bodies (and their contexts) alive.
+        status = response.status_code
+        streamed = response.is_streamed
+
+        metrics = [
+            f'db-{bind};dur={seconds * 1000:.1f};desc="{count} queries"'
+            for bind, (count, seconds) in sorted(sql_timings.items())
+        ]
+        metrics.append(f"tpl;dur={g.template_render_seconds * 1000:.1f}")
+        metrics.append(f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+        response.headers.add("Server-Timing", ", ".join(metrics))
+
+        def finish_request():
+            # Runs when the response is closed, so streamed bodies are included.
+            elapsed = time.perf_counter() - started
+            labels = {"endpoint": endpoint or "unmatched", "method": method}
+            registry.observe("ems_http_request_duration_seconds", elapsed, labels)
+            registry.inc("ems_http_requests_total", {**labels, "status": str(status)})
+            registry.flush()
+            if elapsed < slow_request_seconds:
+                return
+            _write_json(
+                slow_request_logger,
+                {
+                    "at": datetime.now(timezone.utc).isoformat(),
+                    "method": method,
+                    "path": path,
+                    "endpoint": endpoint,
+                    "status": status,
+                    "ms": round(elapsed * 1000, 2),
+                    "template_ms": round(request_globals.template_render_seconds * 1000, 2),
+                    "sql": {
+                        bind: {"count": count, "ms": round(seconds * 1000, 2)}
+                        for bind, (count, seconds) in sql_timings.items()
+                    },
+                    "streamed": streamed,
+                },
+            )
+
+        response.call_on_close(finish_request)
+        return response
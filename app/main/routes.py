@@ -1,10 +1,23 @@
-from flask import render_template
-from flask_login import login_required
+from flask import abort, current_app, render_template, request
+from flask_login import current_user, login_required
 
 from app.main import main_bp
+from app.metrics import collect, render_prometheus
+
+LOCAL_ADDRESSES = {"127.0.0.1", "::1"}
 
 
 @main_bp.route("/")
 @login_required
 def home():
     return render_template("home.html")
+
+
+@main_bp.route("/metrics")
+def metrics():
+    # Scraped by a local Prometheus without a session; anyone else must be an Admin.
+    is_admin = current_user.is_authenticated and current_user.role == "Admin"
+    if request.remote_addr not in LOCAL_ADDRESSES and not is_admin:
+        abort(403)
+    body = render_prometheus(collect(current_app.extensions.get("metrics_dir")))
+    return body, 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
@@ -0,0 +1,292 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy.pool import QueuePool
+
+METRICS_DIR_NAME = "metrics"
+ARCHIVE_NAME = "archive.json"
+LOCK_NAME = ".lock"
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+METRICS = {
+    "ems_http_requests_total": ("counter", "Requests by endpoint, method and status."),
+    "ems_http_request_duration_seconds": (
+        "histogram",
+        "Request latency by endpoint and method, including streamed bodies.",
+    ),
+    "ems_sql_statements_total": ("counter", "SQL statements executed per bind."),
+    "ems_sql_seconds_total": ("counter", "Time spent executing SQL per bind."),
+    "ems_db_pool_checkout_wait_seconds": ("histogram", "Time spent waiting for a pooled connection per bind."),
+    "ems_db_pool_checked_out": ("gauge", "Connections currently checked out per bind, summed over live workers."),
+    "ems_db_locked_errors_total": ("counter", "Statements that failed with 'database is locked' per bind."),
+    "ems_audit_write_seconds": ("histogram", "Commit time of transactions that write audit log rows."),
+}
+BUCKETS = {
+    "ems_http_request_duration_seconds": LATENCY_BUCKETS,
+    "ems_db_pool_checkout_wait_seconds": WAIT_BUCKETS,
+    "ems_audit_write_seconds": LATENCY_BUCKETS,
+}
+
+
+def _label_key(labels: dict | None) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+class MetricsRegistry:
+    """Counters and histograms for this process.
+
+    Each worker writes its totals to ``<pid>.json`` in a shared directory and
+    ``/metrics`` sums every file, so a scrape reflects all gunicorn workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauge_sources = []
+        self.directory = None
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL
+        self._last_flush = 0.0
+
+    def inc(self, name: str, labels: dict | None = None, amount: float = 1.0) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: dict | None = None) -> None:
+        buckets = BUCKETS[name]
+        key = (name, _label_key(labels))
+        with self._lock:
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self) -> dict:
+        gauges = []
+        for source in self.gauge_sources:
+            gauges.extend([name, dict(labels), value] for name, labels, value in source())
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "counters": [[name, dict(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, dict(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self.histograms.items()
+                ],
+                "gauges": gauges,
+            }
+
+    def flush(self, force: bool = False) -> None:
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        _write_json_atomic(os.path.join(self.directory, f"{os.getpid()}.json"), self.snapshot())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    bind_name = "core"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.observe(
+                "ems_db_pool_checkout_wait_seconds", time.perf_counter() - started, {"bind": self.bind_name}
+            )
+
+    def recreate(self):
+        # engine.dispose() in gunicorn's post_fork swaps in a recreated pool.
+        pool = super().recreate()
+        pool.bind_name = self.bind_name
+        return pool
+
+
+def _write_json_atomic(path: str, payload: dict) -> None:
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@contextmanager
+def _directory_lock(directory: str, exclusive: bool):
+    with open(os.path.join(directory, LOCK_NAME), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(into: dict, snapshot: dict, include_gauges: bool) -> None:
+    for name, labels, value in snapshot.get("counters", []):
+        key = (name, _label_key(labels))
+        into["counters"][key] = into["counters"].get(key, 0.0) + value
+    for name, labels, counts, total, count in snapshot.get("histograms", []):
+        key = (name, _label_key(labels))
+        entry = into["histograms"].setdefault(key, [[0] * len(counts), 0.0, 0])
+        entry[0] = [a + b for a, b in zip(entry[0], counts)]
+        entry[1] += total
+        entry[2] += count
+    if include_gauges:
+        for name, labels, value in snapshot.get("gauges", []):
+            key = (name, _label_key(labels))
+            into["gauges"][key] = into["gauges"].get(key, 0.0) + value
+
+
+def _empty() -> dict:
+    return {"counters": {}, "histograms": {}, "gauges": {}}
+
+
+def collect(directory: str | None = None) -> dict:
+    """Sum this process's live metrics with every other worker's last flush."""
+    registry.flush(force=True)
+    totals = _empty()
+    own_pid = os.getpid()
+    _merge(totals, registry.snapshot(), include_gauges=True)
+    if directory is None or not os.path.isdir(directory):
+        return totals
+
+    with _directory_lock(directory, exclusive=False):
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            snapshot = _read_json(os.path.join(directory, filename))
+            if not snapshot:
+                continue
+            if filename == ARCHIVE_NAME:
+                _merge(totals, snapshot, include_gauges=False)
+            elif snapshot.get("pid") != own_pid:
+                _merge(totals, snapshot, include_gauges=_pid_alive(snapshot.get("pid", 0)))
+    return totals
+
+
+def mark_process_dead(pid: int, directory: str) -> None:
+    """Fold a finished worker's totals into the archive so counters never go backwards."""
+    path = os.path.join(directory, f"{pid}.json")
+    if not os.path.exists(path):
+        return
+    with _directory_lock(directory, exclusive=True):
+        snapshot = _read_json(path)
+        if snapshot:
+            totals = _empty()
+            archive = _read_json(os.path.join(directory, ARCHIVE_NAME))
+            if archive:
+                _merge(totals, archive, include_gauges=False)
+            _merge(totals, snapshot, include_gauges=False)
+            _write_json_atomic(
+                os.path.join(directory, ARCHIVE_NAME),
+                {
+                    "counters": [[name, dict(labels), value] for (name, labels), value in totals["counters"].items()],
+                    "histograms": [
+                        [name, dict(labels), counts, total, count]
+                        for (name, labels), (counts, total, count) in totals["histograms"].items()
+                    ],
+                },
+            )
+        os.remove(path)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(totals: dict) -> str:
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            buckets = BUCKETS[name]
+            for (metric, labels), (counts, total, count) in sorted(totals["histograms"].items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        else:
+            source = totals["counters"] if kind == "counter" else totals["gauges"]
+            for (metric, labels), value in sorted(source.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def default_metrics_dir(instance_path: str) -> str:
+    return os.path.join(instance_path, METRICS_DIR_NAME)
+
+
+def init_metrics(app, engines: dict) -> None:
+    directory = app.config.get("METRICS_DIR") or default_metrics_dir(app.instance_path)
+    os.makedirs(directory, exist_ok=True)
+    registry.directory = directory
+    registry.flush_interval = app.config.get("METRICS_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+    app.extensions["metrics_dir"] = directory
+
+    def pool_gauges():
+        for bind, engine in engines.items():
+            checkedout = getattr(engine.pool, "checkedout", None)
+            if checkedout is not None:
+                yield "ems_db_pool_checked_out", {"bind": bind}, checkedout()
+
+    registry.gauge_sources = [pool_gauges]
@@ -0,0 +1,87 @@
+import zlib
+
+COMPRESSIBLE_MIMETYPES = frozenset(
+    {
+        "text/html",
+        "text/plain",
+        "text/css",
+        "text/csv",
+        "text/javascript",
+        "application/javascript",
+        "application/json",
+        "image/svg+xml",
+    }
+)
+
+
+def _accepts_gzip(environ) -> bool:
+    # An explicit "gzip" entry wins over "*", wherever each appears.
+    accepted = {}
+    for coding in environ.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        accepted[name.strip().lower()] = params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return accepted.get("gzip", accepted.get("*", False))
+
+
+class GzipMiddleware:
+    """Gzip text responses at or above ``min_size`` bytes.
+
+    Responses without a Content-Length (streamed pages) are always
+    compressed, and every chunk the app yields is sync-flushed so streaming
+    still reaches the browser chunk by chunk.
+    """
+
+    def __init__(self, app, min_size: int = 1024, level: int = 6):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def _should_compress(self, status: str, headers) -> bool:
+        code = int(status.split(" ", 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        values = {name.lower(): value for name, value in headers}
+        if "content-encoding" in values or "no-transform" in values.get("cache-control", ""):
+            return False
+        mimetype = values.get("content-type", "").split(";", 1)[0].strip().lower()
+        if mimetype not in COMPRESSIBLE_MIMETYPES:
+            return False
+        length = values.get("content-length")
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") == "HEAD" or not _accepts_gzip(environ):
+            return self.app(environ, start_response)
+
+        state = {"compress": False}
+
+        def gzip_start_response(status, headers, exc_info=None):
+            headers = list(headers)
+            vary = [value for name, value in headers if name.lower() == "vary"]
+            headers = [(name, value) for name, value in headers if name.lower() != "vary"]
+            headers.append(("Vary", ", ".join([*vary, "Accept-Encoding"])))
+            if self._should_compress(status, headers):
+                state["compress"] = True
+                headers = [(name, value) for name, value in headers if name.lower() != "content-length"]
+                headers.append(("Content-Encoding", "gzip"))
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.app(environ, gzip_start_response)
+        if not state["compress"]:
+            return app_iter
+        return self._compress(app_iter)
+
+    def _compress(self, app_iter):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        try:
+            for chunk in app_iter:
+                if not chunk:
+                    continue
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                close()
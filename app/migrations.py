@@ -1,41 +1,290 @@
+import hashlib
+import importlib.util
+import re
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
-from sqlalchemy import text
+from sqlalchemy import inspect
 
 from app.extensions import db
 
+MIGRATIONS_ROOT = Path(__file__).resolve().parent / "migrations"
+MIGRATION_BINDS = {"core": None, "workspace": "workspace"}
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_([a-z0-9_]+)\.(sql|py)$")
+DEFAULT_BACKFILL_CHUNK_SIZE = 500
+DEFAULT_BACKFILL_PAUSE = 0.05
 
-def apply_sql_migration(migration_id: str, script_path: Path):
-    db.session.execute(
-        text(
-            "CREATE TABLE IF NOT EXISTS schema_migrations ("
-            "migration_id TEXT PRIMARY KEY, "
-            "applied_at TEXT NOT NULL)"
-        )
+
+class MigrationError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    bind: str
+    version: int
+    migration_id: str
+    path: Path
+    checksum: str
+
+    @property
+    def kind(self) -> str:
+        return self.path.suffix.lstrip(".")
+
+
+class MigrationContext:
+    """Handed to Python migrations as ``upgrade(ctx)``.
+
+    Schema changes belong in ``.sql`` files; Python migrations are for data
+    backfills, which run in small committed chunks so the write lock is only
+    held for one chunk at a time and an interrupted run resumes where it left off.
+    """
+
+    def __init__(self, connection, migration: Migration, chunk_size: int, pause: float):
+        self.connection = connection
+        self.migration = migration
+        self.chunk_size = chunk_size
+        self.pause = pause
+
+    def backfill(
+        self, table: str, handler, columns=(), key: str = "id", where: str | None = None, name: str | None = None
+    ) -> int:
+        # ``name`` keeps progress separate when one migration runs several backfills.
+        progress_id = f"{self.migration.migration_id}:{name}" if name else self.migration.migration_id
+        conn = self.connection
+        row = conn.execute(
+            "SELECT last_key, rows_done FROM schema_backfills WHERE migration_id = ?",
+            (progress_id,),
+        ).fetchone()
+        last_key, rows_done = (row[0], row[1]) if row else (None, 0)
+
+        selected = ", ".join([key, *columns])
+        condition = f" AND ({where})" if where else ""
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    f"SELECT {selected} FROM {table} WHERE (? IS NULL OR {key} > ?){condition} "
+                    f"ORDER BY {key} LIMIT ?",
+                    (last_key, last_key, self.chunk_size),
+                ).fetchall()
+                if not rows:
+                    conn.commit()
+                    return rows_done
+                handler(conn, rows)
+                last_key = rows[-1][0]
+                rows_done += len(rows)
+                conn.execute(
+                    "INSERT INTO schema_backfills (migration_id, last_key, rows_done, updated_at) "
+                    "VALUES (?, ?, ?, datetime('now')) "
+                    "ON CONFLICT(migration_id) DO UPDATE SET "
+                    "last_key = excluded.last_key, rows_done = excluded.rows_done, updated_at = excluded.updated_at",
+                    (progress_id, last_key, rows_done),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if self.pause:
+                time.sleep(self.pause)
+
+
+def discover_migrations(bind: str, root: Path = MIGRATIONS_ROOT) -> list[Migration]:
+    directory = Path(root) / bind
+    if not directory.is_dir():
+        return []
+
+    migrations = {}
+    for path in directory.iterdir():
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(
+                f"Duplicate migration version {version:04d} in {directory}: "
+                f"{migrations[version].path.name}, {path.name}"
+            )
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations[version] = Migration(bind, version, path.stem, path, checksum)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def _bind_engine(bind: str):
+    if bind not in MIGRATION_BINDS:
+        raise MigrationError(f"Unknown migration bind: {bind}")
+    engine = db.engines.get(MIGRATION_BINDS[bind])
+    if engine is not None and engine.dialect.name != "sqlite":
+        raise MigrationError(f"Migrations require SQLite; {bind} bind uses {engine.dialect.name}.")
+    return engine
+
+
+def _ensure_bookkeeping(conn) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "migration_id TEXT PRIMARY KEY, "
+        "applied_at TEXT NOT NULL)"
     )
-    exists = db.session.execute(
-        text("SELECT migration_id FROM schema_migrations WHERE migration_id = :migration_id"),
-        {"migration_id": migration_id},
-    ).scalar()
-    if exists:
-        db.session.commit()
-        return False
-
-    sql = script_path.read_text(encoding="utf-8")
-    conn = db.session.connection()
-    for statement in [part.strip() for part in sql.split(";") if part.strip()]:
-        conn.exec_driver_sql(statement)
-
-    db.session.execute(
-        text("INSERT INTO schema_migrations (migration_id, applied_at) VALUES (:migration_id, datetime('now'))"),
-        {"migration_id": migration_id},
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(schema_migrations)")}
+    if "checksum" not in columns:
+        conn.execute("ALTER TABLE schema_migrations ADD COLUMN checksum TEXT")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_backfills ("
+        "migration_id TEXT PRIMARY KEY, "
+        "last_key, "
+        "rows_done INTEGER NOT NULL DEFAULT 0, "
+        "updated_at TEXT NOT NULL)"
     )
-    db.session.commit()
-    return True
+    conn.commit()
+
+
+def _applied_checksums(conn) -> dict:
+    return dict(conn.execute("SELECT migration_id, checksum FROM schema_migrations").fetchall())
+
+
+def _check_applied(migrations: list[Migration], applied: dict) -> list[Migration]:
+    pending = []
+    for migration in migrations:
+        if migration.migration_id not in applied:
+            pending.append(migration)
+            continue
+        recorded = applied[migration.migration_id]
+        if recorded is not None and recorded != migration.checksum:
+            raise MigrationError(
+                f"Migration {migration.bind}/{migration.path.name} was modified after it was applied "
+                "(checksum mismatch). Add a new migration instead of editing an applied one."
+            )
+    return pending
+
+
+def _record(conn, migration: Migration) -> None:
+    conn.execute(
+        "INSERT INTO schema_migrations (migration_id, applied_at, checksum) VALUES (?, datetime('now'), ?) "
+        "ON CONFLICT(migration_id) DO UPDATE SET checksum = excluded.checksum",
+        (migration.migration_id, migration.checksum),
+    )
+
+
+def _apply_sql(conn, migration: Migration) -> None:
+    script = migration.path.read_text(encoding="utf-8")
+    try:
+        # executescript keeps triggers and quoted semicolons intact; the leading
+        # BEGIN makes the whole file and its bookkeeping row a single transaction.
+        conn.executescript("BEGIN;\n" + script)
+        _record(conn, migration)
+        conn.commit()
+    except Exception as exc:
+        if conn.in_transaction:
+            conn.rollback()
+        raise MigrationError(f"Migration {migration.bind}/{migration.path.name} failed: {exc}") from exc
+
+
+def _apply_python(conn, migration: Migration, chunk_size: int, pause: float) -> None:
+    spec = importlib.util.spec_from_file_location(
+        f"ems_migration_{migration.bind}_{migration.migration_id}", migration.path
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    upgrade = getattr(module, "upgrade", None)
+    if not callable(upgrade):
+        raise MigrationError(f"Migration {migration.bind}/{migration.path.name} does not define upgrade(ctx).")
+
+    try:
+        upgrade(MigrationContext(conn, migration, chunk_size, pause))
+        _record(conn, migration)
+        conn.execute(
+            "DELETE FROM schema_backfills WHERE migration_id = ? OR migration_id LIKE ?",
+            (migration.migration_id, f"{migration.migration_id}:%"),
+        )
+        conn.commit()
+    except Exception as exc:
+        if conn.in_transaction:
+            conn.rollback()
+        if isinstance(exc, MigrationError):
+            raise
+        raise MigrationError(f"Migration {migration.bind}/{migration.path.name} failed: {exc}") from exc
+
+
+def migrate_bind(
+    bind: str,
+    dry_run: bool = False,
+    chunk_size: int = DEFAULT_BACKFILL_CHUNK_SIZE,
+    pause: float = DEFAULT_BACKFILL_PAUSE,
+    root: Path = MIGRATIONS_ROOT,
+) -> list[dict]:
+    engine = _bind_engine(bind)
+    if engine is None:
+        return []
+
+    migrations = discover_migrations(bind, root)
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        _ensure_bookkeeping(conn)
+        applied = _applied_checksums(conn)
+        pending = _check_applied(migrations, applied)
+        if not dry_run:
+            # Rows written before checksums were tracked adopt the current file's checksum.
+            for migration in migrations:
+                if migration.migration_id in applied and applied[migration.migration_id] is None:
+                    _record(conn, migration)
+            conn.commit()
+        results = []
+        for migration in pending:
+            if not dry_run:
+                if migration.kind == "sql":
+                    _apply_sql(conn, migration)
+                else:
+                    _apply_python(conn, migration, chunk_size, pause)
+            results.append(
+                {
+                    "bind": bind,
+                    "migration_id": migration.migration_id,
+                    "kind": migration.kind,
+                    "status": "pending" if dry_run else "applied",
+                }
+            )
+        return results
+    finally:
+        raw.close()
+
+
+def run_migrations(
+    binds=None,
+    dry_run: bool = False,
+    chunk_size: int = DEFAULT_BACKFILL_CHUNK_SIZE,
+    pause: float = DEFAULT_BACKFILL_PAUSE,
+    root: Path = MIGRATIONS_ROOT,
+) -> list[dict]:
+    results = []
+    for bind in binds or MIGRATION_BINDS:
+        results.extend(migrate_bind(bind, dry_run=dry_run, chunk_size=chunk_size, pause=pause, root=root))
+    return results
+
+
+def stamp_migrations(bind: str, root: Path = MIGRATIONS_ROOT) -> None:
+    engine = _bind_engine(bind)
+    if engine is None:
+        return
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        _ensure_bookkeeping(conn)
+        for migration in discover_migrations(bind, root):
+            _record(conn, migration)
+        conn.commit()
+    finally:
+        raw.close()
 
 
-def apply_all_migrations(app):
-    migration_root = Path(app.root_path) / "migrations"
-    migration = migration_root / "phase2_structured_data.sql"
-    if migration.exists():
-        apply_sql_migration("phase2_structured_data", migration)
+def create_bind_schema(bind: str) -> None:
+    """create_all for one bind; a brand-new database is stamped as fully migrated
+    because create_all already produced the latest schema."""
+    engine = _bind_engine(bind)
+    if engine is None:
+        return
+    fresh = not inspect(engine).get_table_names()
+    db.create_all(bind_key=MIGRATION_BINDS[bind])
+    if fresh:
+        stamp_migrations(bind)
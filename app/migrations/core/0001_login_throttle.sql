@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS login_throttle (
+    key VARCHAR(255) NOT NULL,
+    tokens FLOAT NOT NULL,
+    refilled_at FLOAT NOT NULL,
+    PRIMARY KEY (key)
+);
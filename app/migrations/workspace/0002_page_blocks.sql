@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS page_block (
+    id INTEGER PRIMARY KEY,
+    page_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    FOREIGN KEY(page_id) REFERENCES page (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_page_block_page_position ON page_block (page_id, position);
+
+ALTER TABLE page ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE page ADD COLUMN created_by_user_id INTEGER;
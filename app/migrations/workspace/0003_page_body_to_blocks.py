@@ -0,0 +1,27 @@
+import re
+from datetime import datetime
+
+POSITION_GAP = 1024
+
+
+def _split(body):
+    return [part.strip("\n") for part in re.split(r"\n[ \t]*\n", body) if part.strip()]
+
+
+def _move_body_to_blocks(conn, rows):
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+    for page_id, body in rows:
+        has_blocks = conn.execute("SELECT 1 FROM page_block WHERE page_id = ? LIMIT 1", (page_id,)).fetchone()
+        if not has_blocks:
+            conn.executemany(
+                "INSERT INTO page_block (page_id, position, content, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (page_id, (index + 1) * POSITION_GAP, content, now, now)
+                    for index, content in enumerate(_split(body))
+                ],
+            )
+        conn.execute("UPDATE page SET body = NULL WHERE id = ?", (page_id,))
+
+
+def upgrade(ctx):
+    ctx.backfill("page", _move_body_to_blocks, columns=("body",), where="body IS NOT NULL")
@@ -0,0 +1 @@
+ALTER TABLE page ADD COLUMN preview VARCHAR(280);
@@ -0,0 +1,29 @@
+from app.compression import COMPRESSION_THRESHOLD, encode_text
+from app.pages.blocks import preview_text
+
+LARGE_TEXT = f"typeof({{column}}) = 'text' AND length(CAST({{column}} AS BLOB)) >= {COMPRESSION_THRESHOLD}"
+
+
+def _compress_blocks(conn, rows):
+    conn.executemany(
+        "UPDATE page_block SET content = ? WHERE id = ?",
+        [(encode_text(content), block_id) for block_id, content in rows],
+    )
+
+
+def _compress_bodies(conn, rows):
+    conn.executemany("UPDATE page SET body = ? WHERE id = ?", [(encode_text(body), page_id) for page_id, body in rows])
+
+
+def _fill_previews(conn, rows):
+    for (page_id,) in rows:
+        first = conn.execute(
+            "SELECT content FROM page_block WHERE page_id = ? ORDER BY position LIMIT 1", (page_id,)
+        ).fetchone()
+        conn.execute("UPDATE page SET preview = ? WHERE id = ?", (preview_text(first[0] if first else None), page_id))
+
+
+def upgrade(ctx):
+    ctx.backfill("page_block", _compress_blocks, columns=("content",), where=LARGE_TEXT.format(column="content"), name="blocks")
+    ctx.backfill("page", _compress_bodies, columns=("body",), where=LARGE_TEXT.format(column="body"), name="bodies")
+    ctx.backfill("page", _fill_previews, where="preview IS NULL", name="previews")
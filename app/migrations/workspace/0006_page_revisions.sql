@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS page_revision (
+    id INTEGER PRIMARY KEY,
+    page_id INTEGER NOT NULL,
+    revision INTEGER NOT NULL,
+    is_snapshot BOOLEAN NOT NULL DEFAULT 0,
+    content TEXT NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    created_by_user_id INTEGER,
+    created_at DATETIME NOT NULL,
+    CONSTRAINT uq_page_revision_page_revision UNIQUE (page_id, revision),
+    FOREIGN KEY(page_id) REFERENCES page (id) ON DELETE CASCADE
+);
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS page_render (
+    content_hash VARCHAR(64) NOT NULL PRIMARY KEY,
+    page_id INTEGER NOT NULL,
+    html TEXT NOT NULL,
+    created_at DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_page_render_page_id ON page_render (page_id);
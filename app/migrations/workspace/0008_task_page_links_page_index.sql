@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS ix_task_page_links_page_task ON task_page_links (page_id, task_id);
@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS ix_task_status_updated ON task (status, updated_at, id);
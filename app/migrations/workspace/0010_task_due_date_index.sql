@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS ix_task_due_date ON task (due_date);
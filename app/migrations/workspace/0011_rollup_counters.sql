@@ -0,0 +1,8 @@
+ALTER TABLE project ADD COLUMN task_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE project ADD COLUMN open_task_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE project ADD COLUMN done_task_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE project ADD COLUMN last_activity_at DATETIME;
+ALTER TABLE company ADD COLUMN project_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE company ADD COLUMN active_project_count INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS ix_task_project_status ON task (project_id, status);
+CREATE INDEX IF NOT EXISTS ix_project_company_status ON project (company_id, status);
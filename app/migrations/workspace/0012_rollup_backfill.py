@@ -0,0 +1,27 @@
+def _count_tasks(conn, rows):
+    conn.execute(
+        "UPDATE project SET "
+        "task_count = (SELECT count(*) FROM task WHERE task.project_id = project.id), "
+        "open_task_count = (SELECT count(*) FROM task WHERE task.project_id = project.id "
+        "AND task.status NOT IN ('done', 'archived')), "
+        "done_task_count = (SELECT count(*) FROM task WHERE task.project_id = project.id AND task.status = 'done'), "
+        "last_activity_at = (SELECT max(task.updated_at) FROM task WHERE task.project_id = project.id) "
+        "WHERE id BETWEEN ? AND ?",
+        (rows[0][0], rows[-1][0]),
+    )
+
+
+def _count_projects(conn, rows):
+    conn.execute(
+        "UPDATE company SET "
+        "project_count = (SELECT count(*) FROM project WHERE project.company_id = company.id), "
+        "active_project_count = (SELECT count(*) FROM project WHERE project.company_id = company.id "
+        "AND project.status = 'active') "
+        "WHERE id BETWEEN ? AND ?",
+        (rows[0][0], rows[-1][0]),
+    )
+
+
+def upgrade(ctx):
+    ctx.backfill("project", _count_tasks, name="projects")
+    ctx.backfill("company", _count_projects, name="companies")
@@ -0,0 +1,13 @@
+CREATE TABLE IF NOT EXISTS name_trigram (
+    entity VARCHAR(20) NOT NULL,
+    trigram VARCHAR(3) NOT NULL,
+    record_id INTEGER NOT NULL,
+    PRIMARY KEY (entity, trigram, record_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_name_trigram_record ON name_trigram (entity, record_id);
+CREATE TABLE IF NOT EXISTS name_trigram_count (
+    entity VARCHAR(20) NOT NULL,
+    trigram VARCHAR(3) NOT NULL,
+    records INTEGER NOT NULL,
+    PRIMARY KEY (entity, trigram)
+) WITHOUT ROWID;
@@ -0,0 +1,21 @@
+from collections import Counter
+
+from app.databases.dedupe import trigram_rows
+
+
+def _indexer(entity):
+    def index(conn, rows):
+        postings = trigram_rows(entity, rows)
+        conn.executemany("INSERT INTO name_trigram (entity, trigram, record_id) VALUES (?, ?, ?)", postings)
+        conn.executemany(
+            "INSERT INTO name_trigram_count (entity, trigram, records) VALUES (?, ?, ?) "
+            "ON CONFLICT(entity, trigram) DO UPDATE SET records = records + excluded.records",
+            [(entity, gram, count) for gram, count in Counter(gram for _entity, gram, _id in postings).items()],
+        )
+
+    return index
+
+
+def upgrade(ctx):
+    ctx.backfill("company", _indexer("company"), columns=("name",), name="companies")
+    ctx.backfill("project", _indexer("project"), columns=("name",), name="projects")
@@ -0,0 +1,4 @@
+CREATE TABLE IF NOT EXISTS table_generation (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
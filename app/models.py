@@ -1,8 +1,12 @@
 from datetime import datetime
 
+from flask import current_app, g, has_app_context
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import cast, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
 
+from app.compression import CompressedText
 from app.extensions import db
 
 ROLE_CHOICES = ("Admin", "Editor", "Viewer")
@@ -10,6 +14,26 @@ COMPANY_STATUS_CHOICES = ("active", "inactive")
 PROJECT_STATUS_CHOICES = ("idea", "active", "blocked", "done", "archived")
 TASK_STATUS_CHOICES = ("backlog", "next", "doing", "blocked", "done", "archived")
 DATABASE_KEYS = ("tasks", "projects", "companies")
+DEFAULT_PASSWORD_HASH_METHOD = "scrypt"
+
+
+def password_hash_method() -> str:
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD") or DEFAULT_PASSWORD_HASH_METHOD
+    return DEFAULT_PASSWORD_HASH_METHOD
+
+
+def _normalized_hash_method(method: str) -> str:
+    # Expand werkzeug's defaults so "scrypt" compares equal to the
+    # "scrypt:32768:8:1" prefix written into stored hashes.
+    name, *params = method.split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+        return ":".join([name, *params, *defaults[len(params):]])
+    if name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+        return ":".join([name, *params, *defaults[len(params):]])
+    return method
 
 
 class User(UserMixin, db.Model):
@@ -23,11 +47,15 @@ class User(UserMixin, db.Model):
     last_login_at = db.Column(db.DateTime)
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=password_hash_method())
 
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
 
+    def password_needs_rehash(self) -> bool:
+        stored_method = self.password_hash.split("$", 1)[0]
+        return stored_method != _normalized_hash_method(password_hash_method())
+
 
 class AuditLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -50,11 +78,44 @@ class AppSetting(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class LoginThrottle(db.Model):
+    key = db.Column(db.String(255), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    refilled_at = db.Column(db.Float, nullable=False)
+
+
+SETTINGS_GENERATION_KEY = "_settings_generation"
+
+
+def _load_settings() -> dict:
+    # Settings are cached per process and revalidated once per app context
+    # against a generation row that every write bumps, so another worker's
+    # update is picked up on its next request without re-reading the table.
+    cached = current_app.extensions.get("settings_cache")
+    if cached is not None and g.get("settings_cache_checked"):
+        return cached[1]
+
+    if cached is not None:
+        generation = db.session.execute(
+            select(AppSetting.value).where(AppSetting.key == SETTINGS_GENERATION_KEY)
+        ).scalar()
+        if generation != cached[0]:
+            cached = None
+
+    if cached is None:
+        values = dict(db.session.execute(select(AppSetting.key, AppSetting.value)).all())
+        cached = (values.get(SETTINGS_GENERATION_KEY), values)
+        current_app.extensions["settings_cache"] = cached
+
+    g.settings_cache_checked = True
+    return cached[1]
+
+
 def get_setting(key: str, default=None):
-    setting = AppSetting.query.filter_by(key=key).first()
-    if not setting or setting.value is None:
+    value = _load_settings().get(key)
+    if value is None:
         return default
-    return setting.value
+    return value
 
 
 def set_setting(key: str, value) -> AppSetting:
@@ -66,6 +127,17 @@ def set_setting(key: str, value) -> AppSetting:
     else:
         setting.value = stored_value
     db.session.flush()
+
+    now = datetime.utcnow()
+    db.session.execute(
+        sqlite_insert(AppSetting)
+        .values(key=SETTINGS_GENERATION_KEY, value="1", created_at=now, updated_at=now)
+        .on_conflict_do_update(
+            index_elements=[AppSetting.key],
+            set_={"value": cast(cast(AppSetting.value, db.Integer) + 1, db.Text), "updated_at": now},
+        )
+    )
+    current_app.extensions.pop("settings_cache", None)
     return setting
 
 
@@ -74,11 +146,58 @@ class Page(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
-    body = db.Column(db.Text)
+    # Legacy single-column content; page text now lives in PageBlock rows.
+    body = db.Column(CompressedText())
+    # Plain-text start of the page so listings and search never decompress content.
+    preview = db.Column(db.String(280))
+    version = db.Column(db.Integer, nullable=False, default=1)
+    created_by_user_id = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class PageBlock(db.Model):
+    __bind_key__ = "workspace"
+    __tablename__ = "page_block"
+
+    id = db.Column(db.Integer, primary_key=True)
+    page_id = db.Column(db.Integer, db.ForeignKey("page.id", ondelete="CASCADE"), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    content = db.Column(CompressedText(), nullable=False, default="")
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.Index("ix_page_block_page_position", "page_id", "position"),)
+
+
+class PageRevision(db.Model):
+    __bind_key__ = "workspace"
+    __tablename__ = "page_revision"
+
+    id = db.Column(db.Integer, primary_key=True)
+    page_id = db.Column(db.Integer, db.ForeignKey("page.id", ondelete="CASCADE"), nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    is_snapshot = db.Column(db.Boolean, nullable=False, default=False)
+    # Full page text for snapshots, JSON line delta against the previous revision otherwise.
+    content = db.Column(CompressedText(), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    created_by_user_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint("page_id", "revision", name="uq_page_revision_page_revision"),)
+
+
+class PageRender(db.Model):
+    __bind_key__ = "workspace"
+    __tablename__ = "page_render"
+
+    # sha256 of the renderer version and the page text; identical text shares one row.
+    content_hash = db.Column(db.String(64), primary_key=True)
+    page_id = db.Column(db.Integer, nullable=False, index=True)
+    html = db.Column(CompressedText(), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
 class Company(db.Model):
     __bind_key__ = "workspace"
 
@@ -88,6 +207,9 @@ class Company(db.Model):
     created_by_user_id = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Rollups of this company's projects, kept by app.databases.rollups.
+    project_count = db.Column(db.Integer, nullable=False, default=0)
+    active_project_count = db.Column(db.Integer, nullable=False, default=0)
 
     projects = db.relationship("Project", back_populates="company", passive_deletes=True)
 
@@ -102,10 +224,56 @@ class Project(db.Model):
     created_by_user_id = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Rollups of this project's tasks, kept by app.databases.rollups.
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+    open_task_count = db.Column(db.Integer, nullable=False, default=0)
+    done_task_count = db.Column(db.Integer, nullable=False, default=0)
+    last_activity_at = db.Column(db.DateTime, nullable=True)
 
     company = db.relationship("Company", back_populates="projects")
     tasks = db.relationship("Task", back_populates="project", passive_deletes=True)
 
+    # Company rollups count projects per company and status.
+    __table_args__ = (db.Index("ix_project_company_status", "company_id", "status"),)
+
+
+class NameTrigram(db.Model):
+    __bind_key__ = "workspace"
+    __tablename__ = "name_trigram"
+
+    # Trigrams of company and project names for duplicate lookup, kept by app.databases.dedupe.
+    entity = db.Column(db.String(20), primary_key=True)
+    trigram = db.Column(db.String(3), primary_key=True)
+    record_id = db.Column(db.Integer, primary_key=True)
+
+    # Lookups read by trigram; reindexing a renamed record deletes by record.
+    __table_args__ = (
+        db.Index("ix_name_trigram_record", "entity", "record_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+
+class NameTrigramCount(db.Model):
+    __bind_key__ = "workspace"
+    __tablename__ = "name_trigram_count"
+
+    # Names holding each trigram; lookups skip the most common trigrams.
+    entity = db.Column(db.String(20), primary_key=True)
+    trigram = db.Column(db.String(3), primary_key=True)
+    records = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+
+class TableGeneration(db.Model):
+    __bind_key__ = "workspace"
+    __tablename__ = "table_generation"
+
+    # Bumped in the same transaction as every write to the named table, so
+    # caches revalidate with a primary-key read instead of scanning it.
+    name = db.Column(db.String(64), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
 
 class TaskPageLink(db.Model):
     __bind_key__ = "workspace"
@@ -118,6 +286,9 @@ class TaskPageLink(db.Model):
     task = db.relationship("Task", back_populates="task_page_links")
     page = db.relationship("Page", backref="task_page_links")
 
+    # The primary key leads with task_id; backlink lookups need page_id first.
+    __table_args__ = (db.Index("ix_task_page_links_page_task", "page_id", "task_id"),)
+
 
 class Task(db.Model):
     __bind_key__ = "workspace"
@@ -136,6 +307,15 @@ class Task(db.Model):
         "TaskPageLink", back_populates="task", cascade="all, delete-orphan", passive_deletes=True
     )
 
+    __table_args__ = (
+        # Board columns read tasks per status, newest first.
+        db.Index("ix_task_status_updated", "status", "updated_at", "id"),
+        # Calendar and due views read a due_date range.
+        db.Index("ix_task_due_date", "due_date"),
+        # Project rollups count tasks per project and status.
+        db.Index("ix_task_project_status", "project_id", "status"),
+    )
+
 
 class SavedView(db.Model):
     __bind_key__ = "workspace"
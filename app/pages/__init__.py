@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+
+pages_bp = Blueprint("pages", __name__, url_prefix="/pages", template_folder="../templates")
+
+from app.pages import routes  # noqa: E402,F401
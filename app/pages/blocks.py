@@ -0,0 +1,194 @@
+import re
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+
+from app.compression import decode_text
+from app.extensions import db
+from app.models import PageBlock
+
+POSITION_GAP = 1024
+BLOCK_SEPARATOR = "\n\n"
+BLOCK_OPS = ("update", "insert", "delete")
+PREVIEW_LENGTH = 200
+
+
+class BlockOpError(ValueError):
+    pass
+
+
+def split_text(text: str | None) -> list[str]:
+    if not text:
+        return []
+    normalized = text.replace("\r\n", "\n")
+    return [part.strip("\n") for part in re.split(r"\n[ \t]*\n", normalized) if part.strip()]
+
+
+def load_blocks(page_id: int) -> list[PageBlock]:
+    # Block ops write with bulk statements that bypass the session, so blocks
+    # already loaded in this request are refreshed rather than reused.
+    return (
+        PageBlock.query.filter_by(page_id=page_id)
+        .order_by(PageBlock.position.asc())
+        .populate_existing()
+        .all()
+    )
+
+
+def page_text(page, blocks=None) -> str:
+    if blocks is None:
+        blocks = load_blocks(page.id)
+    if not blocks:
+        return page.body or ""
+    return BLOCK_SEPARATOR.join(block.content for block in blocks)
+
+
+def preview_text(content) -> str | None:
+    text = " ".join((decode_text(content) or "").split())
+    if not text:
+        return None
+    return text if len(text) <= PREVIEW_LENGTH else text[: PREVIEW_LENGTH - 1].rstrip() + "…"
+
+
+def refresh_page_preview(page) -> None:
+    first = db.session.execute(
+        select(PageBlock.content).where(PageBlock.page_id == page.id).order_by(PageBlock.position.asc()).limit(1)
+    ).scalar()
+    page.preview = preview_text(first)
+
+
+def create_blocks(page, text: str | None) -> list[PageBlock]:
+    blocks = [
+        PageBlock(page_id=page.id, position=(index + 1) * POSITION_GAP, content=content)
+        for index, content in enumerate(split_text(text))
+    ]
+    db.session.add_all(blocks)
+    return blocks
+
+
+class _BlockOrder:
+    """Ordered (position, id) pairs for one page, without block content."""
+
+    def __init__(self, page_id: int):
+        self.page_id = page_id
+        rows = db.session.execute(
+            select(PageBlock.position, PageBlock.id)
+            .where(PageBlock.page_id == page_id)
+            .order_by(PageBlock.position.asc())
+        ).all()
+        self.positions = [row.position for row in rows]
+        self.ids = [row.id for row in rows]
+
+    def __contains__(self, block_id) -> bool:
+        return block_id in self.ids
+
+    def remove(self, block_id: int) -> None:
+        index = self.ids.index(block_id)
+        del self.ids[index]
+        del self.positions[index]
+
+    def position_after(self, block_id: int | None) -> tuple[int, int]:
+        index = 0 if block_id is None else self.ids.index(block_id) + 1
+        low = self.positions[index - 1] if index > 0 else 0
+        high = self.positions[index] if index < len(self.positions) else low + 2 * POSITION_GAP
+        if high - low < 2:
+            self._renumber()
+            return self.position_after(block_id)
+        return index, (low + high) // 2
+
+    def insert(self, index: int, position: int, block_id: int) -> None:
+        self.positions.insert(index, position)
+        self.ids.insert(index, block_id)
+
+    def _renumber(self) -> None:
+        # Only reached after repeated inserts into the same gap.
+        self.positions = [(index + 1) * POSITION_GAP for index in range(len(self.ids))]
+        if self.ids:
+            db.session.execute(
+                update(PageBlock),
+                [{"id": block_id, "position": position} for block_id, position in zip(self.ids, self.positions)],
+            )
+
+
+def apply_block_ops(page, ops) -> dict:
+    """Apply incremental block edits to ``page`` and return a change summary.
+
+    ``ops`` is a list of ``{"op": "update", "id", "content"}``,
+    ``{"op": "insert", "after", "content", "temp_id"}`` or ``{"op": "delete", "id"}``.
+    ``after`` may be an existing block id, the ``temp_id`` of a block inserted
+    earlier in the same batch, or null for the start of the page. Only the
+    touched rows are written.
+    """
+    if not isinstance(ops, list):
+        raise BlockOpError("ops must be a list.")
+
+    order = _BlockOrder(page.id)
+    inserted = {}
+    summary = {"updated": 0, "inserted": inserted, "deleted": 0}
+    now = datetime.utcnow()
+
+    def resolve(block_id):
+        if block_id in inserted:
+            return inserted[block_id]
+        if isinstance(block_id, int) and block_id in order:
+            return block_id
+        raise BlockOpError(f"Unknown block: {block_id!r}")
+
+    for op in ops:
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind not in BLOCK_OPS:
+            raise BlockOpError(f"Unsupported block op: {kind!r}")
+
+        if kind == "delete":
+            block_id = resolve(op.get("id"))
+            db.session.execute(delete(PageBlock).where(PageBlock.id == block_id, PageBlock.page_id == page.id))
+            order.remove(block_id)
+            summary["deleted"] += 1
+            continue
+
+        content = op.get("content")
+        if not isinstance(content, str):
+            raise BlockOpError("Block content must be a string.")
+
+        if kind == "update":
+            block_id = resolve(op.get("id"))
+            db.session.execute(
+                update(PageBlock)
+                .where(PageBlock.id == block_id, PageBlock.page_id == page.id)
+                .values(content=content, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            summary["updated"] += 1
+        else:
+            after = op.get("after")
+            index, position = order.position_after(None if after is None else resolve(after))
+            block = PageBlock(page_id=page.id, position=position, content=content)
+            db.session.add(block)
+            db.session.flush()
+            order.insert(index, position, block.id)
+            inserted[op.get("temp_id") or f"new-{len(inserted) + 1}"] = block.id
+
+    return summary
+
+
+def diff_submitted_blocks(blocks: list[PageBlock], submitted: dict, appended_text: str = "") -> list[dict]:
+    """Build block ops from a full form post, keeping only real changes."""
+    ops = []
+    after = None
+    for block in blocks:
+        if block.id not in submitted:
+            after = block.id
+            continue
+        content = submitted[block.id].replace("\r\n", "\n").strip("\n")
+        if not content.strip():
+            ops.append({"op": "delete", "id": block.id})
+            continue
+        if content != block.content:
+            ops.append({"op": "update", "id": block.id, "content": content})
+        after = block.id
+
+    for index, content in enumerate(split_text(appended_text)):
+        temp_id = f"append-{index}"
+        ops.append({"op": "insert", "after": after, "content": content, "temp_id": temp_id})
+        after = temp_id
+    return ops
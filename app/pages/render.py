@@ -0,0 +1,201 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app, url_for
+from markupsafe import Markup, escape
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import PageRender
+
+# Bump whenever render_markdown output changes so stored renders are ignored.
+RENDERER_VERSION = 2
+DEFAULT_RENDER_CACHE_SIZE = 256
+
+_FENCE = re.compile(r"^```")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^[-*]\s+(.*)$")
+_NUMBERED = re.compile(r"^\d+[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^>\s?(.*)$")
+_CODE_SPAN = re.compile(r"`([^`]+)`")
+_TASK_REF = re.compile(r"\[\[task:(\d+)(?:\|([^\]]+))?\]\]")
+# "/" links stay on this site: "//host" and "/\host" are off-site in browsers.
+_LINK = re.compile(r"\[([^\]]+)\]\(((?:https?://|/(?![/\\])|#)[^)\s]*)\)")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])")
+
+
+def _inline(text: str) -> str:
+    # Code spans are cut out first so nothing inside them is formatted.
+    parts = _CODE_SPAN.split(text)
+    out = []
+    for index, part in enumerate(parts):
+        if index % 2:
+            out.append(f"<code>{escape(part)}</code>")
+            continue
+        html = str(escape(part))
+        html = _TASK_REF.sub(
+            lambda m: f'<a class="task-ref" href="{url_for("databases.task_detail", task_id=int(m.group(1)))}">'
+            f'{m.group(2) or "Task #" + m.group(1)}</a>',
+            html,
+        )
+        html = _LINK.sub(r'<a href="\2">\1</a>', html)
+        html = _BOLD.sub(r"<strong>\1</strong>", html)
+        html = _ITALIC.sub(r"<em>\1</em>", html)
+        out.append(html)
+    return "".join(out)
+
+
+def render_markdown(text: str | None) -> str:
+    """Render the markdown subset used in pages: headings, lists, quotes,
+    fenced code, emphasis, links and ``[[task:<id>|label]]`` task references.
+    Input HTML is always escaped."""
+    out = []
+    paragraph = []
+    list_tag = None
+    code = None
+
+    def close_paragraph():
+        if paragraph:
+            out.append("<p>" + "<br>\n".join(_inline(line) for line in paragraph) + "</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            out.append(f"</{list_tag}>")
+            list_tag = None
+
+    for line in (text or "").replace("\r\n", "\n").split("\n"):
+        if code is not None:
+            if _FENCE.match(line):
+                out.append("<pre><code>" + str(escape("\n".join(code))) + "</code></pre>")
+                code = None
+            else:
+                code.append(line)
+            continue
+        if _FENCE.match(line):
+            close_paragraph()
+            close_list()
+            code = []
+            continue
+        if not line.strip():
+            close_paragraph()
+            close_list()
+            continue
+
+        heading = _HEADING.match(line)
+        item = _BULLET.match(line) or _NUMBERED.match(line)
+        quote = _QUOTE.match(line)
+        if heading:
+            close_paragraph()
+            close_list()
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif item:
+            close_paragraph()
+            tag = "ul" if _BULLET.match(line) else "ol"
+            if list_tag != tag:
+                close_list()
+                out.append(f"<{tag}>")
+                list_tag = tag
+            out.append(f"<li>{_inline(item.group(1))}</li>")
+        elif quote:
+            close_paragraph()
+            close_list()
+            out.append(f"<blockquote>{_inline(quote.group(1))}</blockquote>")
+        else:
+            close_list()
+            paragraph.append(line)
+
+    close_paragraph()
+    close_list()
+    if code is not None:
+        out.append("<pre><code>" + str(escape("\n".join(code))) + "</code></pre>")
+    return "\n".join(out)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(f"{RENDERER_VERSION}\0{text}".encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """In-process LRU of rendered HTML in front of the shared ``page_render`` table."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    def _remember(self, key: str, html: str) -> None:
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def render(self, page_id: int, text: str) -> str:
+        key = content_hash(text)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return html
+
+        html = db.session.execute(select(PageRender.html).where(PageRender.content_hash == key)).scalar()
+        if html is not None:
+            self._count("db_hits")
+            self._remember(key, html)
+            return html
+
+        self._count("misses")
+        html = render_markdown(text)
+        self._store(page_id, key, html)
+        self._remember(key, html)
+        return html
+
+    def _store(self, page_id: int, key: str, html: str) -> None:
+        # Renders are only written on a miss, i.e. after the page text changed,
+        # so this is also where the page's superseded render is dropped.
+        try:
+            with db.engines["workspace"].begin() as connection:
+                connection.execute(
+                    delete(PageRender).where(PageRender.page_id == page_id, PageRender.content_hash != key)
+                )
+                connection.execute(
+                    sqlite_insert(PageRender)
+                    .values(content_hash=key, page_id=page_id, html=html, created_at=datetime.utcnow())
+                    .on_conflict_do_nothing()
+                )
+        except OperationalError:
+            # A busy database only costs the next worker a re-render.
+            current_app.logger.warning("Could not store page render for page %s", page_id, exc_info=True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "size": self.size}
+
+
+def init_render_cache(app) -> None:
+    app.extensions["page_render_cache"] = RenderCache(
+        app.config.get("PAGE_RENDER_CACHE_SIZE", DEFAULT_RENDER_CACHE_SIZE)
+    )
+
+
+def rendered_page_html(page_id: int, text: str) -> Markup:
+    return Markup(current_app.extensions["page_render_cache"].render(page_id, text))
+
+
+def render_cache_stats() -> dict:
+    return current_app.extensions["page_render_cache"].snapshot()
@@ -0,0 +1,245 @@
+import json
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+
+from flask import after_this_request, current_app
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import PageRevision
+
+
+def make_delta(old: str, new: str) -> list:
+    """Line delta from ``old`` to ``new``: ``["=", n]`` keeps, ``["-", n]`` drops,
+    ``["+", [lines]]`` adds."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(["-", i2 - i1])
+        if j2 > j1:
+            ops.append(["+", new_lines[j1:j2]])
+    return ops
+
+
+def apply_delta(old: str, ops: list) -> str:
+    old_lines = old.splitlines(keepends=True)
+    out = []
+    index = 0
+    for op, value in ops:
+        if op == "=":
+            out.extend(old_lines[index : index + value])
+            index += value
+        elif op == "-":
+            index += value
+        else:
+            out.extend(value)
+    return "".join(out)
+
+
+def _chain_length(page_id: int) -> int:
+    last_snapshot = (
+        select(func.max(PageRevision.revision))
+        .where(PageRevision.page_id == page_id, PageRevision.is_snapshot.is_(True))
+        .scalar_subquery()
+    )
+    return db.session.execute(
+        select(func.count(PageRevision.id)).where(
+            PageRevision.page_id == page_id, PageRevision.revision > last_snapshot
+        )
+    ).scalar()
+
+
+def _has_revisions(page_id: int) -> bool:
+    return db.session.execute(select(PageRevision.id).where(PageRevision.page_id == page_id).limit(1)).first() is not None
+
+
+def _encode_revision(previous_text: str | None, text: str, chain_length: int) -> tuple[bool, str]:
+    interval = current_app.config.get("PAGE_REVISION_SNAPSHOT_INTERVAL", 10)
+    if previous_text is None or chain_length + 1 >= interval:
+        return True, text
+    delta = json.dumps(make_delta(previous_text, text), separators=(",", ":"))
+    # A rewrite of most of the page is cheaper to store as a new snapshot.
+    if len(delta) > len(text) // 2:
+        return True, text
+    return False, delta
+
+
+def record_revision(page, previous_text: str | None, text: str, user_id, previous_title: str | None = None) -> None:
+    """Store ``page.version`` as a revision whose text is ``text``.
+
+    ``previous_text`` is the page text before this save. Pages edited before
+    history existed get that text recorded as a baseline snapshot first.
+    """
+    chain_length = 0
+    if not _has_revisions(page.id):
+        if previous_text is not None and page.version > 1:
+            db.session.add(
+                PageRevision(
+                    page_id=page.id,
+                    revision=page.version - 1,
+                    is_snapshot=True,
+                    content=previous_text,
+                    title=previous_title or page.title,
+                    created_by_user_id=None,
+                )
+            )
+        else:
+            previous_text = None
+    else:
+        chain_length = _chain_length(page.id)
+
+    is_snapshot, content = _encode_revision(previous_text, text, chain_length)
+    db.session.add(
+        PageRevision(
+            page_id=page.id,
+            revision=page.version,
+            is_snapshot=is_snapshot,
+            content=content,
+            title=page.title,
+            created_by_user_id=user_id,
+        )
+    )
+
+    thin_every = current_app.config.get("PAGE_REVISION_THIN_EVERY", 0)
+    if thin_every and page.version % thin_every == 0:
+        schedule_thinning(page.id)
+
+
+def revision_text(page_id: int, revision: int) -> str | None:
+    """Rebuild one revision from its nearest snapshot and the deltas after it."""
+    snapshot = (
+        PageRevision.query.filter(
+            PageRevision.page_id == page_id,
+            PageRevision.revision <= revision,
+            PageRevision.is_snapshot.is_(True),
+        )
+        .order_by(PageRevision.revision.desc())
+        .first()
+    )
+    if snapshot is None:
+        return None
+    deltas = (
+        PageRevision.query.filter(
+            PageRevision.page_id == page_id,
+            PageRevision.revision > snapshot.revision,
+            PageRevision.revision <= revision,
+        )
+        .order_by(PageRevision.revision.asc())
+        .all()
+    )
+    text = snapshot.content
+    for delta in deltas:
+        text = delta.content if delta.is_snapshot else apply_delta(text, json.loads(delta.content))
+    return text
+
+
+def list_revisions(page_id: int, before: int | None = None, limit: int = 20):
+    """Newest-first page of revision metadata, keyed on ``revision``."""
+    query = (
+        db.session.query(
+            PageRevision.revision,
+            PageRevision.title,
+            PageRevision.is_snapshot,
+            PageRevision.created_by_user_id,
+            PageRevision.created_at,
+        )
+        .filter(PageRevision.page_id == page_id)
+        .order_by(PageRevision.revision.desc())
+    )
+    if before is not None:
+        query = query.filter(PageRevision.revision < before)
+    rows = query.limit(limit + 1).all()
+    next_before = rows[limit - 1].revision if len(rows) > limit else None
+    return rows[:limit], next_before
+
+
+def revisions_to_keep(rows, now: datetime, keep_all_days: int, keep_daily_days: int) -> set:
+    """Revision numbers kept by the retention policy: everything recent, then
+    the newest revision per day, then the newest per ISO week."""
+    keep = set()
+    seen_buckets = set()
+    for index, row in enumerate(sorted(rows, key=lambda r: r.revision, reverse=True)):
+        age = now - row.created_at
+        if index == 0 or age <= timedelta(days=keep_all_days):
+            keep.add(row.revision)
+            continue
+        if age <= timedelta(days=keep_daily_days):
+            bucket = ("day", row.created_at.date())
+        else:
+            bucket = ("week", *row.created_at.isocalendar()[:2])
+        if bucket not in seen_buckets:
+            seen_buckets.add(bucket)
+            keep.add(row.revision)
+    return keep
+
+
+def thin_page_revisions(page_id: int, now: datetime | None = None) -> int:
+    """Drop revisions outside the retention policy and re-encode the survivors
+    so every kept revision still rebuilds from one snapshot and a bounded chain."""
+    config = current_app.config
+    rows = PageRevision.query.filter_by(page_id=page_id).order_by(PageRevision.revision.asc()).all()
+    keep = revisions_to_keep(
+        rows,
+        now or datetime.utcnow(),
+        config.get("PAGE_REVISION_KEEP_ALL_DAYS", 14),
+        config.get("PAGE_REVISION_KEEP_DAILY_DAYS", 90),
+    )
+    if len(keep) == len(rows):
+        return 0
+
+    interval = config.get("PAGE_REVISION_SNAPSHOT_INTERVAL", 10)
+    text = None
+    previous_kept_text = None
+    chain_length = 0
+    rewriting = False
+    removed = 0
+    for row in rows:
+        text = row.content if row.is_snapshot else apply_delta(text, json.loads(row.content))
+        if row.revision not in keep:
+            db.session.delete(row)
+            removed += 1
+            rewriting = True
+            continue
+        if rewriting:
+            if previous_kept_text is None or chain_length + 1 >= interval:
+                row.is_snapshot, row.content = True, text
+            else:
+                row.is_snapshot = False
+                row.content = json.dumps(make_delta(previous_kept_text, text), separators=(",", ":"))
+        chain_length = 0 if row.is_snapshot else chain_length + 1
+        previous_kept_text = text
+    return removed
+
+
+def thin_all_revisions(now: datetime | None = None) -> int:
+    page_ids = db.session.execute(select(PageRevision.page_id).distinct()).scalars().all()
+    removed = 0
+    for page_id in page_ids:
+        removed += thin_page_revisions(page_id, now)
+        db.session.commit()
+    return removed
+
+
+def schedule_thinning(page_id: int) -> None:
+    """Thin one page's history after the response has been sent."""
+    app = current_app._get_current_object()
+
+    @after_this_request
+    def attach(response):
+        def run():
+            with app.app_context():
+                try:
+                    thin_page_revisions(page_id)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Revision thinning failed for page %s", page_id)
+
+        response.call_on_close(run)
+        return response
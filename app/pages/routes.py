@@ -0,0 +1,312 @@
+from flask import abort, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.extensions import db
+from app.models import AuditLog, Page, PageBlock, PageRender, PageRevision, Project, Task, TaskPageLink, User
+from app.pages import pages_bp
+from app.pages.blocks import (
+    BlockOpError,
+    apply_block_ops,
+    create_blocks,
+    diff_submitted_blocks,
+    load_blocks,
+    page_text,
+    refresh_page_preview,
+    split_text,
+)
+from app.pages.render import rendered_page_html
+from app.pages.revisions import list_revisions, record_revision, revision_text
+from app.workspace import workspace_guard_response
+
+
+@pages_bp.before_request
+@login_required
+def ensure_workspace_available():
+    return workspace_guard_response()
+
+
+def _can_edit(page):
+    return current_user.role == "Admin" or (
+        current_user.role == "Editor" and page.created_by_user_id == current_user.id
+    )
+
+
+def _ensure_can_edit(page):
+    if not _can_edit(page):
+        abort(403)
+
+
+def _log_action(action, entity_type, entity_id, metadata=None):
+    # Write the workspace rows before the core audit row, so every request
+    # takes the two SQLite write locks in the same order and none deadlock.
+    db.session.flush()
+    db.session.add(
+        AuditLog(
+            actor_user_id=current_user.id,
+            action=action,
+            entity_type=entity_type,
+            entity_id=str(entity_id) if entity_id is not None else None,
+            metadata_json=metadata,
+            ip_address=request.remote_addr,
+        )
+    )
+
+
+BACKLINKS_PAGE_SIZE = 25
+
+
+def _linked_tasks(page_id, before=None, limit=BACKLINKS_PAGE_SIZE):
+    """Tasks linking to ``page_id``, newest task first, keyed on task id.
+
+    Reads ``ix_task_page_links_page_task`` and joins task and project in one query.
+    """
+    query = (
+        select(
+            Task.id,
+            Task.title,
+            Task.status,
+            Task.due_date,
+            Project.id.label("project_id"),
+            Project.name.label("project_name"),
+        )
+        .select_from(TaskPageLink)
+        .join(Task, Task.id == TaskPageLink.task_id)
+        .outerjoin(Project, Project.id == Task.project_id)
+        .where(TaskPageLink.page_id == page_id)
+        .order_by(TaskPageLink.task_id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        query = query.where(TaskPageLink.task_id < before)
+    rows = db.session.execute(query).all()
+    next_before = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_before
+
+
+def _change_metadata(summary):
+    return {
+        "blocks_updated": summary["updated"],
+        "blocks_inserted": len(summary["inserted"]),
+        "blocks_deleted": summary["deleted"],
+    }
+
+
+@pages_bp.route("", methods=["GET"])
+@login_required
+def pages_list():
+    q = request.args.get("q", "").strip()
+    query = Page.query.options(load_only(Page.id, Page.title, Page.preview, Page.updated_at))
+    if q:
+        query = query.filter(or_(Page.title.ilike(f"%{q}%"), Page.preview.ilike(f"%{q}%")))
+    pages = query.order_by(Page.updated_at.desc()).all()
+    return render_template("pages/pages_list.html", pages=pages, q=q)
+
+
+@pages_bp.route("/new", methods=["GET", "POST"])
+@login_required
+def page_create():
+    if current_user.role == "Viewer":
+        abort(403)
+    if request.method == "POST":
+        title = request.form.get("title", "").strip()
+        content = request.form.get("content", "")
+        if not title:
+            flash("Page title is required.", "error")
+        else:
+            page = Page(title=title, created_by_user_id=current_user.id)
+            db.session.add(page)
+            db.session.flush()
+            blocks = create_blocks(page, content)
+            db.session.flush()
+            refresh_page_preview(page)
+            record_revision(page, None, page_text(page, blocks), current_user.id)
+            _log_action("page_created", "Page", page.id, {"blocks": len(blocks)})
+            db.session.commit()
+            flash("Page created.", "success")
+            return redirect(url_for("pages.page_detail", page_id=page.id))
+
+    return render_template("pages/page_form.html", page=None)
+
+
+@pages_bp.route("/<int:page_id>")
+@login_required
+def page_detail(page_id):
+    page = Page.query.get_or_404(page_id)
+    # page_text falls back to the legacy body for pages not yet moved into blocks.
+    content_html = rendered_page_html(page.id, page_text(page))
+    links_before = request.args.get("links_before", type=int)
+    linked_tasks, next_links_before = _linked_tasks(page.id, before=links_before)
+    linked_count = db.session.execute(
+        select(func.count()).select_from(TaskPageLink).where(TaskPageLink.page_id == page.id)
+    ).scalar()
+    return render_template(
+        "pages/page_detail.html",
+        page=page,
+        content_html=content_html,
+        linked_tasks=linked_tasks,
+        linked_count=linked_count,
+        links_before=links_before,
+        next_links_before=next_links_before,
+        can_edit=_can_edit(page),
+    )
+
+
+def _claim_version(page, expected) -> bool:
+    """Bump ``page.version`` from ``expected`` as the save's first write.
+
+    The conditional UPDATE takes SQLite's write lock, so of two saves holding
+    the same version exactly one wins; the other rolls back untouched.
+    """
+    claimed = db.session.execute(
+        update(Page)
+        .where(Page.id == page.id, Page.version == expected)
+        .values(version=Page.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return False
+    set_committed_value(page, "version", expected + 1)
+    return True
+
+
+@pages_bp.route("/<int:page_id>/edit", methods=["GET", "POST"])
+@login_required
+def page_edit(page_id):
+    page = Page.query.get_or_404(page_id)
+    _ensure_can_edit(page)
+
+    if request.method == "POST":
+        title = request.form.get("title", "").strip()
+        if not title:
+            flash("Page title is required.", "error")
+        elif not _claim_version(page, request.form.get("version", type=int)):
+            flash("This page was changed by someone else. Reload and apply your edits again.", "error")
+        else:
+            submitted = {
+                int(key.removeprefix("block-")): value
+                for key, value in request.form.items()
+                if key.startswith("block-") and key.removeprefix("block-").isdigit()
+            }
+            blocks = load_blocks(page.id)
+            previous_text, previous_title = page_text(page, blocks), page.title
+            ops = diff_submitted_blocks(blocks, submitted, request.form.get("new_content", ""))
+            summary = apply_block_ops(page, ops)
+            refresh_page_preview(page)
+            page.title = title
+            record_revision(page, previous_text, page_text(page), current_user.id, previous_title)
+            _log_action("page_updated", "Page", page.id, _change_metadata(summary))
+            db.session.commit()
+            flash("Page updated.", "success")
+            return redirect(url_for("pages.page_detail", page_id=page.id))
+
+    return render_template("pages/page_edit.html", page=page, blocks=load_blocks(page.id))
+
+
+@pages_bp.route("/<int:page_id>/blocks", methods=["POST"])
+@login_required
+def page_save_blocks(page_id):
+    page = Page.query.get_or_404(page_id)
+    _ensure_can_edit(page)
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object."}), 400
+    title = payload.get("title")
+    if title is not None and (not isinstance(title, str) or not title.strip()):
+        return jsonify({"error": "Page title is required."}), 400
+    version = payload.get("version")
+    if not isinstance(version, int) or not _claim_version(page, version):
+        return jsonify({"error": "Page was changed by someone else.", "version": page.version}), 409
+
+    previous_text, previous_title = page_text(page), page.title
+    try:
+        summary = apply_block_ops(page, payload.get("ops", []))
+    except BlockOpError as exc:
+        db.session.rollback()
+        return jsonify({"error": str(exc)}), 400
+
+    refresh_page_preview(page)
+    if title is not None:
+        page.title = title.strip()
+    record_revision(page, previous_text, page_text(page), current_user.id, previous_title)
+    _log_action("page_updated", "Page", page.id, _change_metadata(summary))
+    db.session.commit()
+    return jsonify({"version": page.version, "inserted": summary["inserted"]})
+
+
+@pages_bp.route("/<int:page_id>/delete", methods=["POST"])
+@login_required
+def page_delete(page_id):
+    page = Page.query.get_or_404(page_id)
+    _ensure_can_edit(page)
+
+    PageBlock.query.filter_by(page_id=page.id).delete()
+    PageRevision.query.filter_by(page_id=page.id).delete()
+    PageRender.query.filter_by(page_id=page.id).delete()
+    TaskPageLink.query.filter_by(page_id=page.id).delete()
+    db.session.delete(page)
+    _log_action("page_deleted", "Page", page_id)
+    db.session.commit()
+    flash("Page deleted.", "success")
+    return redirect(url_for("pages.pages_list"))
+
+
+@pages_bp.route("/<int:page_id>/revisions")
+@login_required
+def page_revisions(page_id):
+    page = Page.query.get_or_404(page_id)
+    revisions, next_before = list_revisions(page.id, before=request.args.get("before", type=int))
+    user_ids = {row.created_by_user_id for row in revisions if row.created_by_user_id}
+    usernames = dict(
+        db.session.query(User.id, User.username).filter(User.id.in_(user_ids)).all() if user_ids else []
+    )
+    return render_template(
+        "pages/page_revisions.html",
+        page=page,
+        revisions=revisions,
+        next_before=next_before,
+        usernames=usernames,
+        can_edit=_can_edit(page),
+    )
+
+
+@pages_bp.route("/<int:page_id>/revisions/<int:revision>")
+@login_required
+def page_revision_detail(page_id, revision):
+    page = Page.query.get_or_404(page_id)
+    entry = PageRevision.query.filter_by(page_id=page.id, revision=revision).first_or_404()
+    return render_template(
+        "pages/page_revision.html",
+        page=page,
+        entry=entry,
+        blocks=split_text(revision_text(page.id, revision)),
+        can_edit=_can_edit(page),
+    )
+
+
+@pages_bp.route("/<int:page_id>/revisions/<int:revision>/restore", methods=["POST"])
+@login_required
+def page_revision_restore(page_id, revision):
+    page = Page.query.get_or_404(page_id)
+    _ensure_can_edit(page)
+    entry = PageRevision.query.filter_by(page_id=page.id, revision=revision).first_or_404()
+    if not _claim_version(page, page.version):
+        flash("This page was changed by someone else. Reload and try again.", "error")
+        return redirect(url_for("pages.page_revisions", page_id=page_id))
+
+    restored_text = revision_text(page.id, revision)
+    previous_text, previous_title = page_text(page), page.title
+    PageBlock.query.filter_by(page_id=page.id).delete()
+    create_blocks(page, restored_text)
+    db.session.flush()
+    refresh_page_preview(page)
+    page.title = entry.title
+    record_revision(page, previous_text, page_text(page), current_user.id, previous_title)
+    _log_action("page_restored", "Page", page.id, {"revision": revision})
+    db.session.commit()
+    flash(f"Restored revision {revision}.", "success")
+    return redirect(url_for("pages.page_detail", page_id=page.id))
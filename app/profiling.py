@@ -0,0 +1,218 @@
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request
+from flask_login import current_user
+
+PROFILE_DIR_NAME = "profiles"
+PROFILE_WINDOW_NAME = "window.json"
+PROFILE_QUERY_ARG = "_profile"
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+$")
+# Never profile the pages that read profiles, or static files.
+UNPROFILED_ENDPOINT_PREFIXES = ("admin.profile", "static")
+
+_sequence = itertools.count(1)
+
+
+class ProfileWindow:
+    """Time-boxed profiling window shared by every worker through one file.
+
+    Requests pay one ``stat()`` to check it; the file is only read after it changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._key = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def current(self) -> dict | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if key != self._key:
+                try:
+                    with open(self.path, encoding="utf-8") as handle:
+                        self._data = json.load(handle)
+                except (FileNotFoundError, ValueError):
+                    self._data = None
+                self._key = key
+            data = self._data
+        if not data or data.get("until", 0) <= time.time():
+            return None
+        return data
+
+    def open(self, minutes: float, path_prefix: str, opened_by: str) -> dict:
+        data = {
+            "until": time.time() + minutes * 60,
+            "path_prefix": path_prefix or "/",
+            "opened_by": opened_by,
+        }
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+        os.replace(temp_path, self.path)
+        return data
+
+    def close(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _wants_profile(window: ProfileWindow) -> bool:
+    if request.args.get(PROFILE_QUERY_ARG) != "1":
+        active = window.current()
+        if active is None or not request.path.startswith(active["path_prefix"]):
+            return False
+    if (request.endpoint or "").startswith(UNPROFILED_ENDPOINT_PREFIXES):
+        return False
+    return current_user.is_authenticated and current_user.role == "Admin"
+
+
+def _prune(directory: str, keep: int) -> None:
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".prof"))
+    for name in names[: max(len(names) - keep, 0)]:
+        for suffix in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(directory, name[: -len(".prof")] + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def init_profiling(app) -> None:
+    """Profile Admin requests that ask for it with ``?_profile=1`` or fall in
+    an open window, saving ``<name>.prof`` plus a JSON summary line."""
+    directory = app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, PROFILE_DIR_NAME)
+    os.makedirs(directory, exist_ok=True)
+    app.extensions["profile_dir"] = directory
+    window = ProfileWindow(os.path.join(directory, PROFILE_WINDOW_NAME))
+    app.extensions["profile_window"] = window
+    keep = app.config.get("PROFILE_KEEP", 200)
+
+    @app.before_request
+    def start_profile():
+        if not _wants_profile(window):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler already runs on this thread.
+            return
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{os.getpid()}-{next(_sequence)}-{request.endpoint or 'unmatched'}"
+        g.profile = {"profiler": profiler, "name": name, "started": time.perf_counter(), "handed_off": False}
+
+    @app.after_request
+    def attach_profile(response):
+        profile = g.get("profile")
+        if profile is None:
+            return response
+        profile["handed_off"] = True
+        metadata = {
+            "name": profile["name"],
+            "at": datetime.utcnow().isoformat(timespec="seconds"),
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "user": current_user.username,
+            "streamed": response.is_streamed,
+        }
+        profiler, started = profile["profiler"], profile["started"]
+        response.headers["X-Profile"] = profile["name"]
+
+        def save_profile():
+            # After the body is sent, so streamed rows are part of the profile.
+            profiler.disable()
+            metadata["ms"] = round((time.perf_counter() - started) * 1000, 2)
+            base = os.path.join(directory, metadata["name"])
+            profiler.dump_stats(base + ".prof")
+            with open(base + ".json", "w", encoding="utf-8") as handle:
+                json.dump(metadata, handle)
+            _prune(directory, keep)
+
+        response.call_on_close(save_profile)
+        return response
+
+    @app.teardown_request
+    def stop_abandoned_profile(_exc):
+        profile = g.get("profile")
+        if profile is not None and not profile["handed_off"]:
+            profile["profiler"].disable()
+
+
+def list_profiles(directory: str, limit: int = 100) -> list[dict]:
+    names = sorted(
+        (name for name in os.listdir(directory) if name.endswith(".json") and name != PROFILE_WINDOW_NAME),
+        reverse=True,
+    )
+    profiles = []
+    for name in names[:limit]:
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as handle:
+                profiles.append(json.load(handle))
+        except (FileNotFoundError, ValueError):
+            continue
+    return profiles
+
+
+def profile_path(directory: str, name: str) -> str | None:
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = os.path.join(directory, name + ".prof")
+    return path if os.path.exists(path) else None
+
+
+def profile_metadata(directory: str, name: str) -> dict:
+    try:
+        with open(os.path.join(directory, name + ".json"), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _short_location(filename: str, line: int) -> str:
+    if filename.startswith("~") or filename.startswith("<"):
+        return filename
+    parts = filename.replace(os.sep, "/").split("/")
+    for marker in ("site-packages", "app"):
+        if marker in parts:
+            index = len(parts) - 1 - parts[::-1].index(marker)
+            parts = parts[index + 1 :] if marker == "site-packages" else parts[index:]
+            break
+    else:
+        parts = parts[-2:]
+    return f"{'/'.join(parts)}:{line}"
+
+
+def profile_summary(path: str, sort: str = "cumulative", limit: int = 30) -> dict:
+    """Top ``limit`` functions of a saved profile, like ``pstats.print_stats``."""
+    stats = pstats.Stats(path)
+    stats.sort_stats(sort if sort in PROFILE_SORT_KEYS else "cumulative")
+    rows = []
+    for function in stats.fcn_list[:limit]:
+        primitive_calls, calls, own_seconds, total_seconds, _callers = stats.stats[function]
+        filename, line, name = function
+        rows.append(
+            {
+                "calls": calls if calls == primitive_calls else f"{calls}/{primitive_calls}",
+                "tottime_ms": own_seconds * 1000,
+                "cumtime_ms": total_seconds * 1000,
+                "function": name,
+                "location": _short_location(filename, line),
+            }
+        )
+    return {"total_calls": stats.total_calls, "total_ms": stats.total_tt * 1000, "rows": rows}
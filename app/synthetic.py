@@ -0,0 +1,339 @@
+"""Synthetic workspace data for benchmarks and load tests."""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.databases.dedupe import index_names
+from app.databases.rollups import verify_rollups
+from app.extensions import db
+from app.models import (
+    AuditLog,
+    Company,
+    Page,
+    PageBlock,
+    PageRevision,
+    Project,
+    SavedView,
+    Task,
+    TaskPageLink,
+    User,
+)
+from app.pages.blocks import BLOCK_SEPARATOR, POSITION_GAP, preview_text
+
+DEFAULT_COUNTS = {
+    "companies": 50,
+    "projects": 400,
+    "tasks": 5000,
+    "pages": 500,
+    "links": 3000,
+    "saved_views": 40,
+    "audit_rows": 10000,
+}
+INSERT_CHUNK_SIZE = 1000
+HISTORY_DAYS = 730
+
+# Weights follow what a working workspace looks like: most tasks are done or
+# queued, few are blocked, archived rows pile up slowly.
+COMPANY_STATUS_WEIGHTS = {"active": 85, "inactive": 15}
+PROJECT_STATUS_WEIGHTS = {"idea": 15, "active": 45, "blocked": 8, "done": 22, "archived": 10}
+TASK_STATUS_WEIGHTS = {"backlog": 30, "next": 15, "doing": 12, "blocked": 5, "done": 30, "archived": 8}
+AUDIT_ACTIONS = {
+    ("task_updated", "Task"): 40,
+    ("task_created", "Task"): 20,
+    ("page_updated", "Page"): 15,
+    ("task_page_linked", "Task"): 8,
+    ("project_updated", "Project"): 6,
+    ("project_created", "Project"): 4,
+    ("page_created", "Page"): 3,
+    ("company_updated", "Company"): 2,
+    ("task_deleted", "Task"): 2,
+}
+
+_COMPANY_WORDS = (
+    "Acme", "Northwind", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Soylent",
+    "Cyberdyne", "Tyrell", "Wonka", "Gringotts", "Pied", "Piper", "Aperture", "Black", "Mesa", "Oscorp",
+)
+_COMPANY_SUFFIXES = ("Ltd", "Inc", "GmbH", "Group", "Labs", "Partners", "Holdings", "Co")
+_PROJECT_WORDS = (
+    "Migration", "Rollout", "Audit", "Redesign", "Onboarding", "Integration", "Upgrade", "Review",
+    "Launch", "Cleanup", "Pilot", "Renewal", "Inventory", "Training", "Survey",
+)
+_SUBJECTS = (
+    "invoice", "contract", "server", "backup", "report", "budget", "laptop", "firewall", "license",
+    "schedule", "vendor", "meeting", "printer", "network", "payroll", "website", "database", "badge",
+)
+_VERBS = ("Update", "Review", "Fix", "Order", "Draft", "Call about", "Renew", "Check", "Replace", "Plan", "Send")
+_WORDS = (
+    "the", "a", "team", "week", "plan", "notes", "agreed", "next", "steps", "owner", "cost", "risk",
+    "timeline", "customer", "deadline", "follow", "up", "with", "on", "for", "before", "after", "review",
+    "budget", "approved", "pending", "question", "decision", "vendor", "quote", "site", "visit",
+)
+
+
+def scaled_counts(scale: float = 1.0, **overrides) -> dict:
+    counts = {name: max(0, int(round(value * scale))) for name, value in DEFAULT_COUNTS.items()}
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+
+def _weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _skewed_weights(rng: random.Random, count: int) -> list[float]:
+    # Pareto weights: a few parents own most children, as in real workspaces.
+    return [rng.paretovariate(1.2) for _ in range(count)]
+
+
+def _timestamp(rng: random.Random, now: datetime, after: datetime | None = None) -> datetime:
+    # Triangular with mode at "now": recent rows outnumber old ones.
+    start = after or now - timedelta(days=HISTORY_DAYS)
+    span = max((now - start).total_seconds(), 1.0)
+    return start + timedelta(seconds=rng.triangular(0, span, span))
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def _page_text(rng: random.Random, title: str) -> str:
+    # Page length is log-normal: mostly short notes, a long tail of big documents.
+    paragraphs = max(1, min(60, int(rng.lognormvariate(1.5, 0.8))))
+    blocks = [f"# {title}"]
+    for _ in range(paragraphs):
+        kind = rng.random()
+        if kind < 0.15:
+            blocks.append("\n".join(f"- {_sentence(rng, 3, 8)}" for _ in range(rng.randint(2, 6))))
+        elif kind < 0.22:
+            blocks.append(f"## {_sentence(rng, 2, 4).rstrip('.')}")
+        else:
+            blocks.append(" ".join(_sentence(rng, 6, 18) for _ in range(rng.randint(1, 5))))
+    return BLOCK_SEPARATOR.join(blocks)
+
+
+def _insert(model, rows: list[dict], chunk_size: int) -> None:
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(model), rows[start : start + chunk_size])
+
+
+def _next_id(model) -> int:
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def generate_workspace(
+    counts: dict | None = None,
+    seed: int = 0,
+    now: datetime | None = None,
+    chunk_size: int = INSERT_CHUNK_SIZE,
+) -> dict:
+    """Append synthetic companies, projects, tasks, pages, links, saved views
+    and audit rows, owned by the existing active users. Returns the counts
+    inserted. The same ``seed`` and counts produce the same data."""
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+
+    user_ids = list(db.session.execute(select(User.id).where(User.is_active.is_(True)).order_by(User.id)).scalars())
+    if not user_ids:
+        raise ValueError("At least one active user is required to own the generated rows.")
+
+    company_start = _next_id(Company)
+    companies = []
+    for offset in range(counts["companies"]):
+        created = _timestamp(rng, now)
+        companies.append(
+            {
+                "id": company_start + offset,
+                "name": f"{rng.choice(_COMPANY_WORDS)} {rng.choice(_COMPANY_WORDS)} {rng.choice(_COMPANY_SUFFIXES)}",
+                "status": _weighted(rng, COMPANY_STATUS_WEIGHTS),
+                "created_by_user_id": rng.choice(user_ids),
+                "created_at": created,
+                "updated_at": _timestamp(rng, now, created),
+            }
+        )
+    _insert(Company, companies, chunk_size)
+
+    project_start = _next_id(Project)
+    company_weights = _skewed_weights(rng, len(companies))
+    projects = []
+    for offset in range(counts["projects"]):
+        company = rng.choices(companies, weights=company_weights)[0] if companies and rng.random() > 0.1 else None
+        created = _timestamp(rng, now, company["created_at"] if company else None)
+        projects.append(
+            {
+                "id": project_start + offset,
+                "name": f"{rng.choice(_SUBJECTS).capitalize()} {rng.choice(_PROJECT_WORDS)} {offset + 1}",
+                "status": _weighted(rng, PROJECT_STATUS_WEIGHTS),
+                "company_id": company["id"] if company else None,
+                "created_by_user_id": rng.choice(user_ids),
+                "created_at": created,
+                "updated_at": _timestamp(rng, now, created),
+            }
+        )
+    _insert(Project, projects, chunk_size)
+    index_names("company", [(row["id"], row["name"]) for row in companies])
+    index_names("project", [(row["id"], row["name"]) for row in projects])
+
+    task_start = _next_id(Task)
+    project_weights = _skewed_weights(rng, len(projects))
+    today = now.date()
+    tasks = []
+    for offset in range(counts["tasks"]):
+        project = rng.choices(projects, weights=project_weights)[0] if projects and rng.random() > 0.05 else None
+        created = _timestamp(rng, now, project["created_at"] if project else None)
+        due_date = None
+        if rng.random() < 0.6:
+            due_date = today + timedelta(days=int(rng.triangular(-60, 120, 7)))
+        tasks.append(
+            {
+                "id": task_start + offset,
+                "title": f"{rng.choice(_VERBS)} {rng.choice(_SUBJECTS)} {rng.choice(_WORDS)}",
+                "status": _weighted(rng, TASK_STATUS_WEIGHTS),
+                "due_date": due_date,
+                "project_id": project["id"] if project else None,
+                "created_by_user_id": rng.choice(user_ids),
+                "created_at": created,
+                "updated_at": _timestamp(rng, now, created),
+            }
+        )
+    _insert(Task, tasks, chunk_size)
+    # Bulk inserts bypass the write paths; count the new rows into their parents.
+    verify_rollups(repair=True)
+
+    page_start = _next_id(Page)
+    pages, blocks, revisions = [], [], []
+    for offset in range(counts["pages"]):
+        page_id = page_start + offset
+        kind = rng.choice(("notes", "runbook", "plan", "minutes", "checklist"))
+        title = f"{rng.choice(_SUBJECTS).capitalize()} {kind} {offset + 1}"
+        text = _page_text(rng, title)
+        parts = text.split(BLOCK_SEPARATOR)
+        created = _timestamp(rng, now)
+        owner = rng.choice(user_ids)
+        pages.append(
+            {
+                "id": page_id,
+                "title": title,
+                "preview": preview_text(parts[0]),
+                "version": 1,
+                "created_by_user_id": owner,
+                "created_at": created,
+                "updated_at": _timestamp(rng, now, created),
+            }
+        )
+        blocks.extend(
+            {
+                "page_id": page_id,
+                "position": (index + 1) * POSITION_GAP,
+                "content": content,
+                "created_at": created,
+                "updated_at": created,
+            }
+            for index, content in enumerate(parts)
+        )
+        revisions.append(
+            {
+                "page_id": page_id,
+                "revision": 1,
+                "is_snapshot": True,
+                "content": text,
+                "title": title,
+                "created_by_user_id": owner,
+                "created_at": created,
+            }
+        )
+    _insert(Page, pages, chunk_size)
+    _insert(PageBlock, blocks, chunk_size)
+    _insert(PageRevision, revisions, chunk_size)
+
+    links = set()
+    if tasks and pages:
+        # Popular pages (runbooks, specs) collect most links.
+        page_weights = _skewed_weights(rng, len(pages))
+        target = min(counts["links"], len(tasks) * len(pages))
+        while len(links) < target:
+            links.add((rng.choice(tasks)["id"], rng.choices(pages, weights=page_weights)[0]["id"]))
+    _insert(
+        TaskPageLink,
+        [{"task_id": task_id, "page_id": page_id, "created_at": _timestamp(rng, now)} for task_id, page_id in sorted(links)],
+        chunk_size,
+    )
+
+    statuses = {
+        "tasks": list(TASK_STATUS_WEIGHTS),
+        "projects": list(PROJECT_STATUS_WEIGHTS),
+        "companies": list(COMPANY_STATUS_WEIGHTS),
+    }
+    existing_names = set(db.session.execute(select(SavedView.user_id, SavedView.database_key, SavedView.name)).all())
+    has_default = set(
+        db.session.execute(
+            select(SavedView.user_id, SavedView.database_key).where(SavedView.is_default.is_(True))
+        ).all()
+    )
+    views = []
+    for offset in range(counts["saved_views"]):
+        user_id = rng.choice(user_ids)
+        database_key = _weighted(rng, {"tasks": 70, "projects": 20, "companies": 10})
+        name = f"View {offset + 1}"
+        if (user_id, database_key, name) in existing_names:
+            continue
+        query_json = {
+            "q": rng.choice(_SUBJECTS) if rng.random() < 0.3 else "",
+            "status": rng.choice(statuses[database_key]) if rng.random() < 0.6 else "",
+            "sort": rng.choice(("updated_at", "title" if database_key == "tasks" else "name", "status")),
+            "dir": rng.choice(("asc", "desc")),
+            "include_archived": "1" if rng.random() < 0.1 else "0",
+        }
+        is_default = (user_id, database_key) not in has_default and rng.random() < 0.3
+        if is_default:
+            has_default.add((user_id, database_key))
+        views.append(
+            {
+                "user_id": user_id,
+                "database_key": database_key,
+                "name": name,
+                "query_json": query_json,
+                "is_default": is_default,
+                "created_at": _timestamp(rng, now),
+                "updated_at": now,
+            }
+        )
+    _insert(SavedView, views, chunk_size)
+
+    entity_ids = {
+        "Task": [row["id"] for row in tasks],
+        "Page": [row["id"] for row in pages],
+        "Project": [row["id"] for row in projects],
+        "Company": [row["id"] for row in companies],
+    }
+    audit_rows = []
+    for _ in range(counts["audit_rows"]):
+        action, entity_type = _weighted(rng, AUDIT_ACTIONS)
+        candidates = entity_ids[entity_type]
+        audit_rows.append(
+            {
+                "actor_user_id": rng.choice(user_ids),
+                "action": action,
+                "entity_type": entity_type,
+                "entity_id": str(rng.choice(candidates)) if candidates else None,
+                "metadata_json": {"synthetic": True},
+                "ip_address": f"192.168.{rng.randint(0, 3)}.{rng.randint(2, 254)}",
+                "created_at": _timestamp(rng, now),
+            }
+        )
+    audit_rows.sort(key=lambda row: row["created_at"])
+    _insert(AuditLog, audit_rows, chunk_size)
+
+    db.session.commit()
+    return {
+        "companies": len(companies),
+        "projects": len(projects),
+        "tasks": len(tasks),
+        "pages": len(pages),
+        "links": len(links),
+        "saved_views": len(views),
+        "audit_rows": len(audit_rows),
+    }
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+
+from flask import before_render_template, g, template_rendered
+from jinja2 import FileSystemBytecodeCache
+
+TEMPLATE_BYTECODE_DIR_NAME = "jinja_cache"
+
+_render_timings = {}
+_render_timings_lock = threading.Lock()
+
+
+def init_templating(app) -> None:
+    """Configure the Jinja bytecode cache and per-template render timing.
+
+    Must run before anything touches ``app.jinja_env``.
+    """
+    if app.config.get("TEMPLATE_BYTECODE_CACHE", True):
+        cache_dir = app.config.get("TEMPLATE_BYTECODE_CACHE_DIR") or os.path.join(
+            app.instance_path, TEMPLATE_BYTECODE_DIR_NAME
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(cache_dir)}
+
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
+
+
+def _render_started(sender, template, context, **extra):
+    g.setdefault("template_render_starts", []).append(time.perf_counter())
+
+
+def _render_finished(sender, template, context, **extra):
+    starts = g.get("template_render_starts")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    record_template_timing(template.name or "<string>", elapsed)
+    if "template_render_seconds" in g:
+        g.template_render_seconds += elapsed
+
+
+def record_template_timing(name: str, seconds: float) -> None:
+    with _render_timings_lock:
+        entry = _render_timings.setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        entry["count"] += 1
+        entry["total_seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+
+def template_timing_snapshot() -> dict:
+    with _render_timings_lock:
+        return {name: dict(entry) for name, entry in _render_timings.items()}
+
+
+def precompile_templates(app) -> tuple[int, list[tuple[str, str]]]:
+    """Compile every template the app can load.
+
+    Fills the environment's template cache (shared copy-on-write with
+    preloaded gunicorn workers) and the bytecode cache. Returns the number
+    compiled and ``(name, error)`` pairs for templates that failed.
+    """
+    compiled = 0
+    failures = []
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as exc:
+            failures.append((name, f"{type(exc).__name__}: {exc}"))
+        else:
+            compiled += 1
+    return compiled, failures
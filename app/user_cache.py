@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import User
+
+DEFAULT_USER_CACHE_TTL = 60
+USER_CACHE_VERSION_NAME = "user_cache.version"
+
+
+class CachedUser:
+    """Detached copy of the User columns that request handling reads.
+
+    It carries no session state, so it can be shared across requests and
+    threads; code that needs to write to a user must load the ORM row.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, username, role, is_active):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.is_active = is_active
+
+    def get_id(self) -> str:
+        return str(self.id)
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(user.id, user.username, user.role, user.is_active)
+
+
+class UserCache:
+    def __init__(self, ttl: float, version_path: Path):
+        self.ttl = ttl
+        self.version_path = Path(version_path)
+        self._entries = {}
+        self._version = self._read_version()
+        self._lock = threading.Lock()
+
+    def _read_version(self):
+        # A bump replaces the file, so (inode, mtime) changes on every write and
+        # a stat() is all each request pays to notice another worker's edit.
+        try:
+            stat = os.stat(self.version_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def get(self, user_id: int):
+        version = self._read_version()
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        user = db.session.get(User, user_id)
+        cached = CachedUser.from_user(user) if user else None
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, cached)
+        return cached
+
+    def invalidate(self) -> None:
+        self.version_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.version_path.with_name(f".{self.version_path.name}.{os.getpid()}.{threading.get_ident()}")
+        temp_path.write_text(f"{time.time_ns()}\n", encoding="utf-8")
+        os.replace(temp_path, self.version_path)
+        with self._lock:
+            self._entries.clear()
+            self._version = self._read_version()
+
+
+def init_user_cache(app) -> None:
+    version_path = app.config.get("USER_CACHE_VERSION_FILE") or os.path.join(
+        app.instance_path, USER_CACHE_VERSION_NAME
+    )
+    ttl = app.config.get("USER_CACHE_TTL", DEFAULT_USER_CACHE_TTL)
+    app.extensions["user_cache"] = UserCache(ttl, version_path)
+
+
+def load_cached_user(user_id: int):
+    return current_app.extensions["user_cache"].get(user_id)
+
+
+def invalidate_user_cache() -> None:
+    current_app.extensions["user_cache"].invalidate()
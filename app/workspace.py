@@ -2,8 +2,9 @@ import os
 import sqlite3
 from pathlib import Path
 
-from flask import current_app
-from sqlalchemy import inspect
+from flask import current_app, flash, redirect, render_template, url_for
+from flask_login import current_user
+from sqlalchemy import event, inspect
 from sqlalchemy.engine import make_url
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -12,7 +13,8 @@ from app.extensions import db
 WORKSPACE_SETTING_KEY = "workspace_database_url"
 DEFAULT_WORKSPACE_NAME = "ems_home_workspace.db"
 DEFAULT_CORE_NAME = "ems_home_core.db"
-WORKSPACE_TABLES = {"page", "company", "project", "task", "task_page_links", "saved_view"}
+SQLITE_JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal")
+WORKSPACE_TABLES = {"page", "page_block", "page_revision", "company", "project", "task", "task_page_links", "saved_view"}
 
 
 def clean_url(value):
@@ -84,6 +86,52 @@ def _read_workspace_setting_from_core_sqlite(core_db_url: str) -> str | None:
     return clean_url(row[0]) if row else None
 
 
+def sqlite_engine_options(app) -> dict:
+    """Driver busy timeout from ``SQLITE_BUSY_TIMEOUT_MS``; unset keeps the 5 s default."""
+    timeout_ms = app.config.get("SQLITE_BUSY_TIMEOUT_MS")
+    if timeout_ms is None:
+        return {}
+    return {"connect_args": {"timeout": timeout_ms / 1000}}
+
+
+def init_sqlite_pragmas(app) -> None:
+    """Set ``SQLITE_JOURNAL_MODE`` on every new connection of every bind.
+
+    Each connection also records the journal mode it ended up in, so request
+    code can check it without another PRAGMA. Must run before the engines
+    open their first connection.
+    """
+    mode = (app.config.get("SQLITE_JOURNAL_MODE") or "").lower()
+    if mode and mode not in SQLITE_JOURNAL_MODES:
+        raise RuntimeError(f"SQLITE_JOURNAL_MODE must be one of: {', '.join(SQLITE_JOURNAL_MODES)}.")
+    statement = f"PRAGMA journal_mode={mode}" if mode else "PRAGMA journal_mode"
+
+    def set_journal_mode(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(statement)
+        connection_record.info["journal_mode"] = str(cursor.fetchone()[0]).lower()
+        cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", set_journal_mode)
+
+
+def reads_block_writers(connection) -> bool:
+    """Whether a read held open on ``connection`` stalls other connections' commits.
+
+    Outside WAL mode a SQLite reader keeps a shared lock that writers wait on
+    until the busy timeout.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    mode = connection.info.get("journal_mode")
+    if mode is None:
+        mode = connection.info["journal_mode"] = (connection.exec_driver_sql("PRAGMA journal_mode").scalar() or "").lower()
+    return mode != "wal"
+
+
 def resolve_workspace_url(core_db_url: str, env_workspace_url: str | None) -> str | None:
     from_setting = _read_workspace_setting_from_core_sqlite(core_db_url)
     if from_setting:
@@ -94,7 +142,10 @@ def resolve_workspace_url(core_db_url: str, env_workspace_url: str | None) -> st
 def workspace_configured(app=None) -> bool:
     app = app or current_app
     binds = app.config.get("SQLALCHEMY_BINDS") or {}
-    return bool(clean_url(binds.get("workspace")))
+    workspace = binds.get("workspace")
+    if isinstance(workspace, dict):
+        workspace = workspace.get("url")
+    return bool(clean_url(workspace))
 
 
 def workspace_ready() -> bool:
@@ -137,3 +188,17 @@ def validate_workspace_url(workspace_url: str) -> tuple[bool, str | None]:
             return False, f"Directory is not writable: {parent}"
 
     return True, None
+
+
+def workspace_guard_response():
+    if workspace_configured() and workspace_ready():
+        return None
+
+    if current_user.role == "Admin":
+        if not workspace_configured():
+            flash("Workspace DB not configured. Configure storage first.", "error")
+        else:
+            flash("Workspace DB is configured but not initialized. Initialize it from Admin > Storage.", "error")
+        return redirect(url_for("admin.storage"))
+
+    return render_template("databases/workspace_required.html"), 200
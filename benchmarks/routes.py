@@ -0,0 +1,250 @@
+"""Time list, search and detail routes on synthetic workspaces of several sizes.
+
+    python benchmarks/routes.py [--sizes small,medium,large] [--runs 5]
+                                [--baseline benchmarks/baseline.json] [--update-baseline]
+
+Each size gets a throwaway database filled by ``app.synthetic.generate_workspace``
+with a fixed seed. Every route is requested once to warm caches, then ``--runs``
+times through the Flask test client as an admin; the full body is read, so
+streamed lists are timed to their last row. Statements are counted on both
+binds.
+
+Results are compared with the stored baseline. A route regresses when its
+median is more than ``--tolerance`` slower (and at least 5 ms slower), or when
+it runs more SQL statements than recorded. The exit status is 1 on any
+regression. Baselines are machine specific; re-record with
+``--update-baseline`` after changing hardware or accepting a slowdown.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+SIZES = {"small": 0.2, "medium": 1.0, "large": 4.0}
+DEFAULT_SIZES = "small,medium"
+SEED = 42
+DEFAULT_TOLERANCE = 0.5
+MIN_REGRESSION_MS = 5.0
+BENCH_USER = "bench-admin"
+BENCH_PASSWORD = "bench-password"
+
+# (name, path template); ids come from _sample_ids.
+ROUTES = (
+    ("tasks_list", "/db/tasks"),
+    ("tasks_filtered", "/db/tasks?status=doing&sort=due_date&dir=asc"),
+    ("tasks_rows_fragment", "/db/tasks?fragment=rows&sort=title&dir=asc"),
+    ("tasks_search", "/db/tasks?q=invoice"),
+    ("tasks_board", "/db/tasks/board"),
+    ("tasks_calendar", "/db/tasks/calendar"),
+    ("tasks_due", "/db/tasks/due"),
+    ("projects_list", "/db/projects"),
+    ("projects_search", "/db/projects?q=migration"),
+    ("companies_list", "/db/companies"),
+    ("companies_search", "/db/companies?q=acme"),
+    ("pages_list", "/pages"),
+    ("pages_search", "/pages?q=runbook"),
+    ("task_detail", "/db/tasks/{task_id}"),
+    ("project_detail", "/db/projects/{project_id}"),
+    ("company_detail", "/db/companies/{company_id}"),
+    ("page_detail", "/pages/{page_id}"),
+    ("page_revisions", "/pages/{page_id}/revisions"),
+)
+
+
+def _configure_environment(workdir: Path) -> None:
+    # app.config reads the environment at import time.
+    os.environ.update(
+        FLASK_CONFIG="development",
+        SECRET_KEY="benchmark",
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",
+        LOGIN_THROTTLE_ENABLED="0",
+        SLOW_LOG_DIR=str(workdir / "logs"),
+        METRICS_DIR=str(workdir / "metrics"),
+        TEMPLATE_BYTECODE_CACHE_DIR=str(workdir / "jinja_cache"),
+    )
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def _sample_ids(db, models) -> dict:
+    """The busiest task, project, company and page: detail pages at their worst."""
+    from sqlalchemy import func, select
+
+    def busiest(column):
+        return db.session.execute(
+            select(column).where(column.is_not(None)).group_by(column).order_by(func.count().desc(), column).limit(1)
+        ).scalar()
+
+    return {
+        "task_id": busiest(models.TaskPageLink.task_id),
+        "page_id": busiest(models.TaskPageLink.page_id),
+        "project_id": busiest(models.Task.project_id),
+        "company_id": busiest(models.Project.company_id),
+    }
+
+
+def measure_size(size: str, runs: int, workdir: Path) -> dict:
+    from sqlalchemy import event
+
+    from app import create_app, models
+    from app.extensions import db
+    from app.synthetic import generate_workspace, scaled_counts
+
+    size_dir = workdir / size
+    size_dir.mkdir()
+    os.environ["CORE_DATABASE_URL"] = f"sqlite:///{size_dir / 'core.db'}"
+    os.environ["WORKSPACE_DATABASE_URL"] = f"sqlite:///{size_dir / 'workspace.db'}"
+    app = create_app()
+    # Production renders without template mtime checks.
+    app.debug = False
+    app.config["TEMPLATES_AUTO_RELOAD"] = False
+
+    statements = [0]
+
+    def count_statement(*_args):
+        statements[0] += 1
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "after_cursor_execute", count_statement)
+        admin = models.User(username=BENCH_USER, role="Admin", is_active=True)
+        admin.set_password(BENCH_PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+        started = time.perf_counter()
+        inserted = generate_workspace(scaled_counts(SIZES[size]), seed=SEED)
+        print(f"{size}: generated {inserted['tasks']} tasks in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        ids = _sample_ids(db, models)
+
+    client = app.test_client()
+    client.post("/login", data={"username": BENCH_USER, "password": BENCH_PASSWORD})
+
+    results = {}
+    for name, template in ROUTES:
+        path = template.format(**ids)
+        samples = []
+        for attempt in range(runs + 1):
+            statements[0] = 0
+            started = time.perf_counter()
+            response = client.get(path)
+            body = response.get_data()
+            response.close()
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            if attempt:
+                samples.append(elapsed * 1000)
+        samples.sort()
+        results[name] = {
+            "median_ms": round(statistics.median(samples), 2),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            "queries": statements[0],
+            "kb": round(len(body) / 1024, 1),
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regression messages for ``results`` against ``baseline`` (both size -> route -> stats)."""
+    regressions = []
+    for size, routes in results.items():
+        for name, current in routes.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            slower = current["median_ms"] - previous["median_ms"]
+            if current["median_ms"] > previous["median_ms"] * (1 + tolerance) and slower >= MIN_REGRESSION_MS:
+                regressions.append(
+                    f"{size}/{name}: median {previous['median_ms']:.1f} -> {current['median_ms']:.1f} ms"
+                )
+            if current["queries"] > previous["queries"]:
+                regressions.append(f"{size}/{name}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
+
+
+def _load_baseline(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _print_table(results: dict, baseline: dict) -> None:
+    sizes = list(results)
+    print(f"{'size':<7} {'route':<20} {'median ms':>10} {'p95 ms':>8} {'queries':>8} {'KB':>8} {'baseline':>9} {'change':>8}")
+    for size in sizes:
+        for name, current in results[size].items():
+            previous = baseline.get(size, {}).get(name)
+            reference = f"{previous['median_ms']:.1f}" if previous else "-"
+            change = f"{(current['median_ms'] / previous['median_ms'] - 1) * 100:+.0f}%" if previous else "-"
+            print(
+                f"{size:<7} {name:<20} {current['median_ms']:>10.1f} {current['p95_ms']:>8.1f} "
+                f"{current['queries']:>8} {current['kb']:>8.1f} {reference:>9} {change:>8}"
+            )
+    if len(sizes) > 1:
+        first, last = sizes[0], sizes[-1]
+        factor = SIZES[last] / SIZES[first]
+        print(f"\nGrowth {first} -> {last} ({factor:g}x data):")
+        for name in results[first]:
+            growth = results[last][name]["median_ms"] / max(results[first][name]["median_ms"], 0.01)
+            print(f"  {name:<20} {growth:>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed median slowdown, 0.5 = 50%%")
+    parser.add_argument("--update-baseline", action="store_true", help="Record these results as the new baseline")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+    sizes.sort(key=SIZES.get)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_environment(Path(workdir))
+        results = {size: measure_size(size, args.runs, Path(workdir)) for size in sizes}
+
+    stored = _load_baseline(args.baseline)
+    baseline = stored.get("results", {})
+    _print_table(results, baseline)
+
+    if args.update_baseline:
+        stored = {
+            "meta": {
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()}",
+                "runs": args.runs,
+                "seed": SEED,
+            },
+            "results": {**baseline, **results},
+        }
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        raise SystemExit(1)
+    if baseline:
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
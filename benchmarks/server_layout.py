@@ -0,0 +1,128 @@
+"""Compare startup time and memory of the legacy and preloaded gunicorn layouts.
+
+    python benchmarks/server_layout.py [--workers 2] [--runs 3]
+
+Each layout is started against a throwaway instance directory. Startup time is
+measured until every worker has answered ``/login``; memory is summed over the
+master and its workers (RSS double-counts pages shared after fork, PSS does not).
+Linux only, since it reads ``/proc``.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+LAYOUTS = {
+    "legacy": ["--config", "{empty_config}", "-w", "{workers}"],
+    "preload": ["--config", str(REPO_ROOT / "gunicorn.conf.py")],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> list[int]:
+    children = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            fields = (entry / "stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry.name))
+    return children
+
+
+def _memory_kb(pid: int) -> tuple[int, int]:
+    rss = pss = 0
+    try:
+        for line in (Path("/proc") / str(pid) / "smaps_rollup").read_text().splitlines():
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+
+def _wait_ready(port: int, master_pid: int, workers: int, deadline: float) -> None:
+    while time.monotonic() < deadline:
+        if len(_children(master_pid)) >= workers:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+        time.sleep(0.02)
+    raise RuntimeError("gunicorn did not become ready in time")
+
+
+def measure(layout: str, workers: int, workdir: Path) -> dict:
+    port = _free_port()
+    empty_config = workdir / "empty.conf.py"
+    empty_config.write_text("")
+    args = [arg.format(empty_config=empty_config, workers=workers) for arg in LAYOUTS[layout]]
+    env = dict(
+        os.environ,
+        FLASK_CONFIG="development",
+        SECRET_KEY="benchmark",
+        CORE_DATABASE_URL=f"sqlite:///{workdir / 'core.db'}",
+        WORKSPACE_DATABASE_URL=f"sqlite:///{workdir / 'workspace.db'}",
+        GUNICORN_WORKERS=str(workers),
+        BIND_ADDR="127.0.0.1",
+        PORT=str(port),
+    )
+    command = [sys.executable, "-m", "gunicorn", *args, "-b", f"127.0.0.1:{port}", "wsgi:app"]
+
+    started = time.monotonic()
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready(port, process.pid, workers, started + 60)
+        startup = time.monotonic() - started
+        pids = [process.pid, *_children(process.pid)]
+        rss, pss = (sum(values) for values in zip(*(_memory_kb(pid) for pid in pids)))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+    return {"startup_s": startup, "rss_mb": rss / 1024, "pss_mb": pss / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'layout':<8} {'startup (s)':>12} {'RSS (MB)':>10} {'PSS (MB)':>10}")
+    for layout in LAYOUTS:
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as workdir:
+                samples.append(measure(layout, args.workers, Path(workdir)))
+        print(
+            f"{layout:<8} "
+            f"{statistics.median(s['startup_s'] for s in samples):>12.2f} "
+            f"{statistics.median(s['rss_mb'] for s in samples):>10.1f} "
+            f"{statistics.median(s['pss_mb'] for s in samples):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Drive mixed read/write traffic at gunicorn and report SQLite lock contention.
+
+    python benchmarks/write_contention.py [--workers 1,2,4] [--threads 1,4]
+                                          [--journal-modes delete,wal] [--clients 16]
+                                          [--duration 15] [--mix edit=3,list=1] [--json results.json]
+
+One synthetic workspace is generated, then every combination of workers,
+threads and journal mode gets a fresh copy of it and its own gunicorn started
+from ``gunicorn.conf.py``. ``--clients`` processes, each logged in as its own
+Editor, loop over a weighted mix for ``--duration`` seconds:
+
+    list      GET  /db/tasks?status=doing
+    detail    GET  /db/tasks/<id>
+    edit      POST /db/tasks/<own id>/edit
+    quick_add POST /db/projects/<own id>/quick-add-task
+    view      POST /db/tasks/views/save  (one of three names, so saves upsert)
+    login     POST /logout, then POST /login
+
+Reported per configuration: throughput, p50/p99 latency (all requests and
+writes only), p99 database time of writes taken from ``Server-Timing``
+(statement time, which includes waiting for SQLite's write lock), the error
+rate, and "database is locked" errors counted by the server's ``/metrics``.
+Linux only, like server_layout.py.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+from server_layout import _free_port, _wait_ready
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SEED = 42
+DATA_SCALE = 0.2
+PASSWORD = "contention-password"
+VIEW_NAMES = ("Mine", "Due soon", "Blocked")
+STATUSES = ("backlog", "next", "doing", "blocked", "done")
+OPERATION_WEIGHTS = {"list": 30, "detail": 30, "edit": 15, "quick_add": 10, "view": 10, "login": 5}
+WRITE_OPERATIONS = {"edit", "quick_add", "view", "login"}
+SUCCESS_STATUSES = {200, 302, 303}
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """One browser session: a session cookie and no redirect following."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.cookies = {}
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def request(self, method: str, path: str, data: dict | None = None) -> tuple[int, float]:
+        """Return the status and the database milliseconds from Server-Timing."""
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if self.cookies:
+            # Sent by hand: the production session cookie is Secure and this is plain HTTP.
+            request.add_header("Cookie", "; ".join(f"{name}={value}" for name, value in self.cookies.items()))
+        try:
+            response = self.opener.open(request, timeout=60)
+        except urllib.error.HTTPError as exc:
+            response = exc
+        except OSError:
+            return 0, 0.0
+        with response:
+            response.read()
+            for header in response.headers.get_all("Set-Cookie") or []:
+                name, _, value = header.split(";", 1)[0].partition("=")
+                self.cookies[name.strip()] = value
+            return response.status, _db_milliseconds(response.headers.get("Server-Timing", ""))
+
+    def login(self, username: str) -> tuple[int, float]:
+        return self.request("POST", "/login", {"username": username, "password": PASSWORD})
+
+
+def _db_milliseconds(server_timing: str) -> float:
+    total = 0.0
+    for metric in server_timing.split(","):
+        name, *params = (part.strip() for part in metric.split(";"))
+        if not name.startswith("db-"):
+            continue
+        for param in params:
+            if param.startswith("dur="):
+                total += float(param[4:])
+    return total
+
+
+def _run_client(job: dict) -> list[tuple[str, float, int, float]]:
+    rng = random.Random(job["seed"])
+    client = Client(job["base_url"])
+    client.login(job["username"])
+    operations, weights = zip(*job["mix"].items())
+    records = []
+    deadline = time.monotonic() + job["duration"]
+    counter = itertools.count()
+    while time.monotonic() < deadline:
+        operation = rng.choices(operations, weights=weights)[0]
+        if (operation == "edit" and not job["tasks"]) or (operation == "quick_add" and not job["projects"]):
+            operation = "detail"
+        if operation == "login":
+            client.request("POST", "/logout")
+        started = time.perf_counter()
+        if operation == "list":
+            status, db_ms = client.request("GET", "/db/tasks?status=doing")
+        elif operation == "detail":
+            status, db_ms = client.request("GET", f"/db/tasks/{rng.choice(job['all_tasks'])}")
+        elif operation == "edit":
+            task_id, project_id = rng.choice(job["tasks"])
+            status, db_ms = client.request(
+                "POST",
+                f"/db/tasks/{task_id}/edit",
+                {
+                    "title": f"Edited by {job['username']} #{next(counter)}",
+                    "status": rng.choice(STATUSES),
+                    "project_id": project_id or "",
+                    "due_date": "",
+                },
+            )
+        elif operation == "quick_add":
+            status, db_ms = client.request(
+                "POST",
+                f"/db/projects/{rng.choice(job['projects'])}/quick-add-task",
+                {"title": f"Quick task {next(counter)}", "status": "backlog"},
+            )
+        elif operation == "view":
+            status, db_ms = client.request(
+                "POST",
+                "/db/tasks/views/save",
+                {"view_name": rng.choice(VIEW_NAMES), "status": rng.choice(STATUSES), "sort": "updated_at", "dir": "desc"},
+            )
+        else:
+            status, db_ms = client.login(job["username"])
+        records.append((operation, (time.perf_counter() - started) * 1000, status, db_ms))
+    return records
+
+
+def _prepare_template(workdir: Path, clients: int) -> dict:
+    """Generate the shared workspace and return each user's editable rows."""
+    os.environ.update(
+        FLASK_CONFIG="development",
+        SECRET_KEY="contention",
+        SLOW_LOG_DIR=str(workdir / "setup-logs"),
+        METRICS_DIR=str(workdir / "setup-metrics"),
+        TEMPLATE_BYTECODE_CACHE_DIR=str(workdir / "setup-jinja"),
+        CORE_DATABASE_URL=f"sqlite:///{workdir / 'template' / 'core.db'}",
+        WORKSPACE_DATABASE_URL=f"sqlite:///{workdir / 'template' / 'workspace.db'}",
+    )
+    (workdir / "template").mkdir()
+    sys.path.insert(0, str(REPO_ROOT))
+    from sqlalchemy import select
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Project, Task, User
+    from app.synthetic import generate_workspace, scaled_counts
+
+    app = create_app()
+    with app.app_context():
+        for index in range(clients):
+            user = User(username=f"load-{index + 1}", role="Editor", is_active=True)
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+        generate_workspace(scaled_counts(DATA_SCALE), seed=SEED)
+        users = dict(db.session.execute(select(User.id, User.username)).all())
+        owned = {username: {"tasks": [], "projects": []} for username in users.values()}
+        for task_id, project_id, owner in db.session.execute(select(Task.id, Task.project_id, Task.created_by_user_id)):
+            owned[users[owner]]["tasks"].append((task_id, project_id))
+        for project_id, owner in db.session.execute(select(Project.id, Project.created_by_user_id)):
+            owned[users[owner]]["projects"].append(project_id)
+        all_tasks = list(db.session.execute(select(Task.id)).scalars())
+        for engine in db.engines.values():
+            engine.dispose()
+    return {"owned": owned, "all_tasks": all_tasks}
+
+
+def _locked_errors(base_url: str) -> float:
+    try:
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=10) as response:
+            text = response.read().decode()
+    except OSError:
+        return 0.0
+    return sum(
+        float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith("ems_db_locked_errors_total")
+    )
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_configuration(template: dict, workdir: Path, workers: int, threads: int, journal_mode: str, args) -> dict:
+    run_dir = workdir / f"{journal_mode}-w{workers}-t{threads}"
+    run_dir.mkdir()
+    for name in ("core.db", "workspace.db"):
+        shutil.copy(workdir / "template" / name, run_dir / name)
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        FLASK_CONFIG="production",
+        SECRET_KEY="contention",
+        CORE_DATABASE_URL=f"sqlite:///{run_dir / 'core.db'}",
+        WORKSPACE_DATABASE_URL=f"sqlite:///{run_dir / 'workspace.db'}",
+        SQLITE_JOURNAL_MODE=journal_mode,
+        # Every client logs in repeatedly from 127.0.0.1.
+        LOGIN_THROTTLE_ENABLED="0",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_MAX_REQUESTS="0",
+        GUNICORN_MAX_REQUESTS_JITTER="0",
+        BIND_ADDR="127.0.0.1",
+        PORT=str(port),
+        METRICS_DIR=str(run_dir / "metrics"),
+        SLOW_LOG_DIR=str(run_dir / "logs"),
+        TEMPLATE_BYTECODE_CACHE_DIR=str(run_dir / "jinja"),
+    )
+    command = [sys.executable, "-m", "gunicorn", "--config", str(REPO_ROOT / "gunicorn.conf.py"), "wsgi:app"]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready(port, process.pid, workers, time.monotonic() + 60)
+        locked_before = _locked_errors(base_url)
+        jobs = [
+            {
+                "base_url": base_url,
+                "username": f"load-{index + 1}",
+                "tasks": template["owned"][f"load-{index + 1}"]["tasks"],
+                "projects": template["owned"][f"load-{index + 1}"]["projects"],
+                "all_tasks": template["all_tasks"],
+                "duration": args.duration,
+                "seed": SEED + index,
+                "mix": args.mix,
+            }
+            for index in range(args.clients)
+        ]
+        with multiprocessing.Pool(args.clients) as pool:
+            records = [record for batch in pool.map(_run_client, jobs) for record in batch]
+        locked = _locked_errors(base_url) - locked_before
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+    latencies = [latency for _op, latency, _status, _db in records]
+    writes = [record for record in records if record[0] in WRITE_OPERATIONS]
+    errors = [record for record in records if record[2] not in SUCCESS_STATUSES]
+    return {
+        "journal_mode": journal_mode,
+        "workers": workers,
+        "threads": threads,
+        "requests": len(records),
+        "throughput_rps": round(len(records) / args.duration, 1),
+        "p50_ms": round(_percentile(latencies, 0.5), 1),
+        "p99_ms": round(_percentile(latencies, 0.99), 1),
+        "write_p50_ms": round(_percentile([record[1] for record in writes], 0.5), 1),
+        "write_p99_ms": round(_percentile([record[1] for record in writes], 0.99), 1),
+        "write_db_p99_ms": round(_percentile([record[3] for record in writes], 0.99), 1),
+        "error_rate": round(len(errors) / max(len(records), 1), 4),
+        "errors_by_operation": {
+            operation: sum(1 for record in errors if record[0] == operation) for operation in OPERATION_WEIGHTS
+        },
+        "locked_errors": int(locked),
+    }
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATION_WEIGHTS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name.strip()!r}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4])
+    parser.add_argument("--threads", type=_int_list, default=[1, 4])
+    parser.add_argument("--journal-modes", default="delete,wal")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per configuration")
+    parser.add_argument(
+        "--mix", type=_mix, default=dict(OPERATION_WEIGHTS), help="Operation weights, e.g. edit=3,login=1"
+    )
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+    journal_modes = [mode.strip() for mode in args.journal_modes.split(",") if mode.strip()]
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        template = _prepare_template(workdir, args.clients)
+        print(
+            f"{'journal':<8} {'workers':>7} {'threads':>7} {'req/s':>7} {'p50 ms':>7} {'p99 ms':>8} "
+            f"{'write p50':>9} {'write p99':>9} {'db p99':>8} {'errors':>7} {'locked':>6}"
+        )
+        for journal_mode, workers, threads in itertools.product(journal_modes, args.workers, args.threads):
+            result = run_configuration(template, workdir, workers, threads, journal_mode, args)
+            results.append(result)
+            print(
+                f"{journal_mode:<8} {workers:>7} {threads:>7} {result['throughput_rps']:>7.1f} "
+                f"{result['p50_ms']:>7.1f} {result['p99_ms']:>8.1f} {result['write_p50_ms']:>9.1f} "
+                f"{result['write_p99_ms']:>9.1f} {result['write_db_p99_ms']:>8.1f} "
+                f"{result['error_rate']:>7.2%} {result['locked_errors']:>6}",
+                flush=True,
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = (os.environ.get(name) or "").strip()
+    return int(value) if value else default
+
+
+bind = f"{os.environ.get('BIND_ADDR', '0.0.0.0')}:{os.environ.get('PORT', '8000')}"
+workers = _env_int("GUNICORN_WORKERS", 2)
+
+# gthread keeps a handful of requests in flight per worker while one waits on
+# SQLite. More threads than this mostly queue on the single SQLite writer lock.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = _env_int("GUNICORN_THREADS", 4)
+
+# Import and boot the app once in the master; workers share those pages copy-on-write.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").strip() != "0"
+
+# Recycle workers periodically; jitter keeps them from restarting together.
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def post_fork(server, worker):
+    # The preloaded app opened SQLite connections in the master (create_all,
+    # workspace setting lookup). A forked worker must never reuse them, so drop
+    # the inherited pools without closing the master's file handles.
+    if not server.cfg.preload_app:
+        return
+
+    from app.extensions import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def _metrics_dir() -> str:
+    # Same default as the app: instance/metrics next to this file.
+    return os.environ.get("METRICS_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "metrics")
+
+
+def on_starting(server):
+    # Counters restart with the server; drop totals left by a previous run.
+    directory = _metrics_dir()
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(directory, name))
+
+
+def worker_exit(server, worker):
+    from app.metrics import registry
+
+    registry.flush(force=True)
+
+
+def child_exit(server, worker):
+    # Fold the finished worker into the archive so /metrics counters keep growing.
+    from app.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid, _metrics_dir())
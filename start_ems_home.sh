@@ -104,6 +104,9 @@ fi
 log "Running bootstrap check for Admin user."
 python -m app.cli bootstrap-admin
 
+log "Applying pending database migrations."
+python -m app.cli migrate
+
 CORE_DB_PATH="${CORE_DATABASE_URL:-sqlite:///instance/ems_home_core.db}"
 RUN_MODE="${EMS_RUN_MODE:-}"
 if [[ -z "${RUN_MODE}" ]]; then
@@ -118,7 +121,7 @@ log "Starting EMS Home (mode=${RUN_MODE}, core_db=${CORE_DB_PATH}, user=${CURREN
 if [[ "${RUN_MODE}" == "dev" ]]; then
   exec python run.py
 elif [[ "${RUN_MODE}" == "prod" ]]; then
-  exec gunicorn -w "${GUNICORN_WORKERS:-2}" -b "${BIND_ADDR:-0.0.0.0}:${PORT:-8000}" wsgi:app
+  exec gunicorn --config gunicorn.conf.py wsgi:app
 else
   fail "Unknown EMS_RUN_MODE: ${RUN_MODE}. Use 'dev' or 'prod'."
 fi
@@ -7,10 +7,24 @@ import pytest
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from app import create_app
+from app.config import Config
 from app.extensions import db
 from app.models import User
 
 
+@pytest.fixture(autouse=True)
+def _output_dirs(tmp_path, monkeypatch):
+    # Keep logs, metrics, profiles and caches out of the repo's instance folder.
+    for key, name in (
+        ("SLOW_LOG_DIR", "logs"),
+        ("METRICS_DIR", "metrics"),
+        ("PROFILE_DIR", "profiles"),
+        ("TEMPLATE_BYTECODE_CACHE_DIR", "jinja_cache"),
+    ):
+        monkeypatch.setattr(Config, key, str(tmp_path / name))
+    monkeypatch.setattr(Config, "USER_CACHE_VERSION_FILE", str(tmp_path / "user_cache_version"), raising=False)
+
+
 @pytest.fixture
 def app(tmp_path):
     os.environ["FLASK_CONFIG"] = "development"
@@ -44,3 +58,13 @@ def client(app):
 
 def login(client, username, password="pw"):
     return client.post("/login", data={"username": username, "password": password}, follow_redirects=True)
+
+
+def use_wal(app):
+    """Switch the test databases to WAL, under which list pages stream their rows."""
+    with app.app_context():
+        for engine in db.engines.values():
+            with engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA journal_mode=wal")
+            # Pooled connections recorded the old mode when they connected.
+            engine.dispose()
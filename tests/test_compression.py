@@ -0,0 +1,76 @@
+from sqlalchemy import event, text
+
+from app.compression import COMPRESSION_MAGIC, decode_text, encode_text
+from app.extensions import db
+from app.migrations import migrate_bind
+from app.models import Page, PageBlock
+from app.pages.blocks import load_blocks
+from tests.conftest import login
+
+NOTES = "Action item: follow up with the supplier about the bracket tolerance.\n" * 200
+
+
+def test_encode_only_compresses_large_compressible_text():
+    assert encode_text("short note") == "short note"
+    assert encode_text(None) is None
+
+    encoded = encode_text(NOTES)
+    assert isinstance(encoded, bytes) and encoded.startswith(COMPRESSION_MAGIC)
+    assert len(encoded) < len(NOTES) / 10
+    assert decode_text(encoded) == NOTES
+    assert decode_text(NOTES.encode("utf-8")) == NOTES
+
+
+def test_large_blocks_are_stored_compressed_and_read_transparently(client, app):
+    login(client, "editor")
+    response = client.post("/pages/new", data={"title": "Minutes", "content": f"Summary\n\n{NOTES}"})
+    page_id = int(response.location.rsplit("/", 1)[1])
+
+    with app.app_context():
+        with db.engines["workspace"].connect() as conn:
+            stored = conn.execute(
+                text("SELECT typeof(content), length(content) FROM page_block WHERE page_id = :id ORDER BY position"),
+                {"id": page_id},
+            ).all()
+        assert [row[0] for row in stored] == ["text", "blob"]
+        assert stored[1][1] < len(NOTES) / 10
+        assert load_blocks(page_id)[1].content == NOTES.strip("\n")
+        assert db.session.get(Page, page_id).preview == "Summary"
+
+
+def test_page_list_never_reads_content(client, app):
+    login(client, "editor")
+    client.post("/pages/new", data={"title": "Minutes", "content": NOTES})
+
+    statements = []
+    with app.app_context():
+        event.listen(
+            db.engines["workspace"],
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+    response = client.get("/pages?q=supplier")
+    assert response.status_code == 200
+    assert b"Minutes" in response.data
+    assert not any("page_block" in s or "page.body" in s for s in statements)
+
+
+def test_compress_migration_rewrites_existing_rows(app):
+    with app.app_context():
+        page = Page(title="Old")
+        db.session.add(page)
+        db.session.flush()
+        db.session.add(PageBlock(page_id=page.id, position=1024, content="placeholder"))
+        db.session.commit()
+        with db.engines["workspace"].begin() as conn:
+            conn.execute(text("UPDATE page_block SET content = :content"), {"content": NOTES})
+            conn.execute(text("UPDATE page SET preview = NULL"))
+            conn.execute(text("DELETE FROM schema_migrations WHERE migration_id = '0005_compress_page_content'"))
+
+        migrate_bind("workspace", pause=0)
+
+        with db.engines["workspace"].connect() as conn:
+            assert conn.execute(text("SELECT typeof(content) FROM page_block")).scalar() == "blob"
+            assert conn.execute(text("SELECT preview FROM page")).scalar().startswith("Action item")
+            assert conn.execute(text("SELECT count(*) FROM schema_backfills")).scalar() == 0
@@ -0,0 +1,201 @@
+from sqlalchemy import func, select, text
+
+from app.databases import dedupe
+from app.databases.dedupe import index_names, name_trigrams, normalize_name, similar_names
+from app.databases.rollups import verify_rollups
+from app.extensions import db
+from app.migrations import migrate_bind
+from app.models import AuditLog, Company, NameTrigram, NameTrigramCount, Project, Task, User
+from tests.conftest import login
+
+
+def _user_id(app, username):
+    with app.app_context():
+        return User.query.filter_by(username=username).first().id
+
+
+def _add_company(app, name, username="admin"):
+    with app.app_context():
+        company = Company(name=name, status="active", created_by_user_id=_user_id(app, username))
+        db.session.add(company)
+        db.session.flush()
+        index_names("company", [(company.id, company.name)])
+        db.session.commit()
+        return company.id
+
+
+def _counts_match_postings():
+    stored = {
+        (entity, gram): records
+        for entity, gram, records in db.session.execute(
+            select(NameTrigramCount.entity, NameTrigramCount.trigram, NameTrigramCount.records)
+        )
+        if records
+    }
+    actual = {
+        (entity, gram): records
+        for entity, gram, records in db.session.execute(
+            select(NameTrigram.entity, NameTrigram.trigram, func.count()).group_by(NameTrigram.entity, NameTrigram.trigram)
+        )
+    }
+    return stored == actual
+
+
+def test_company_names_normalize_without_legal_forms():
+    assert normalize_name("company", "ACME Corp.") == "acme"
+    assert normalize_name("company", "The Acme Corporation") == "acme"
+    assert normalize_name("company", "Inc") == "inc"
+    assert normalize_name("project", "Acme Corp.") == "acme corp"
+    assert name_trigrams("company", "Acme") == {"  a", " ac", "acm", "cme", "me "}
+
+
+def test_similar_names_find_near_duplicates(app):
+    acme = _add_company(app, "Acme Corp")
+    _add_company(app, "Globex")
+    with app.app_context():
+        for name in ("ACME Corp.", "Acme Corporation", "Acme Inc"):
+            assert [match["id"] for match in similar_names("company", name)] == [acme]
+        assert similar_names("company", "Initech") == []
+        assert similar_names("company", "Acme", exclude_id=acme) == []
+
+
+def test_common_trigrams_are_skipped_without_losing_matches(app, monkeypatch):
+    acme = _add_company(app, "Acme Anvils")
+    _add_company(app, "Acme Rockets")
+    _add_company(app, "Anvil Works")
+    monkeypatch.setattr(dedupe, "COMMON_TRIGRAM_RECORDS", 1)
+    with app.app_context():
+        assert similar_names("company", "Acme Anvil")[0]["id"] == acme
+
+
+def test_create_warns_until_confirmed(client, app):
+    acme = _add_company(app, "Acme Corp")
+    login(client, "editor")
+
+    response = client.post("/db/companies/new", data={"name": "ACME Corp.", "status": "active"})
+    html = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert "Similar companies already exist" in html
+    assert f'href="/db/companies/{acme}"' in html and 'name="allow_duplicate"' in html
+    assert 'value="ACME Corp."' in html
+
+    response = client.post(
+        "/db/companies/new", data={"name": "ACME Corp.", "status": "active", "allow_duplicate": "1"}
+    )
+    assert response.status_code == 302
+    response = client.post("/db/companies/new", data={"name": "Initech", "status": "active"})
+    assert response.status_code == 302
+    with app.app_context():
+        assert Company.query.count() == 3
+        assert len(similar_names("company", "Acme")) == 2
+
+
+def test_project_create_warns_on_near_duplicate(client, app):
+    login(client, "admin")
+    assert client.post("/db/projects/new", data={"name": "Website relaunch", "status": "idea"}).status_code == 302
+    response = client.post("/db/projects/new", data={"name": "Website re-launch", "status": "idea"})
+    assert "Similar projects already exist" in response.get_data(as_text=True)
+    with app.app_context():
+        assert Project.query.count() == 1
+
+
+def test_similar_endpoint_returns_json(client, app):
+    acme = _add_company(app, "Acme Corp")
+    login(client, "viewer")
+    data = client.get("/db/companies/similar?name=Acme%20Inc").get_json()
+    assert [match["id"] for match in data["matches"]] == [acme]
+    assert data["matches"][0]["url"] == f"/db/companies/{acme}"
+    assert client.get(f"/db/companies/similar?name=Acme&exclude={acme}").get_json() == {"matches": []}
+    assert client.get("/db/tasks/similar?name=Acme").status_code == 404
+
+
+def test_rename_and_delete_keep_index_current(client, app):
+    company_id = _add_company(app, "Acme Corp")
+    login(client, "admin")
+    client.post(f"/db/companies/{company_id}/edit", data={"name": "Globex", "status": "active"})
+    with app.app_context():
+        assert similar_names("company", "Acme") == []
+        assert [match["id"] for match in similar_names("company", "Globex Inc")] == [company_id]
+        assert _counts_match_postings()
+
+    client.post(f"/db/companies/{company_id}/delete")
+    with app.app_context():
+        assert NameTrigram.query.count() == 0
+        assert _counts_match_postings()
+
+
+def test_merge_companies_repoints_projects(client, app):
+    keep = _add_company(app, "Acme Corp")
+    duplicate = _add_company(app, "ACME Corporation")
+    login(client, "admin")
+    client.post("/db/projects/new", data={"name": "Alpha", "status": "active", "company_id": duplicate})
+    client.post("/db/projects/new", data={"name": "Beta", "status": "idea", "company_id": duplicate})
+    client.post("/db/projects/new", data={"name": "Gamma", "status": "active", "company_id": keep})
+
+    response = client.post(f"/db/companies/{duplicate}/merge", data={"into_id": keep})
+    assert response.status_code == 302 and response.headers["Location"].endswith(f"/db/companies/{keep}")
+    with app.app_context():
+        assert db.session.get(Company, duplicate) is None
+        assert Project.query.filter_by(company_id=keep).count() == 3
+        company = db.session.get(Company, keep)
+        assert (company.project_count, company.active_project_count) == (3, 2)
+        assert verify_rollups() == []
+        assert [match["id"] for match in similar_names("company", "Acme")] == [keep]
+        assert _counts_match_postings()
+        entry = AuditLog.query.filter_by(action="company_merged").one()
+        assert entry.entity_id == str(keep)
+        assert entry.metadata_json == {"merged_id": duplicate, "merged_name": "ACME Corporation", "projects": 2}
+
+
+def test_merge_projects_repoints_tasks(client, app):
+    login(client, "admin")
+    client.post("/db/projects/new", data={"name": "Website relaunch", "status": "active"})
+    client.post("/db/projects/new", data={"name": "Website re-launch", "status": "active", "allow_duplicate": "1"})
+    with app.app_context():
+        keep = Project.query.filter_by(name="Website relaunch").one().id
+        duplicate = Project.query.filter_by(name="Website re-launch").one().id
+    client.post("/db/tasks/new", data={"title": "One", "status": "doing", "project_id": duplicate})
+    client.post("/db/tasks/new", data={"title": "Two", "status": "done", "project_id": duplicate})
+    client.post("/db/tasks/new", data={"title": "Three", "status": "next", "project_id": keep})
+
+    client.post(f"/db/projects/{duplicate}/merge", data={"into_id": keep})
+    with app.app_context():
+        assert db.session.get(Project, duplicate) is None
+        assert Task.query.filter_by(project_id=keep).count() == 3
+        project = db.session.get(Project, keep)
+        assert (project.task_count, project.open_task_count, project.done_task_count) == (3, 2, 1)
+        assert verify_rollups() == []
+        assert AuditLog.query.filter_by(action="project_merged").one().metadata_json["tasks"] == 2
+
+
+def test_merge_requires_edit_rights_on_both(client, app):
+    own = _add_company(app, "Acme Corp", username="editor")
+    other = _add_company(app, "Acme Inc")
+    login(client, "editor")
+    assert "Possible duplicates" in client.get(f"/db/companies/{own}").get_data(as_text=True)
+    assert "Possible duplicates" not in client.get(f"/db/companies/{other}").get_data(as_text=True)
+    assert client.post(f"/db/companies/{own}/merge", data={"into_id": other}).status_code == 403
+    assert client.post(f"/db/companies/{own}/merge", data={"into_id": own}).status_code == 400
+    login(client, "viewer")
+    assert client.post(f"/db/companies/{other}/merge", data={"into_id": own}).status_code == 403
+    with app.app_context():
+        assert Company.query.count() == 2
+
+
+def test_backfill_migration_indexes_existing_names(app):
+    with app.app_context():
+        admin_id = User.query.filter_by(username="admin").first().id
+        db.session.add_all(
+            [
+                Company(name="Acme Corp", status="active", created_by_user_id=admin_id),
+                Project(name="Website relaunch", status="idea", created_by_user_id=admin_id),
+            ]
+        )
+        db.session.commit()
+        with db.engines["workspace"].begin() as conn:
+            conn.execute(text("DELETE FROM schema_migrations WHERE migration_id = '0014_name_trigram_backfill'"))
+
+        migrate_bind("workspace", pause=0)
+        assert len(similar_names("company", "ACME Inc.")) == 1
+        assert len(similar_names("project", "website re-launch")) == 1
+        assert _counts_match_postings()
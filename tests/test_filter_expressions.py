@@ -0,0 +1,153 @@
+import json
+from datetime import date, datetime
+from urllib.parse import quote
+
+import pytest
+
+from app.databases.filters import FilterError, canonical_filter, compile_filter
+from app.extensions import db
+from app.models import Project, SavedView, Task, User
+from tests.conftest import login
+
+
+def _seed(app):
+    with app.app_context():
+        admin = User.query.filter_by(username="admin").first()
+        editor = User.query.filter_by(username="editor").first()
+        project = Project(name="Alpha", status="active", created_by_user_id=admin.id)
+        db.session.add(project)
+        db.session.flush()
+        rows = [
+            ("Mine doing", "doing", date(2024, 3, 5), editor.id, datetime(2024, 3, 1, 12)),
+            ("Mine blocked", "blocked", date(2024, 4, 5), editor.id, datetime(2024, 3, 2, 12)),
+            ("Theirs next", "next", date(2024, 3, 20), admin.id, datetime(2024, 3, 3, 12)),
+            ("Theirs done", "done", None, admin.id, datetime(2024, 3, 4, 12)),
+        ]
+        db.session.add_all(
+            Task(
+                title=title,
+                status=status,
+                due_date=due,
+                project_id=project.id,
+                created_by_user_id=owner,
+                updated_at=updated,
+            )
+            for title, status, due, owner, updated in rows
+        )
+        db.session.commit()
+        return project.id
+
+
+def _titles(client, expression):
+    html = client.get(f"/db/tasks?filter={quote(canonical_filter(expression))}&fragment=rows").get_data(as_text=True)
+    return {title for title in ("Mine doing", "Mine blocked", "Theirs next", "Theirs done") if title in html}
+
+
+@pytest.mark.parametrize(
+    "expression, message",
+    [
+        ({"field": "owner", "op": "eq", "value": 1}, "Unknown filter field"),
+        ({"field": "status", "op": "contains", "value": "do"}, "does not apply"),
+        ({"field": "status", "op": "in", "value": ["doing", "bogus"]}, "not a valid status"),
+        ({"field": "due_date", "op": "between", "value": ["2024-01-01"]}, "needs two dates"),
+        ({"field": "created_by", "op": "eq", "value": 3}, 'compared with "me"'),
+        ({"op": "or", "args": []}, "needs a list"),
+        ({"op": "and", "args": [{"op": "or", "args": [{"op": "and", "args": [{"op": "or", "args": [{}]}]}]}]}, "nested"),
+        ([], "must be an object"),
+    ],
+)
+def test_invalid_expressions_are_rejected(expression, message):
+    with pytest.raises(FilterError, match=message):
+        compile_filter("tasks", expression)
+
+
+def test_list_applies_groups_in_lists_date_ranges_and_created_by_me(client, app):
+    _seed(app)
+    login(client, "editor")
+
+    assert _titles(client, {"field": "status", "op": "in", "value": ["doing", "next"]}) == {"Mine doing", "Theirs next"}
+    assert _titles(client, {"field": "created_by", "op": "eq", "value": "me"}) == {"Mine doing", "Mine blocked"}
+    assert _titles(client, {"field": "due_date", "op": "between", "value": ["2024-03-01", "2024-03-31"]}) == {
+        "Mine doing",
+        "Theirs next",
+    }
+    assert _titles(client, {"field": "updated_at", "op": "lte", "value": "2024-03-02"}) == {
+        "Mine doing",
+        "Mine blocked",
+    }
+    assert _titles(
+        client,
+        {
+            "op": "or",
+            "args": [
+                {"field": "due_date", "op": "is_null"},
+                {
+                    "op": "and",
+                    "args": [
+                        {"field": "created_by", "op": "eq", "value": "me"},
+                        {"field": "due_date", "op": "gt", "value": "2024-03-31"},
+                    ],
+                },
+            ],
+        },
+    ) == {"Theirs done", "Mine blocked"}
+
+    # The same compiled filter serves another user with their own id.
+    admin = app.test_client()
+    login(admin, "admin")
+    assert _titles(admin, {"field": "created_by", "op": "eq", "value": "me"}) == {"Theirs next", "Theirs done"}
+
+
+def test_compiled_filters_are_cached_by_expression(client, app):
+    _seed(app)
+    login(client, "admin")
+    expression = quote(canonical_filter({"field": "status", "op": "eq", "value": "doing"}))
+    client.get(f"/db/tasks?filter={expression}")
+    client.get(f"/db/tasks?filter={expression}&sort=title")
+    stats = app.extensions["filter_cache"].snapshot()
+    assert stats["misses"] == 1 and stats["hits"] == 1 and stats["entries"] == 1
+
+
+def test_facets_respect_the_filter(client, app):
+    _seed(app)
+    login(client, "editor")
+    html = client.get(f"/db/tasks?filter={quote(canonical_filter({'field': 'created_by', 'op': 'eq', 'value': 'me'}))}")
+    html = html.get_data(as_text=True)
+    assert ">doing (1)<" in html and ">next (0)<" in html and ">Alpha (2)<" in html
+
+
+def test_invalid_filter_is_reported_and_ignored(client, app):
+    _seed(app)
+    login(client, "viewer")
+    response = client.get("/db/tasks?filter=" + quote('{"field": "nope"}'))
+    html = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert "Filter ignored: Unknown filter field" in html and "Theirs next" in html
+    assert client.get("/db/tasks?fragment=rows&filter=not-json").status_code == 400
+
+
+def test_saved_view_stores_and_restores_filter(client, app):
+    _seed(app)
+    login(client, "editor")
+    expression = {
+        "op": "and",
+        "args": [{"field": "created_by", "op": "eq", "value": "me"}, {"field": "status", "op": "ne", "value": "done"}],
+    }
+    client.post("/db/tasks/views/save", data={"view_name": "Mine open", "filter": json.dumps(expression)})
+    rejected = client.post(
+        "/db/tasks/views/save",
+        data={"view_name": "Broken", "filter": '{"field": "status", "op": "eq", "value": "nope"}'},
+        follow_redirects=True,
+    )
+    assert b"View not saved" in rejected.data
+
+    with app.app_context():
+        view = SavedView.query.filter_by(name="Mine open").one()
+        assert view.query_json["filter"] == expression
+        assert SavedView.query.filter_by(name="Broken").first() is None
+        view_id = view.id
+
+    loaded = client.get(f"/db/tasks?view_id={view_id}&use_view=1")
+    assert loaded.status_code == 302
+    html = client.get(loaded.headers["Location"]).get_data(as_text=True)
+    assert "Mine doing" in html and "Theirs next" not in html
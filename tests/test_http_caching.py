@@ -0,0 +1,96 @@
+import gzip
+
+from app.extensions import db
+from app.middleware import _accepts_gzip
+from app.models import Company, Project, Task
+from tests.conftest import login
+
+
+def _seed(app, task_count=200):
+    with app.app_context():
+        company = Company(name="Acme", created_by_user_id=2)
+        db.session.add(company)
+        db.session.flush()
+        project = Project(name="Apollo", company_id=company.id, created_by_user_id=2)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add_all(
+            Task(title=f"Task {n}", status="doing", project_id=project.id, created_by_user_id=2)
+            for n in range(task_count)
+        )
+        db.session.commit()
+        return company.id, project.id
+
+
+def test_large_streamed_list_is_gzipped(client, app):
+    _seed(app)
+    login(client, "viewer")
+
+    plain = client.get("/db/tasks")
+    response = client.get("/db/tasks", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"] and "X-Fragment" in response.headers["Vary"]
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.data) == plain.data
+    assert len(response.data) * 5 < len(plain.data)
+    assert "Content-Encoding" not in plain.headers
+
+
+def test_explicit_gzip_entry_wins_over_wildcard():
+    def accepts(header):
+        return _accepts_gzip({"HTTP_ACCEPT_ENCODING": header})
+
+    assert accepts("*;q=0, gzip") and accepts("br, *")
+    assert not accepts("gzip;q=0, *") and not accepts("*;q=0") and not accepts("br") and not accepts("")
+
+
+def test_small_and_refused_responses_are_not_gzipped(client, app):
+    company_id, _ = _seed(app, task_count=0)
+    login(client, "viewer")
+
+    small = client.get("/login", headers={"Accept-Encoding": "gzip"})
+    assert small.status_code == 302 and "Content-Encoding" not in small.headers
+    refused = client.get(f"/db/companies/{company_id}", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in refused.headers
+
+
+def test_detail_pages_answer_304_until_children_change(client, app):
+    _, project_id = _seed(app, task_count=3)
+    login(client, "editor")
+
+    first = client.get(f"/db/projects/{project_id}")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert "no-cache" in first.headers["Cache-Control"] and "private" in first.headers["Cache-Control"]
+
+    again = client.get(f"/db/projects/{project_id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+
+    with app.app_context():
+        task = Task.query.filter_by(project_id=project_id).first()
+        task.status = "done"
+        db.session.commit()
+    changed = client.get(f"/db/projects/{project_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+    # Another user sees different controls, so the tag differs.
+    other = app.test_client()
+    login(other, "viewer")
+    assert other.get(f"/db/projects/{project_id}").headers["ETag"] != changed.headers["ETag"]
+
+
+def test_task_detail_etag_tracks_page_links(client, app):
+    _seed(app, task_count=1)
+    login(client, "editor")
+    client.post("/pages/new", data={"title": "Runbook", "content": "x"}, follow_redirects=True)
+    with app.app_context():
+        task_id = Task.query.first().id
+
+    etag = client.get(f"/db/tasks/{task_id}").headers["ETag"]
+    assert client.get(f"/db/tasks/{task_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post(f"/db/tasks/{task_id}/pages", data={"page_id": 1, "action": "link"})
+    # Linking writes no flash; the new link alone must change the tag.
+    response = client.get(f"/db/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert b"Runbook" in response.data
@@ -0,0 +1,51 @@
+import json
+import os
+
+from app.instrumentation import SLOW_QUERY_LOG_NAME, SLOW_REQUEST_LOG_NAME, normalize_sql
+from tests.conftest import login, use_wal
+
+
+def _read_log(app, name):
+    path = os.path.join(app.config["SLOW_LOG_DIR"], name)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def test_normalize_sql_strips_values():
+    statement = "SELECT *\n  FROM task WHERE title = 'secret' AND id IN (?, ?, ?) AND x > 42 LIMIT ?"
+    assert normalize_sql(statement) == "SELECT * FROM task WHERE title = ? AND id IN (?, ...) AND x > ? LIMIT ?"
+    assert normalize_sql("SELECT anon_1.id FROM t1 AS anon_1") == "SELECT anon_1.id FROM t1 AS anon_1"
+
+
+def test_server_timing_reports_queries_per_bind_and_templates(client):
+    login(client, "admin")
+    timing = client.get("/admin/users").headers["Server-Timing"]
+    assert 'db-core;dur=' in timing and "queries" in timing
+    assert "tpl;dur=" in timing and "tpl;dur=0.0," not in timing and "app;dur=" in timing
+
+    timing = client.get("/pages").headers["Server-Timing"]
+    assert 'db-workspace;dur=' in timing
+
+
+def test_slow_requests_and_queries_are_logged_without_values(client, app):
+    use_wal(app)
+    login(client, "viewer")
+    before_requests = len(_read_log(app, SLOW_REQUEST_LOG_NAME))
+    before_queries = len(_read_log(app, SLOW_QUERY_LOG_NAME))
+    app.config.update(SLOW_REQUEST_MS=0, SLOW_QUERY_MS=0)
+
+    response = client.get("/db/tasks?q=needle-value")
+    response.get_data()
+    response.close()
+
+    requests = _read_log(app, SLOW_REQUEST_LOG_NAME)[before_requests:]
+    queries = _read_log(app, SLOW_QUERY_LOG_NAME)[before_queries:]
+    assert [entry["endpoint"] for entry in requests] == ["databases.tasks_list"]
+    assert requests[0]["streamed"] is True
+    assert requests[0]["sql"]["workspace"]["count"] >= 1
+    assert {entry["bind"] for entry in queries} == {"workspace"}
+    task_queries = [entry for entry in queries if "FROM task" in entry["sql"]]
+    assert any("LIKE lower(?)" in entry["sql"] and entry["params"] >= 1 for entry in task_queries)
+    assert all("needle-value" not in json.dumps(entry) for entry in requests + queries)
@@ -0,0 +1,135 @@
+import json
+
+from sqlalchemy import event, update
+
+from app.extensions import db
+from app.models import Company, Project, Task, User
+from tests.conftest import login
+
+
+def _seed(app):
+    with app.app_context():
+        admin = User.query.filter_by(username="admin").first()
+        acme = Company(name="Acme", status="active", created_by_user_id=admin.id)
+        db.session.add(acme)
+        db.session.flush()
+        alpha = Project(name="Alpha", status="active", company_id=acme.id, created_by_user_id=admin.id)
+        beta = Project(name="Beta", status="idea", created_by_user_id=admin.id)
+        db.session.add_all([alpha, beta])
+        db.session.flush()
+        rows = [
+            ("Write spec", "doing", alpha.id),
+            ("Review spec", "doing", alpha.id),
+            ("Ship", "next", alpha.id),
+            ("Plan", "doing", beta.id),
+            ("Old", "archived", beta.id),
+            ("Loose", "backlog", None),
+        ]
+        db.session.add_all(
+            Task(title=title, status=status, project_id=project_id, created_by_user_id=admin.id)
+            for title, status, project_id in rows
+        )
+        db.session.commit()
+        return {"alpha": alpha.id, "beta": beta.id, "acme": acme.id}
+
+
+def _grouped_queries(app, client, url):
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        if "GROUP BY" in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engines["workspace"]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+        html = response.get_data(as_text=True)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return response, html, statements
+
+
+def test_task_facets_count_each_option_under_the_other_filters(client, app):
+    ids = _seed(app)
+    login(client, "viewer")
+
+    response, html, grouped = _grouped_queries(app, client, f"/db/tasks?project_id={ids['alpha']}")
+    assert len(grouped) == 1
+    # Status counts are limited to the chosen project; project counts ignore the status filter.
+    assert ">doing (2)<" in html and ">next (1)<" in html and ">backlog (0)<" in html
+    assert ">Alpha (3)<" in html and ">Beta (1)<" in html
+    assert ">Any (3)<" in html and ">Any (5)<" in html
+
+    html = client.get("/db/tasks?q=spec&status=doing").get_data(as_text=True)
+    assert ">Alpha (2)<" in html and ">Beta (0)<" in html and ">next (0)<" in html
+
+    html = client.get("/db/tasks?include_archived=1").get_data(as_text=True)
+    assert ">archived (1)<" in html
+
+
+def test_facet_rows_are_cached_until_a_write(client, app):
+    ids = _seed(app)
+    login(client, "admin")
+
+    _, _, first = _grouped_queries(app, client, "/db/tasks")
+    _, html, again = _grouped_queries(app, client, f"/db/tasks?status=doing&project_id={ids['beta']}")
+    assert len(first) == 1 and again == []
+    assert ">Beta (1)<" in html
+
+    client.post("/db/tasks/new", data={"title": "New", "status": "doing", "project_id": ids["beta"]})
+    _, html, after_write = _grouped_queries(app, client, f"/db/tasks?status=doing&project_id={ids['beta']}")
+    assert len(after_write) == 1
+    assert ">Beta (2)<" in html
+
+    stats = client.get("/admin/storage").get_data(as_text=True)
+    assert "List Facet Cache" in stats
+
+
+def test_bulk_writes_invalidate_cached_facets(client, app):
+    ids = _seed(app)
+    login(client, "viewer")
+    _grouped_queries(app, client, "/db/tasks")
+
+    with app.app_context():
+        db.session.execute(update(Task).where(Task.project_id == ids["beta"], Task.status == "doing").values(status="next"))
+        db.session.commit()
+    _, html, grouped = _grouped_queries(app, client, "/db/tasks")
+    assert len(grouped) == 1
+    assert ">doing (2)<" in html and ">next (2)<" in html
+
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engines["workspace"]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        client.get("/db/tasks")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    # The staleness check reads generation rows, never the listed tables.
+    assert any("FROM table_generation" in statement for statement in statements)
+    assert not any("max(task.updated_at)" in statement for statement in statements)
+
+
+def test_fragment_sends_facets_header(client, app):
+    ids = _seed(app)
+    login(client, "viewer")
+
+    response = client.get("/db/tasks?fragment=rows&status=doing")
+    facets = json.loads(response.headers["X-Facets"])
+    assert facets["status"]["doing"] == 3
+    assert facets["project_id"] == {str(ids["alpha"]): 2, str(ids["beta"]): 1}
+    assert "X-Facets" not in client.get("/db/tasks").headers
+
+
+def test_project_facets(client, app):
+    ids = _seed(app)
+    login(client, "viewer")
+    html = client.get(f"/db/projects?company_id={ids['acme']}").get_data(as_text=True)
+    assert ">active (1)<" in html and ">idea (0)<" in html
+    assert ">Acme (1)<" in html and ">Any (2)<" in html
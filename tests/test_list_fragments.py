@@ -0,0 +1,62 @@
+from app.extensions import db
+from app.models import Company, Project, Task
+from tests.conftest import login
+
+
+def _seed(app):
+    with app.app_context():
+        company = Company(name="Acme", created_by_user_id=1)
+        db.session.add(company)
+        db.session.flush()
+        projects = [Project(name=f"Project {n}", company_id=company.id, created_by_user_id=1) for n in range(30)]
+        db.session.add_all(projects)
+        db.session.flush()
+        db.session.add_all(
+            Task(title=f"Task {n}", status="done" if n % 2 else "doing", project_id=projects[0].id, created_by_user_id=1)
+            for n in range(10)
+        )
+        db.session.commit()
+
+
+def test_fragment_param_returns_only_the_table(client, app):
+    _seed(app)
+    login(client, "viewer")
+
+    full = client.get("/db/tasks?status=doing")
+    fragment = client.get("/db/tasks?status=doing&fragment=rows")
+    body = fragment.get_data(as_text=True)
+
+    assert fragment.status_code == 200
+    assert body.lstrip().startswith("<table>")
+    assert "Saved Views" not in body and "<html" not in body and "Project 29" not in body
+    assert "Task 0" in body and "Task 1<" not in body
+    assert "X-Fragment" in fragment.headers["Vary"]
+    assert len(fragment.data) * 4 < len(full.data)
+    html = full.get_data(as_text=True)
+    assert 'id="list-table"' in html
+    assert "<script" not in html[html.index("<title>") : html.index("</title>")]
+    assert html.count('getElementById("list-table")') == 1
+
+
+def test_fragment_header_and_sort_links(client, app):
+    _seed(app)
+    login(client, "viewer")
+
+    body = client.get("/db/tasks?sort=title&dir=asc", headers={"X-Fragment": "rows"}).get_data(as_text=True)
+    assert body.lstrip().startswith("<table>")
+    # Header links carry the next sort state and never the fragment flag.
+    assert "sort=title" in body and "dir=desc" in body and "fragment" not in body
+
+
+def test_project_and_company_fragments(client, app):
+    _seed(app)
+    app.config["LIST_STREAMING"] = False
+    login(client, "viewer")
+
+    projects = client.get("/db/projects?fragment=rows").get_data(as_text=True)
+    companies = client.get("/db/companies?fragment=rows").get_data(as_text=True)
+    assert projects.lstrip().startswith("<table>") and "Project 29" in projects and "Acme" in projects
+    assert companies.lstrip().startswith("<table>") and "Acme" in companies
+    for path in ("/db/projects", "/db/companies"):
+        html = client.get(path).get_data(as_text=True)
+        assert "<script" not in html[html.index("<title>") : html.index("</title>")]
@@ -0,0 +1,83 @@
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Company, Project, Task
+from tests.conftest import login, use_wal
+
+
+def _seed(app, count):
+    with app.app_context():
+        company = Company(name="Acme", created_by_user_id=1)
+        db.session.add(company)
+        db.session.flush()
+        project = Project(name="Apollo", company_id=company.id, created_by_user_id=1)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add_all(
+            Task(title=f"Task {n:04d}", status="doing", project_id=project.id, created_by_user_id=1)
+            for n in range(count)
+        )
+        db.session.commit()
+
+
+def test_task_list_streams_header_before_rows(client, app):
+    _seed(app, 600)
+    use_wal(app)
+    login(client, "viewer")
+
+    response = client.get("/db/tasks?sort=title&dir=asc")
+    assert "Content-Length" not in response.headers
+    chunks = iter(response.response)
+    head = next(chunks).decode()
+    assert "Saved Views" in head and 'name="project_id"' in head
+    assert "Task 0000" not in head
+
+    body = head + b"".join(chunks).decode()
+    response.close()
+    assert "<!--stream-flush-->" not in body
+    assert body.index("Task 0000") < body.index("Task 0599")
+    assert body.count("Apollo") >= 600
+
+
+def test_streamed_rows_do_not_lazy_load_relations(client, app):
+    _seed(app, 50)
+    use_wal(app)
+    login(client, "viewer")
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engines["workspace"]
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            for path in ("/db/tasks", "/db/projects", "/db/companies"):
+                response = client.get(path)
+                assert response.status_code == 200
+                response.get_data()
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+    assert len(statements) < 20
+
+
+def test_list_streaming_can_be_disabled(client, app):
+    _seed(app, 5)
+    app.config["LIST_STREAMING"] = False
+    login(client, "viewer")
+
+    response = client.get("/db/tasks")
+    assert response.headers["Content-Length"]
+    assert b"Task 0004" in response.data
+    assert b"stream-flush" not in response.data
+
+
+def test_lists_render_in_one_piece_without_wal(client, app):
+    # A rollback-journal reader held open by a slow client would block writers.
+    _seed(app, 5)
+    login(client, "viewer")
+
+    response = client.get("/db/tasks")
+    assert response.headers["Content-Length"]
+    assert b"Task 0004" in response.data
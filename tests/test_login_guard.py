@@ -0,0 +1,44 @@
+from app.auth.login_guard import hash_timing_snapshot
+from app.models import User
+
+
+def _attempt(client, username="editor", password="wrong"):
+    return client.post("/login", data={"username": username, "password": password})
+
+
+def test_username_bucket_rejects_before_hashing(client, app, monkeypatch):
+    app.config.update(LOGIN_THROTTLE_USER_BURST=3, LOGIN_THROTTLE_USER_PER_MINUTE=1)
+    hashed = []
+    original = User.check_password
+    monkeypatch.setattr(User, "check_password", lambda self, pw: hashed.append(pw) or original(self, pw))
+
+    statuses = [_attempt(client).status_code for _ in range(5)]
+
+    assert statuses == [200, 200, 200, 429, 429]
+    assert len(hashed) == 3
+    rejected = _attempt(client)
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert b"Too many login attempts" in rejected.data
+
+
+def test_ip_bucket_is_shared_across_usernames(client, app):
+    app.config.update(LOGIN_THROTTLE_IP_BURST=2, LOGIN_THROTTLE_IP_PER_MINUTE=1)
+    assert _attempt(client, "editor").status_code == 200
+    assert _attempt(client, "viewer").status_code == 200
+    assert _attempt(client, "admin").status_code == 429
+
+
+def test_login_rehashes_when_hash_method_changes(client, app):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    before = hash_timing_snapshot()["count"]
+
+    response = _attempt(client, "editor", "pw")
+
+    assert response.status_code == 302
+    assert response.headers["Server-Timing"].startswith("pwhash;dur=")
+    assert hash_timing_snapshot()["count"] == before + 1
+    with app.app_context():
+        user = User.query.filter_by(username="editor").first()
+        assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+        assert user.check_password("pw")
+        assert not user.password_needs_rehash()
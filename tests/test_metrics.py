@@ -0,0 +1,102 @@
+import json
+import os
+import re
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.metrics import collect, mark_process_dead, registry
+from tests.conftest import login
+
+DEAD_PID = 999_999_999
+
+
+def _sample(body, pattern):
+    match = re.search(rf"^{pattern} (\S+)$", body, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def _scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    return response.get_data(as_text=True)
+
+
+def test_metrics_restricted_to_localhost_or_admin(client, app):
+    remote = {"REMOTE_ADDR": "10.0.0.5"}
+    assert client.get("/metrics").status_code == 200
+    assert client.get("/metrics", environ_base=remote).status_code == 403
+
+    login(client, "viewer")
+    assert client.get("/metrics", environ_base=remote).status_code == 403
+    admin = app.test_client()
+    login(admin, "admin")
+    assert admin.get("/metrics", environ_base=remote).status_code == 200
+
+
+def test_request_sql_pool_and_audit_metrics(client):
+    login(client, "editor")
+    before = _scrape(client)
+    client.post("/pages/new", data={"title": "Spec", "content": "x"}).close()
+    client.get("/pages").close()
+    after = _scrape(client)
+
+    requests = 'ems_http_requests_total{endpoint="pages.pages_list",method="GET",status="200"}'
+    assert _sample(after, re.escape(requests)) == _sample(before, re.escape(requests)) + 1
+    latency = 'ems_http_request_duration_seconds_count{endpoint="pages.page_create",method="POST"}'
+    assert _sample(after, re.escape(latency)) == _sample(before, re.escape(latency)) + 1
+    assert 'ems_http_request_duration_seconds_bucket{endpoint="pages.pages_list",method="GET",le="+Inf"}' in after
+    assert _sample(after, re.escape('ems_sql_statements_total{bind="workspace"}')) > _sample(
+        before, re.escape('ems_sql_statements_total{bind="workspace"}')
+    )
+    assert 'ems_db_pool_checkout_wait_seconds_count{bind="core"}' in after
+    assert 'ems_db_pool_checkout_wait_seconds_count{bind="workspace"}' in after
+    assert 'ems_db_pool_checked_out{bind="workspace"}' in after
+    assert _sample(after, "ems_audit_write_seconds_count") == _sample(before, "ems_audit_write_seconds_count") + 1
+
+
+def test_locked_database_errors_are_counted(app, tmp_path):
+    blocker = sqlite3.connect(tmp_path / "workspace.db")
+    blocker.execute("BEGIN EXCLUSIVE")
+    key = ("ems_db_locked_errors_total", (("bind", "workspace"),))
+    before = registry.counters.get(key, 0)
+    try:
+        with app.app_context():
+            with db.engines["workspace"].connect() as connection:
+                connection.exec_driver_sql("PRAGMA busy_timeout = 0")
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT count(*) FROM task"))
+    finally:
+        blocker.rollback()
+        blocker.close()
+    assert registry.counters[key] == before + 1
+
+
+def test_worker_files_are_summed_and_archived(app):
+    directory = app.extensions["metrics_dir"]
+    labels = {"endpoint": "main.home", "method": "GET", "status": "200"}
+    fake_worker = {
+        "pid": DEAD_PID,
+        "counters": [["ems_http_requests_total", labels, 5]],
+        "histograms": [],
+        "gauges": [["ems_db_pool_checked_out", {"bind": "core"}, 3]],
+    }
+    key = ("ems_http_requests_total", tuple(sorted(labels.items())))
+    gauge_key = ("ems_db_pool_checked_out", (("bind", "core"),))
+
+    baseline = collect(directory)["counters"].get(key, 0)
+    with open(os.path.join(directory, f"{DEAD_PID}.json"), "w", encoding="utf-8") as handle:
+        json.dump(fake_worker, handle)
+
+    totals = collect(directory)
+    assert totals["counters"][key] == baseline + 5
+    # A dead worker's gauges no longer describe anything.
+    assert totals["gauges"][gauge_key] < 3
+
+    mark_process_dead(DEAD_PID, directory)
+    assert not os.path.exists(os.path.join(directory, f"{DEAD_PID}.json"))
+    assert collect(directory)["counters"][key] == baseline + 5
@@ -0,0 +1,59 @@
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import Page, Project, Task, TaskPageLink
+from tests.conftest import login
+
+
+def _seed(app, task_count):
+    with app.app_context():
+        page = Page(title="Runbook", created_by_user_id=1)
+        other = Page(title="Other", created_by_user_id=1)
+        project = Project(name="Apollo", created_by_user_id=1)
+        db.session.add_all([page, other, project])
+        db.session.flush()
+        for n in range(task_count):
+            task = Task(title=f"Task {n}", status="doing", project_id=project.id if n % 2 else None, created_by_user_id=1)
+            db.session.add(task)
+            db.session.flush()
+            db.session.add(TaskPageLink(task_id=task.id, page_id=page.id))
+            db.session.add(TaskPageLink(task_id=task.id, page_id=other.id))
+        db.session.commit()
+        return page.id
+
+
+def test_page_detail_lists_linked_tasks_with_project(client, app):
+    page_id = _seed(app, 3)
+    login(client, "viewer")
+
+    response = client.get(f"/pages/{page_id}")
+    assert b"Linked Tasks (3)" in response.data
+    assert b"Task 2" in response.data and b"Apollo" in response.data
+    assert b"More linked tasks" not in response.data
+
+
+def test_linked_tasks_paginate_by_task_id(client, app):
+    page_id = _seed(app, 30)
+    login(client, "viewer")
+
+    first = client.get(f"/pages/{page_id}").data
+    assert b"Task 29" in first and b"Task 5<" in first and b"Task 4<" not in first
+    assert b"links_before=6" in first
+
+    second = client.get(f"/pages/{page_id}?links_before=6").data
+    assert b"Task 4<" in second and b"Task 0<" in second and b"Task 5<" not in second
+    assert b"More linked tasks" not in second
+
+
+def test_backlink_lookup_uses_page_index(app):
+    with app.app_context():
+        with db.engines["workspace"].connect() as connection:
+            plan = connection.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT task_id FROM task_page_links "
+                    "WHERE page_id = 1 ORDER BY task_id DESC LIMIT 26"
+                )
+            ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_task_page_links_page_task" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,79 @@
+from app.extensions import db
+from app.models import Page, PageBlock, PageRender
+from app.pages.render import content_hash, render_markdown
+from tests.conftest import login
+
+
+def _create_page(client, content):
+    response = client.post("/pages/new", data={"title": "Spec", "content": content})
+    return int(response.location.rsplit("/", 1)[1])
+
+
+def _stats(app):
+    return dict(app.extensions["page_render_cache"].stats)
+
+
+def test_render_markdown_subset_escapes_html(app):
+    with app.test_request_context():
+        html = render_markdown(
+            "# Plan\n\n- **one**\n- *two*\n\n<script>x</script> see [[task:7|Fix it]] and `a<b`\n\n```\n<b>raw</b>\n```"
+        )
+    assert "<h1>Plan</h1>" in html
+    assert "<ul>\n<li><strong>one</strong></li>\n<li><em>two</em></li>\n</ul>" in html
+    assert "&lt;script&gt;" in html and "<script>" not in html
+    assert '<a class="task-ref" href="/db/tasks/7">Fix it</a>' in html
+    assert "<code>a&lt;b</code>" in html
+    assert "<pre><code>&lt;b&gt;raw&lt;/b&gt;</code></pre>" in html
+
+
+def test_links_allow_only_web_and_same_site_targets(app):
+    with app.test_request_context():
+        html = render_markdown(
+            "[a](https://example.com) [b](/pages/2) [c](#top) [d](//evil.example) [e](/\\evil.example) [f](javascript:x)"
+        )
+    assert '<a href="https://example.com">a</a>' in html
+    assert '<a href="/pages/2">b</a>' in html and '<a href="#top">c</a>' in html
+    assert "[d](//evil.example)" in html and "[e](/\\evil.example)" in html and "[f](javascript:x)" in html
+    assert html.count("<a ") == 3
+
+
+def test_page_views_render_once_per_content_change(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "Intro with **bold**\n\nMore")
+
+    assert b"<strong>bold</strong>" in client.get(f"/pages/{page_id}").data
+    client.get(f"/pages/{page_id}")
+    client.get(f"/pages/{page_id}")
+    assert _stats(app) == {"memory_hits": 2, "db_hits": 0, "misses": 1}
+
+    with app.app_context():
+        page = db.session.get(Page, page_id)
+        block = PageBlock.query.filter_by(page_id=page_id).first()
+        client.post(
+            f"/pages/{page_id}/blocks",
+            json={"version": page.version, "ops": [{"op": "update", "id": block.id, "content": "Changed"}]},
+        )
+
+    assert b"<p>Changed</p>" in client.get(f"/pages/{page_id}").data
+    assert _stats(app)["misses"] == 2
+    with app.app_context():
+        # The superseded render is replaced, not accumulated.
+        rows = PageRender.query.filter_by(page_id=page_id).all()
+        assert [row.content_hash for row in rows] == [content_hash("Changed\n\nMore")]
+
+
+def test_stored_render_is_shared_across_processes(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "Shared text")
+    client.get(f"/pages/{page_id}")
+
+    # A fresh worker starts with an empty LRU but finds the stored render.
+    app.extensions["page_render_cache"]._entries.clear()
+    client.get(f"/pages/{page_id}")
+    assert _stats(app) == {"memory_hits": 0, "db_hits": 1, "misses": 1}
+
+
+def test_admin_storage_shows_render_counters(client, app):
+    login(client, "admin")
+    response = client.get("/admin/storage")
+    assert b"Page Render Cache" in response.data
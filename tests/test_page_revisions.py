@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Page, PageRevision
+from app.pages.blocks import load_blocks, page_text
+from app.pages.revisions import apply_delta, list_revisions, make_delta, revision_text, thin_page_revisions
+from tests.conftest import login
+
+
+def _create_page(client, content):
+    response = client.post("/pages/new", data={"title": "Spec", "content": content})
+    return int(response.location.rsplit("/", 1)[1])
+
+
+def _edit_block(client, app, page_id, index, content):
+    with app.app_context():
+        page = db.session.get(Page, page_id)
+        version, block_id = page.version, load_blocks(page_id)[index].id
+    response = client.post(
+        f"/pages/{page_id}/blocks",
+        json={"version": version, "ops": [{"op": "update", "id": block_id, "content": content}]},
+    )
+    assert response.status_code == 200
+
+
+def test_delta_round_trip():
+    old = "alpha\nbeta\ngamma\n"
+    new = "alpha\nBETA\ngamma\ndelta"
+    assert apply_delta(old, make_delta(old, new)) == new
+    assert apply_delta("", make_delta("", "x\ny")) == "x\ny"
+
+
+def test_every_revision_rebuilds_from_snapshot_and_bounded_deltas(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "\n\n".join(f"Section {n}\nbody {n}" for n in range(20)))
+    expected = {}
+    with app.app_context():
+        expected[1] = page_text(db.session.get(Page, page_id))
+
+    for step in range(2, 26):
+        _edit_block(client, app, page_id, step % 20, f"Section {step % 20}\nrevised at {step}")
+        with app.app_context():
+            expected[step] = page_text(db.session.get(Page, page_id))
+
+    with app.app_context():
+        rows = PageRevision.query.filter_by(page_id=page_id).order_by(PageRevision.revision).all()
+        assert [row.revision for row in rows] == list(range(1, 26))
+        assert [row.revision for row in rows if row.is_snapshot] == [1, 11, 21]
+        assert all(len(row.content) < 200 for row in rows if not row.is_snapshot)
+        for revision, text in expected.items():
+            assert revision_text(page_id, revision) == text
+
+
+def test_revisions_list_with_keyset_pagination(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "A\n\nB")
+    for step in range(4):
+        _edit_block(client, app, page_id, 0, f"A{step}")
+
+    with app.app_context():
+        first, next_before = list_revisions(page_id, limit=2)
+        second, last_before = list_revisions(page_id, before=next_before, limit=2)
+        third, _ = list_revisions(page_id, before=last_before, limit=2)
+    assert [row.revision for row in first] == [5, 4]
+    assert [row.revision for row in second] == [3, 2]
+    assert [row.revision for row in third] == [1]
+
+    response = client.get(f"/pages/{page_id}/revisions")
+    assert response.status_code == 200
+    assert b"#5" in response.data and b"editor" in response.data
+
+
+def test_restore_revision(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "Original\n\nText")
+    _edit_block(client, app, page_id, 0, "Changed")
+
+    response = client.post(f"/pages/{page_id}/revisions/1/restore")
+    assert response.status_code == 302
+    with app.app_context():
+        page = db.session.get(Page, page_id)
+        assert page.version == 3
+        assert page_text(page) == "Original\n\nText"
+        assert revision_text(page_id, 2) == "Changed\n\nText"
+        assert revision_text(page_id, 3) == "Original\n\nText"
+
+
+def test_form_edit_records_new_text(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "A\n\nB\n\nC")
+    with app.app_context():
+        a_id, b_id, c_id = (block.id for block in load_blocks(page_id))
+    response = client.post(
+        f"/pages/{page_id}/edit",
+        data={"title": "Spec", "version": "1", f"block-{a_id}": "A", f"block-{b_id}": "B edited", f"block-{c_id}": "C"},
+    )
+    assert response.status_code == 302
+    with app.app_context():
+        assert page_text(db.session.get(Page, page_id)) == "A\n\nB edited\n\nC"
+        assert revision_text(page_id, 1) == "A\n\nB\n\nC"
+        assert revision_text(page_id, 2) == "A\n\nB edited\n\nC"
+
+
+def test_thinning_keeps_recent_and_one_per_day(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "v1")
+    for step in range(2, 13):
+        _edit_block(client, app, page_id, 0, f"v{step}")
+
+    now = datetime(2026, 6, 30, 12, 0)
+    with app.app_context():
+        rows = PageRevision.query.filter_by(page_id=page_id).order_by(PageRevision.revision).all()
+        # Revisions 1-6 on one old day, 7-9 on another, 10-12 recent.
+        for row in rows:
+            if row.revision <= 6:
+                row.created_at = now - timedelta(days=40) + timedelta(hours=row.revision)
+            elif row.revision <= 9:
+                row.created_at = now - timedelta(days=30) + timedelta(hours=row.revision)
+            else:
+                row.created_at = now - timedelta(hours=20 - row.revision)
+        db.session.commit()
+
+        removed = thin_page_revisions(page_id, now=now)
+        db.session.commit()
+
+        kept = [row.revision for row in PageRevision.query.filter_by(page_id=page_id).order_by(PageRevision.revision)]
+        assert removed == 7
+        assert kept == [6, 9, 10, 11, 12]
+        for revision in kept:
+            assert revision_text(page_id, revision) == f"v{revision}"
@@ -0,0 +1,195 @@
+import threading
+
+from sqlalchemy import event, text
+
+from app.extensions import db
+from app.migrations import migrate_bind
+from app.models import AuditLog, Page, PageBlock
+from app.pages.blocks import load_blocks, page_text
+from tests.conftest import login
+
+
+def _create_page(client, content, title="Spec"):
+    response = client.post("/pages/new", data={"title": title, "content": content})
+    assert response.status_code == 302
+    return int(response.location.rstrip("/").rsplit("/", 1)[1])
+
+
+def _blocks(app, page_id):
+    with app.app_context():
+        return [(block.id, block.content) for block in load_blocks(page_id)]
+
+
+def test_create_page_splits_content_into_ordered_blocks(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "Intro\n\nSecond para\nline two\n\n\nThird")
+
+    assert [content for _, content in _blocks(app, page_id)] == ["Intro", "Second para\nline two", "Third"]
+    response = client.get(f"/pages/{page_id}")
+    assert response.status_code == 200
+    assert b"Second para" in response.data
+
+
+def test_incremental_save_writes_only_changed_blocks(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "\n\n".join(f"Block {n} " + "x" * 2000 for n in range(50)))
+    blocks = _blocks(app, page_id)
+
+    written = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("UPDATE PAGE_BLOCK", "INSERT INTO PAGE_BLOCK")):
+            written.append(parameters)
+
+    with app.app_context():
+        event.listen(db.engines["workspace"], "before_cursor_execute", capture)
+
+    response = client.post(
+        f"/pages/{page_id}/blocks",
+        json={"version": 1, "ops": [{"op": "update", "id": blocks[10][0], "content": "Block 10 edited"}]},
+    )
+    assert response.status_code == 200
+    assert response.get_json()["version"] == 2
+    assert len(written) == 1
+    assert len(repr(written[0])) < 500
+
+    after = _blocks(app, page_id)
+    assert after[10][1] == "Block 10 edited"
+    assert after[:10] == blocks[:10] and after[11:] == blocks[11:]
+
+
+def test_insert_and_delete_ops_keep_order(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "A\n\nB\n\nC")
+    (a_id, _), (b_id, _), _ = _blocks(app, page_id)
+
+    response = client.post(
+        f"/pages/{page_id}/blocks",
+        json={
+            "version": 1,
+            "title": "Renamed",
+            "ops": [
+                {"op": "insert", "after": None, "content": "Start", "temp_id": "t0"},
+                {"op": "insert", "after": a_id, "content": "A2", "temp_id": "t1"},
+                {"op": "insert", "after": "t1", "content": "A3", "temp_id": "t2"},
+                {"op": "delete", "id": b_id},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    assert set(response.get_json()["inserted"]) == {"t0", "t1", "t2"}
+
+    with app.app_context():
+        page = db.session.get(Page, page_id)
+        assert page.title == "Renamed"
+        assert page_text(page) == "Start\n\nA\n\nA2\n\nA3\n\nC"
+        assert AuditLog.query.filter_by(action="page_updated", entity_id=str(page_id)).count() == 1
+
+
+def test_repeated_inserts_into_one_gap_renumber_positions(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "first\n\nlast")
+    first_id = _blocks(app, page_id)[0][0]
+
+    ops = [{"op": "insert", "after": first_id, "content": f"n{i}", "temp_id": f"t{i}"} for i in range(15)]
+    assert client.post(f"/pages/{page_id}/blocks", json={"version": 1, "ops": ops}).status_code == 200
+
+    contents = [content for _, content in _blocks(app, page_id)]
+    assert contents == ["first", *[f"n{i}" for i in reversed(range(15))], "last"]
+
+
+def test_stale_version_and_bad_ops_are_rejected(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "A")
+
+    stale = client.post(f"/pages/{page_id}/blocks", json={"version": 7, "ops": []})
+    assert stale.status_code == 409
+    unknown = client.post(f"/pages/{page_id}/blocks", json={"version": 1, "ops": [{"op": "delete", "id": 999}]})
+    assert unknown.status_code == 400
+
+
+def test_concurrent_saves_of_one_version_conflict(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "A\n\nB")
+    (a_id, _), (b_id, _) = _blocks(app, page_id)
+    other = app.test_client()
+    login(other, "editor")
+    responses = []
+    interleaved = []
+
+    def save_first(conn, cursor, statement, parameters, context, executemany):
+        # The other save commits after this one has read version 1 but
+        # before it writes anything.
+        if statement.startswith("UPDATE page SET") and not interleaved:
+            interleaved.append(True)
+            worker = threading.Thread(
+                target=lambda: responses.append(
+                    other.post(
+                        f"/pages/{page_id}/blocks",
+                        json={"version": 1, "ops": [{"op": "update", "id": a_id, "content": "A2"}]},
+                    )
+                )
+            )
+            worker.start()
+            worker.join()
+
+    with app.app_context():
+        engine = db.engines["workspace"]
+    event.listen(engine, "before_cursor_execute", save_first)
+    try:
+        late = client.post(
+            f"/pages/{page_id}/blocks", json={"version": 1, "ops": [{"op": "update", "id": b_id, "content": "B2"}]}
+        )
+        form = client.post(f"/pages/{page_id}/edit", data={"title": "Spec", "version": "1", f"block-{a_id}": "A3"})
+    finally:
+        event.remove(engine, "before_cursor_execute", save_first)
+
+    assert responses[0].status_code == 200
+    assert late.status_code == 409 and late.get_json()["version"] == 2
+    assert "changed by someone else" in form.get_data(as_text=True)
+    assert [content for _, content in _blocks(app, page_id)] == ["A2", "B"]
+
+
+def test_form_edit_diffs_blocks_and_viewer_cannot_edit(client, app):
+    login(client, "editor")
+    page_id = _create_page(client, "A\n\nB")
+    (a_id, _), (b_id, _) = _blocks(app, page_id)
+
+    response = client.post(
+        f"/pages/{page_id}/edit",
+        data={"title": "Spec", "version": "1", f"block-{a_id}": "A", f"block-{b_id}": "", "new_content": "C\n\nD"},
+    )
+    assert response.status_code == 302
+    assert [content for _, content in _blocks(app, page_id)] == ["A", "C", "D"]
+
+    viewer = app.test_client()
+    login(viewer, "viewer")
+    assert viewer.get(f"/pages/{page_id}").status_code == 200
+    assert viewer.post(f"/pages/{page_id}/blocks", json={"version": 2, "ops": []}).status_code == 403
+
+
+def test_delete_page_removes_blocks(client, app):
+    login(client, "admin")
+    page_id = _create_page(client, "A\n\nB")
+    assert client.post(f"/pages/{page_id}/delete").status_code == 302
+    with app.app_context():
+        assert PageBlock.query.filter_by(page_id=page_id).count() == 0
+        assert db.session.get(Page, page_id) is None
+
+
+def test_body_to_blocks_migration_moves_legacy_bodies(app):
+    with app.app_context():
+        page = Page(title="Legacy", body="One\n\nTwo")
+        db.session.add(page)
+        db.session.commit()
+        page_id = page.id
+        with db.engines["workspace"].begin() as conn:
+            conn.execute(text("DELETE FROM schema_migrations WHERE migration_id = '0003_page_body_to_blocks'"))
+
+        results = migrate_bind("workspace", pause=0)
+
+        assert [r["migration_id"] for r in results] == ["0003_page_body_to_blocks"]
+        db.session.expire_all()
+        page = db.session.get(Page, page_id)
+        assert page.body is None
+        assert page_text(page) == "One\n\nTwo"
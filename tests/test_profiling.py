@@ -0,0 +1,93 @@
+import os
+
+from app.profiling import _prune
+from tests.conftest import login, use_wal
+
+
+def _profile_files(app, name):
+    directory = app.extensions["profile_dir"]
+    return [os.path.exists(os.path.join(directory, name + suffix)) for suffix in (".prof", ".json")]
+
+
+def test_admin_profile_param_saves_profile_and_summary(client, app):
+    use_wal(app)
+    login(client, "admin")
+    response = client.get("/db/tasks?_profile=1")
+    response.get_data()
+    response.close()
+    name = response.headers["X-Profile"]
+    assert _profile_files(app, name) == [True, True]
+
+    listing = client.get("/admin/profiles")
+    assert name.encode() in listing.data
+
+    summary = client.get(f"/admin/profiles/{name}")
+    assert summary.status_code == 200
+    assert b"GET /db/tasks?_profile=1" in summary.data
+    assert b"databases/routes.py" in summary.data
+    assert client.get(f"/admin/profiles/{name}?sort=tottime").status_code == 200
+
+    download = client.get(f"/admin/profiles/{name}/download")
+    assert download.status_code == 200
+    assert download.headers["Content-Disposition"].startswith("attachment")
+    assert client.get("/admin/profiles/..%2Fwindow/download").status_code == 404
+
+
+def test_profiling_is_admin_only(client, app):
+    login(client, "editor")
+    response = client.get("/db/tasks?_profile=1")
+    response.close()
+    assert "X-Profile" not in response.headers
+    assert client.get("/admin/profiles").status_code == 403
+
+    admin = app.test_client()
+    login(admin, "admin")
+    response = admin.get("/db/tasks")
+    response.close()
+    assert "X-Profile" not in response.headers
+
+
+def test_profiling_window_matches_admin_requests_under_prefix(client, app):
+    login(client, "admin")
+    opened = client.post("/admin/profiles/window", data={"action": "open", "minutes": "5", "path_prefix": "/db/"})
+    assert opened.status_code == 302
+
+    inside = client.get("/db/companies")
+    inside.close()
+    outside = client.get("/pages")
+    outside.close()
+    assert "X-Profile" in inside.headers
+    assert "X-Profile" not in outside.headers
+
+    viewer = app.test_client()
+    login(viewer, "viewer")
+    response = viewer.get("/db/companies")
+    response.close()
+    assert "X-Profile" not in response.headers
+
+    client.post("/admin/profiles/window", data={"action": "close"})
+    after = client.get("/db/companies")
+    after.close()
+    assert "X-Profile" not in after.headers
+
+
+def test_window_length_is_limited(client):
+    login(client, "admin")
+    response = client.post(
+        "/admin/profiles/window", data={"action": "open", "minutes": "600", "path_prefix": "/"}, follow_redirects=True
+    )
+    assert b"Choose between 1 and 60 minutes." in response.data
+    assert b"Open Window" in response.data
+
+
+def test_prune_keeps_newest_profiles(tmp_path):
+    for name in ("20240101T000000-1-1-a", "20240101T000001-1-2-b", "20240101T000002-1-3-c"):
+        (tmp_path / f"{name}.prof").write_bytes(b"")
+        (tmp_path / f"{name}.json").write_text("{}")
+    _prune(str(tmp_path), keep=2)
+    assert sorted(os.listdir(tmp_path)) == [
+        "20240101T000001-1-2-b.json",
+        "20240101T000001-1-2-b.prof",
+        "20240101T000002-1-3-c.json",
+        "20240101T000002-1-3-c.prof",
+    ]
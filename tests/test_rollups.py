@@ -0,0 +1,169 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.databases.rollups import verify_rollups
+from app.extensions import db
+from app.migrations import migrate_bind
+from app.models import Company, Project, Task, User
+from tests.conftest import login
+
+
+def _seed(app):
+    with app.app_context():
+        admin = User.query.filter_by(username="admin").first()
+        company = Company(name="Acme", status="active", created_by_user_id=admin.id)
+        other = Company(name="Globex", status="active", created_by_user_id=admin.id)
+        db.session.add_all([company, other])
+        db.session.commit()
+        return company.id, other.id, admin.id
+
+
+def _counters(app, project_id):
+    with app.app_context():
+        project = db.session.get(Project, project_id)
+        return project.task_count, project.open_task_count, project.done_task_count
+
+
+def _company_counters(app, company_id):
+    with app.app_context():
+        company = db.session.get(Company, company_id)
+        return company.project_count, company.active_project_count
+
+
+def _assert_consistent(app):
+    with app.app_context():
+        assert verify_rollups() == []
+
+
+def test_write_paths_keep_counters_exact(client, app):
+    company_id, other_id, _admin_id = _seed(app)
+    login(client, "admin")
+
+    client.post("/db/projects/new", data={"name": "Alpha", "status": "active", "company_id": company_id})
+    client.post(f"/db/companies/{company_id}/quick-add-project", data={"name": "Beta"})
+    with app.app_context():
+        alpha = Project.query.filter_by(name="Alpha").one().id
+        beta = Project.query.filter_by(name="Beta").one().id
+    assert _company_counters(app, company_id) == (2, 1)
+
+    client.post("/db/tasks/new", data={"title": "One", "status": "doing", "project_id": alpha})
+    client.post("/db/tasks/new", data={"title": "Two", "status": "done", "project_id": alpha})
+    client.post(f"/db/projects/{alpha}/quick-add-task", data={"title": "Three", "status": "archived"})
+    assert _counters(app, alpha) == (3, 1, 1)
+    with app.app_context():
+        one = Task.query.filter_by(title="One").one().id
+        two = Task.query.filter_by(title="Two").one().id
+        assert db.session.get(Project, alpha).last_activity_at is not None
+
+    client.post(f"/db/tasks/{one}/edit", data={"title": "One", "status": "done", "project_id": alpha})
+    assert _counters(app, alpha) == (3, 0, 2)
+    client.post(f"/db/tasks/{two}/edit", data={"title": "Two", "status": "next", "project_id": beta})
+    assert _counters(app, alpha) == (2, 0, 1)
+    assert _counters(app, beta) == (1, 1, 0)
+
+    response = client.post(f"/db/tasks/{two}/move", json={"status": "done", "from": "next"})
+    assert response.status_code == 200
+    assert _counters(app, beta) == (1, 0, 1)
+    client.post(f"/db/tasks/{two}/move", json={"status": "doing", "from": "next"})
+    assert _counters(app, beta) == (1, 0, 1)
+
+    client.post(f"/db/projects/{beta}/edit", data={"name": "Beta", "status": "active", "company_id": other_id})
+    assert _company_counters(app, company_id) == (1, 1)
+    assert _company_counters(app, other_id) == (1, 1)
+
+    client.post(f"/db/tasks/{one}/delete")
+    assert _counters(app, alpha) == (1, 0, 0)
+    client.post(f"/db/projects/{alpha}/delete")
+    assert _company_counters(app, company_id) == (0, 0)
+    _assert_consistent(app)
+
+
+def test_counter_updates_do_not_bump_updated_at(client, app):
+    company_id, _other_id, _admin_id = _seed(app)
+    login(client, "admin")
+    client.post("/db/projects/new", data={"name": "Alpha", "status": "active", "company_id": company_id})
+    stamp = datetime(2024, 1, 1)
+    with app.app_context():
+        project = Project.query.filter_by(name="Alpha").one()
+        project_id = project.id
+        project.updated_at = stamp
+        db.session.get(Company, company_id).updated_at = stamp
+        db.session.commit()
+
+    client.post("/db/tasks/new", data={"title": "One", "status": "doing", "project_id": project_id})
+    client.post(f"/db/companies/{company_id}/quick-add-project", data={"name": "Beta"})
+    with app.app_context():
+        assert db.session.get(Project, project_id).updated_at == stamp
+        assert db.session.get(Company, company_id).updated_at == stamp
+        assert db.session.get(Project, project_id).task_count == 1
+
+
+def test_verify_detects_and_repairs_drift(app):
+    company_id, _other_id, admin_id = _seed(app)
+    with app.app_context():
+        project = Project(name="Alpha", status="active", company_id=company_id, created_by_user_id=admin_id)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add_all(
+            [
+                Task(title="One", status="doing", project_id=project.id, created_by_user_id=admin_id),
+                Task(title="Two", status="done", project_id=project.id, created_by_user_id=admin_id),
+            ]
+        )
+        db.session.commit()
+
+        mismatches = verify_rollups()
+        assert {(row["entity"], row["id"]) for row in mismatches} == {("Project", project.id), ("Company", company_id)}
+        assert verify_rollups(repair=True)
+        db.session.commit()
+        assert verify_rollups() == []
+        db.session.refresh(project)
+        assert (project.task_count, project.open_task_count, project.done_task_count) == (2, 1, 1)
+
+
+def test_backfill_migration_counts_existing_rows(app):
+    company_id, _other_id, admin_id = _seed(app)
+    with app.app_context():
+        project = Project(name="Alpha", status="active", company_id=company_id, created_by_user_id=admin_id)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(Task(title="One", status="done", project_id=project.id, created_by_user_id=admin_id))
+        db.session.commit()
+        with db.engines["workspace"].begin() as conn:
+            conn.execute(text("DELETE FROM schema_migrations WHERE migration_id = '0012_rollup_backfill'"))
+
+        migrate_bind("workspace", pause=0)
+        assert verify_rollups() == []
+
+
+def test_projects_sort_and_filter_by_counters(client, app):
+    company_id, _other_id, admin_id = _seed(app)
+    with app.app_context():
+        for name, statuses in (("Busy", ["doing", "next", "done"]), ("Finished", ["done", "done"]), ("Empty", [])):
+            project = Project(name=name, status="active", company_id=company_id, created_by_user_id=admin_id)
+            db.session.add(project)
+            db.session.flush()
+            db.session.add_all(
+                Task(title=f"{name}-{index}", status=status, project_id=project.id, created_by_user_id=admin_id)
+                for index, status in enumerate(statuses)
+            )
+        db.session.commit()
+        verify_rollups(repair=True)
+        db.session.commit()
+
+    login(client, "viewer")
+    html = client.get("/db/projects?sort=progress&dir=desc").get_data(as_text=True)
+    assert html.index("Finished") < html.index("Busy") < html.index("Empty")
+    assert "2/2" in html and "1/3" in html
+    html = client.get("/db/projects?sort=open_tasks&dir=desc").get_data(as_text=True)
+    assert html.index("Busy") < html.index("Finished")
+
+    response = client.get('/db/projects?filter={"field":"open_tasks","op":"gte","value":1}')
+    html = response.get_data(as_text=True)
+    assert "Busy" in html and "Finished" not in html
+    response = client.get('/db/projects?filter={"field":"open_tasks","op":"gte","value":-1}&fragment=rows')
+    assert response.status_code == 400
+
+    html = client.get("/db/companies?sort=active_projects").get_data(as_text=True)
+    assert "3 active of 3" in html
@@ -0,0 +1,45 @@
+import runpy
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.extensions import db
+
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "gunicorn.conf.py"
+
+
+def _fake_server(app, preload):
+    return SimpleNamespace(cfg=SimpleNamespace(preload_app=preload), app=SimpleNamespace(wsgi=lambda: app))
+
+
+def test_config_defaults_to_preloaded_gthread_workers(monkeypatch):
+    monkeypatch.setenv("GUNICORN_THREADS", "8")
+    monkeypatch.delenv("GUNICORN_PRELOAD", raising=False)
+    config = runpy.run_path(str(CONFIG_PATH))
+    assert config["preload_app"] is True
+    assert config["worker_class"] == "gthread"
+    assert config["threads"] == 8
+    assert config["max_requests"] > 0
+
+
+def test_post_fork_replaces_inherited_pools(app):
+    config = runpy.run_path(str(CONFIG_PATH))
+    with app.app_context():
+        pools_before = {key: engine.pool for key, engine in db.engines.items()}
+
+    config["post_fork"](_fake_server(app, preload=True), worker=None)
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            assert engine.pool is not pools_before[key]
+
+
+def test_post_fork_is_noop_without_preload(app):
+    config = runpy.run_path(str(CONFIG_PATH))
+    with app.app_context():
+        pools_before = {key: engine.pool for key, engine in db.engines.items()}
+
+    config["post_fork"](_fake_server(app, preload=False), worker=None)
+
+    with app.app_context():
+        assert all(engine.pool is pools_before[key] for key, engine in db.engines.items())
@@ -0,0 +1,53 @@
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import get_setting, set_setting
+
+
+def _count_setting_selects(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM app_setting" in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engines[None], "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def test_settings_load_once_per_context(app):
+    with app.app_context():
+        set_setting("alpha", "1")
+        set_setting("beta", "2")
+        db.session.commit()
+
+    statements = _count_setting_selects(app)
+    with app.app_context():
+        assert get_setting("alpha") == "1"
+        assert get_setting("beta") == "2"
+        assert get_setting("missing", "fallback") == "fallback"
+    assert len(statements) == 1
+
+    with app.app_context():
+        assert get_setting("alpha") == "1"
+    assert len(statements) == 2
+
+
+def test_update_from_another_worker_becomes_visible(app):
+    other_worker = create_app()
+
+    with app.app_context():
+        set_setting("alpha", "old")
+        db.session.commit()
+    with other_worker.app_context():
+        assert get_setting("alpha") == "old"
+
+    with app.app_context():
+        set_setting("alpha", "new")
+        db.session.commit()
+        assert get_setting("alpha") == "new"
+
+    with other_worker.app_context():
+        assert get_setting("alpha") == "new"
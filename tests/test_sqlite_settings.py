@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.config import DevelopmentConfig, ProductionConfig
+from app.extensions import db
+from app.models import Project, Task, User
+from tests.conftest import login
+
+
+def _pragma(app, name):
+    values = {}
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            with engine.connect() as conn:
+                values[bind or "core"] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return values
+
+
+def test_journal_mode_and_busy_timeout_apply_to_every_bind(monkeypatch, tmp_path):
+    monkeypatch.setenv("CORE_DATABASE_URL", f"sqlite:///{tmp_path / 'core.db'}")
+    monkeypatch.setenv("WORKSPACE_DATABASE_URL", f"sqlite:///{tmp_path / 'workspace.db'}")
+    monkeypatch.setattr(DevelopmentConfig, "SQLITE_JOURNAL_MODE", "WAL")
+    monkeypatch.setattr(DevelopmentConfig, "SQLITE_BUSY_TIMEOUT_MS", 1500)
+    app = create_app()
+
+    assert _pragma(app, "journal_mode") == {"core": "wal", "workspace": "wal"}
+    assert _pragma(app, "busy_timeout") == {"core": 1500, "workspace": 1500}
+
+
+def test_defaults_leave_sqlite_settings_alone(app):
+    assert set(_pragma(app, "journal_mode").values()) == {"delete"}
+    assert set(_pragma(app, "busy_timeout").values()) == {5000}
+
+
+def test_production_defaults_to_wal_and_records_the_mode(monkeypatch, tmp_path):
+    monkeypatch.setenv("FLASK_CONFIG", "production")
+    monkeypatch.setenv("CORE_DATABASE_URL", f"sqlite:///{tmp_path / 'core.db'}")
+    monkeypatch.setenv("WORKSPACE_DATABASE_URL", f"sqlite:///{tmp_path / 'workspace.db'}")
+    monkeypatch.setattr(ProductionConfig, "PRECOMPILE_TEMPLATES", False)
+    app = create_app()
+
+    assert _pragma(app, "journal_mode") == {"core": "wal", "workspace": "wal"}
+    with app.app_context(), db.engines["workspace"].connect() as conn:
+        assert conn.info["journal_mode"] == "wal"
+
+
+def test_unknown_journal_mode_is_rejected(monkeypatch, tmp_path):
+    monkeypatch.setenv("CORE_DATABASE_URL", f"sqlite:///{tmp_path / 'core.db'}")
+    monkeypatch.setattr(DevelopmentConfig, "SQLITE_JOURNAL_MODE", "wal2")
+    with pytest.raises(RuntimeError, match="SQLITE_JOURNAL_MODE"):
+        create_app()
+
+
+@pytest.mark.parametrize("route", ["edit", "quick_add"])
+def test_writes_lock_workspace_before_core(client, app, route):
+    # Mixed lock orders across the two databases deadlocked concurrent saves
+    # until SQLite's busy timeout expired.
+    with app.app_context():
+        editor = User.query.filter_by(username="editor").first()
+        project = Project(name="Ops", status="active", created_by_user_id=editor.id)
+        db.session.add(project)
+        db.session.flush()
+        task = Task(title="Wire form", status="backlog", project_id=project.id, created_by_user_id=editor.id)
+        db.session.add(task)
+        db.session.commit()
+        task_id, project_id = task.id, project.id
+        engines = {engine: bind or "core" for bind, engine in db.engines.items()}
+
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.split(None, 1)[0].upper() in {"INSERT", "UPDATE", "DELETE"}:
+            writes.append(engines[conn.engine])
+
+    login(client, "editor")
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    if route == "edit":
+        response = client.post(
+            f"/db/tasks/{task_id}/edit", data={"title": "Renamed", "status": "doing", "project_id": project_id}
+        )
+    else:
+        response = client.post(f"/db/projects/{project_id}/quick-add-task", data={"title": "New", "status": "next"})
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 302
+    assert writes[0] == "workspace"
+    assert writes.index("core") > max(index for index, bind in enumerate(writes) if bind == "workspace")
@@ -0,0 +1,66 @@
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import AuditLog, Company, Page, PageBlock, PageRevision, Project, SavedView, Task, TaskPageLink
+from app.synthetic import generate_workspace, scaled_counts
+
+COUNTS = {
+    "companies": 5,
+    "projects": 20,
+    "tasks": 200,
+    "pages": 15,
+    "links": 60,
+    "saved_views": 12,
+    "audit_rows": 100,
+}
+
+
+def _count(model):
+    return db.session.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_generate_workspace_counts_and_integrity(app):
+    with app.app_context():
+        audit_before = _count(AuditLog)
+        inserted = generate_workspace(COUNTS, seed=7)
+        assert inserted == COUNTS
+
+        assert _count(Company) == 5
+        assert _count(Project) == 20
+        assert _count(Task) == 200
+        assert _count(TaskPageLink) == 60
+        assert _count(SavedView) == 12
+        assert _count(AuditLog) == audit_before + 100
+
+        project_ids = set(db.session.execute(select(Project.id)).scalars())
+        assert {task.project_id for task in Task.query} - {None} <= project_ids
+        assert len({task.status for task in Task.query}) > 3
+
+        for page in Page.query:
+            assert page.preview
+            assert PageBlock.query.filter_by(page_id=page.id).count() >= 2
+            assert PageRevision.query.filter_by(page_id=page.id, revision=1, is_snapshot=True).count() == 1
+
+        defaults = (
+            db.session.query(SavedView.user_id, SavedView.database_key, func.count())
+            .filter(SavedView.is_default.is_(True))
+            .group_by(SavedView.user_id, SavedView.database_key)
+            .all()
+        )
+        assert all(count == 1 for _user, _key, count in defaults)
+
+
+def test_generate_workspace_is_deterministic_and_appends(app):
+    with app.app_context():
+        generate_workspace({**COUNTS, "audit_rows": 0}, seed=3)
+        first = [(task.title, task.status, task.due_date) for task in Task.query.order_by(Task.id)]
+        generate_workspace({**COUNTS, "audit_rows": 0}, seed=3)
+        tasks = Task.query.order_by(Task.id).all()
+        assert len(tasks) == 400
+        assert [(task.title, task.status, task.due_date) for task in tasks[200:]] == first
+
+
+def test_scaled_counts_overrides():
+    counts = scaled_counts(0.1, tasks=7)
+    assert counts["tasks"] == 7
+    assert counts["companies"] == 5
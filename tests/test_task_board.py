@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import AuditLog, Project, Task, User
+from tests.conftest import login
+
+
+def _seed_board(app, per_status=4):
+    with app.app_context():
+        admin = User.query.filter_by(username="admin").first()
+        editor = User.query.filter_by(username="editor").first()
+        project = Project(name="Board Project", status="active", created_by_user_id=admin.id)
+        db.session.add(project)
+        db.session.flush()
+        start = datetime(2024, 1, 1)
+        tasks = []
+        for status in ("backlog", "next", "doing", "blocked", "done", "archived"):
+            for index in range(per_status):
+                tasks.append(
+                    Task(
+                        title=f"{status}-{index}",
+                        status=status,
+                        project_id=project.id,
+                        created_by_user_id=editor.id if index == 0 else admin.id,
+                        updated_at=start + timedelta(minutes=index),
+                    )
+                )
+        db.session.add_all(tasks)
+        db.session.commit()
+        return {task.title: task.id for task in tasks}
+
+
+def test_board_loads_top_cards_per_column_in_one_query(client, app):
+    _seed_board(app, per_status=4)
+    app.config["BOARD_COLUMN_LIMIT"] = 3
+    statements = []
+
+    with app.app_context():
+        engine = db.engines["workspace"]
+
+    def record(_conn, _cursor, statement, *_args):
+        if "FROM task" in statement:
+            statements.append(statement)
+
+    login(client, "viewer")
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/db/tasks/board")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    html = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert len(statements) == 1 and "row_number() OVER" in statements[0]
+    # Newest three of four per column, and the archived column stays hidden.
+    assert "doing-3" in html and "doing-1" in html and "doing-0" not in html
+    assert "archived-3" not in html
+    assert html.count('class="board-more"') == 5
+    assert 'draggable="true"' not in html
+
+
+def test_board_load_more_continues_after_cursor(client, app):
+    _seed_board(app, per_status=4)
+    app.config["BOARD_COLUMN_LIMIT"] = 3
+    login(client, "admin")
+    board = client.get("/db/tasks/board?include_archived=1").get_data(as_text=True)
+    assert "archived-3" in board
+
+    start = board.index('data-url="', board.index('data-status="doing"')) + len('data-url="')
+    url = board[start : board.index('"', start)].replace("&amp;", "&")
+    more = client.get(url).get_data(as_text=True)
+    assert "doing-0" in more and "doing-1" not in more
+    assert "board-more" not in more
+    assert client.get("/db/tasks/board/column?status=nope").status_code == 400
+
+
+def test_move_updates_status_and_audits(client, app):
+    ids = _seed_board(app, per_status=2)
+    login(client, "editor")
+
+    response = client.post(f"/db/tasks/{ids['backlog-0']}/move", json={"status": "doing", "from": "backlog"})
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "doing"
+
+    stale = client.post(f"/db/tasks/{ids['backlog-0']}/move", json={"status": "done", "from": "backlog"})
+    assert stale.status_code == 409
+    assert stale.get_json()["status"] == "doing"
+
+    not_owned = client.post(f"/db/tasks/{ids['backlog-1']}/move", json={"status": "doing"})
+    assert not_owned.status_code == 403
+    assert client.post(f"/db/tasks/{ids['backlog-0']}/move", json={"status": "bogus"}).status_code == 400
+    assert client.post("/db/tasks/999999/move", json={"status": "done"}).status_code == 404
+
+    with app.app_context():
+        assert db.session.get(Task, ids["backlog-0"]).status == "doing"
+        assert db.session.get(Task, ids["backlog-1"]).status == "backlog"
+        audit = AuditLog.query.filter_by(action="task_moved").one()
+        assert audit.metadata_json == {"from": "backlog", "to": "doing"}
+
+
+def test_viewer_cannot_move(client, app):
+    ids = _seed_board(app, per_status=1)
+    login(client, "viewer")
+    assert client.post(f"/db/tasks/{ids['next-0']}/move", json={"status": "done"}).status_code == 403
@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.databases.schedule import calendar_range, shift_period
+from app.extensions import db
+from app.models import Project, Task, User
+from tests.conftest import login
+
+
+def _add_tasks(app, rows):
+    with app.app_context():
+        admin = User.query.filter_by(username="admin").first()
+        alpha = Project(name="Alpha", status="active", created_by_user_id=admin.id)
+        beta = Project(name="Beta", status="active", created_by_user_id=admin.id)
+        db.session.add_all([alpha, beta])
+        db.session.flush()
+        projects = {"Alpha": alpha.id, "Beta": beta.id}
+        db.session.add_all(
+            Task(title=title, status=status, due_date=due, project_id=projects[project], created_by_user_id=admin.id)
+            for title, status, due, project in rows
+        )
+        db.session.commit()
+        return projects
+
+
+def test_calendar_range_covers_whole_weeks():
+    assert calendar_range("month", date(2024, 2, 14)) == (date(2024, 1, 29), date(2024, 3, 3))
+    assert calendar_range("week", date(2024, 2, 14)) == (date(2024, 2, 12), date(2024, 2, 18))
+    assert shift_period("month", date(2024, 12, 31), 1) == date(2025, 1, 1)
+    assert shift_period("month", date(2024, 1, 15), -1) == date(2023, 12, 1)
+
+
+def test_calendar_month_shows_range_with_filters_in_one_task_query(client, app):
+    projects = _add_tasks(
+        app,
+        [
+            ("Feb alpha", "doing", date(2024, 2, 14), "Alpha"),
+            ("Feb beta", "doing", date(2024, 2, 20), "Beta"),
+            ("Feb archived", "archived", date(2024, 2, 21), "Alpha"),
+            ("Grid edge", "next", date(2024, 1, 29), "Alpha"),
+            ("Out of range", "next", date(2024, 3, 4), "Alpha"),
+        ],
+    )
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        if "FROM task" in statement:
+            statements.append(statement)
+
+    login(client, "viewer")
+    with app.app_context():
+        engine = db.engines["workspace"]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        html = client.get("/db/tasks/calendar?date=2024-02-01").get_data(as_text=True)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert "February 2024" in html
+    assert "Feb alpha" in html and "Feb beta" in html and "Grid edge" in html
+    assert "Out of range" not in html and "Feb archived" not in html
+    assert len(statements) == 1 and "task.due_date >=" in statements[0] and "LEFT OUTER JOIN project" in statements[0]
+
+    filtered = client.get(f"/db/tasks/calendar?date=2024-02-01&project_id={projects['Beta']}").get_data(as_text=True)
+    assert "Feb beta" in filtered and "Feb alpha" not in filtered
+    archived = client.get("/db/tasks/calendar?date=2024-02-01&include_archived=1").get_data(as_text=True)
+    assert "Feb archived" in archived
+
+    week = client.get("/db/tasks/calendar?view=week&date=2024-02-14").get_data(as_text=True)
+    assert "Feb alpha" in week and "Feb beta" not in week
+
+
+def test_calendar_notes_when_range_is_cut_short(client, app):
+    _add_tasks(app, [(f"Busy {n}", "next", date(2024, 5, 10), "Alpha") for n in range(4)])
+    app.config["CALENDAR_TASK_LIMIT"] = 3
+    login(client, "viewer")
+    html = client.get("/db/tasks/calendar?date=2024-05-10").get_data(as_text=True)
+    assert html.count(">Busy ") == 3
+    assert "Only the first 3 tasks" in html
+
+
+def test_due_view_splits_overdue_and_this_week(client, app):
+    today = date.today()
+    week_end = today - timedelta(days=today.weekday()) + timedelta(days=6)
+    _add_tasks(
+        app,
+        [
+            ("Late open", "doing", today - timedelta(days=3), "Alpha"),
+            ("Late but done", "done", today - timedelta(days=3), "Alpha"),
+            ("Due today", "next", today, "Beta"),
+            ("After this week", "next", week_end + timedelta(days=1), "Alpha"),
+        ],
+    )
+    login(client, "viewer")
+    html = client.get("/db/tasks/due").get_data(as_text=True)
+    overdue, _, this_week = html.partition("Due this week")
+    assert "Late open" in overdue and "3 d late" in overdue
+    assert "Due today" in this_week
+    assert "Late but done" not in html and "After this week" not in html
+
+    blocked_only = client.get("/db/tasks/due?status=blocked").get_data(as_text=True)
+    assert "Late open" not in blocked_only and "Nothing overdue." in blocked_only
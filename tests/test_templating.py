@@ -0,0 +1,40 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+from app.templating import precompile_templates, template_timing_snapshot
+from tests.conftest import login
+
+
+def test_bytecode_cache_uses_configured_directory(app):
+    cache = app.jinja_env.bytecode_cache
+    assert isinstance(cache, FileSystemBytecodeCache)
+    assert cache.directory == app.config["TEMPLATE_BYTECODE_CACHE_DIR"]
+
+
+def test_precompile_compiles_every_template_and_reports_failures(app, tmp_path):
+    compiled, failures = precompile_templates(app)
+    assert failures == []
+    assert compiled == len(app.jinja_env.list_templates())
+    assert os.listdir(app.jinja_env.bytecode_cache.directory)
+
+    broken = tmp_path / "templates"
+    broken.mkdir()
+    (broken / "broken.html").write_text("{% if %}")
+    app.jinja_loader.searchpath.append(str(broken))
+    compiled, failures = precompile_templates(app)
+    assert [name for name, _ in failures] == ["broken.html"]
+    assert "TemplateSyntaxError" in failures[0][1]
+
+
+def test_render_time_is_recorded_per_template(app, client):
+    before = template_timing_snapshot().get("pages/pages_list.html", {}).get("count", 0)
+    login(client, "viewer")
+    client.get("/pages")
+    timing = template_timing_snapshot()["pages/pages_list.html"]
+    assert timing["count"] == before + 1
+    assert timing["max_seconds"] > 0
+
+    admin_client = app.test_client()
+    login(admin_client, "admin")
+    assert b"Template Render Times" in admin_client.get("/admin/storage").data
@@ -0,0 +1,61 @@
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User
+from app.user_cache import CachedUser, UserCache
+from tests.conftest import login
+
+
+def _count_user_selects(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM user" in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engines[None], "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def test_authenticated_requests_reuse_cached_user(client, app):
+    login(client, "editor")
+    statements = _count_user_selects(app)
+
+    for _ in range(3):
+        assert client.get("/").status_code == 200
+    assert len(statements) <= 1
+
+
+def test_user_edit_invalidates_cached_role(client, app):
+    with app.app_context():
+        viewer_id = User.query.filter_by(username="viewer").first().id
+
+    viewer = app.test_client()
+    login(viewer, "viewer")
+    assert viewer.get("/admin/users").status_code == 403
+
+    login(client, "admin")
+    response = client.post(f"/admin/users/{viewer_id}/edit", data={"role": "Admin", "is_active": "on"})
+    assert response.status_code == 302
+
+    assert viewer.get("/admin/users").status_code == 200
+
+
+def test_version_bump_is_seen_by_other_workers(app, tmp_path):
+    version_path = tmp_path / "user_cache.version"
+    worker_a = UserCache(ttl=300, version_path=version_path)
+    worker_b = UserCache(ttl=300, version_path=version_path)
+
+    with app.app_context():
+        user = User.query.filter_by(username="editor").first()
+        assert worker_b.get(user.id).role == "Editor"
+
+        user.role = "Viewer"
+        db.session.commit()
+        assert worker_b.get(user.id).role == "Editor"
+
+        worker_a.invalidate()
+        cached = worker_b.get(user.id)
+        assert isinstance(cached, CachedUser)
+        assert cached.role == "Viewer"